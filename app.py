@@ -15,6 +15,7 @@ from pages.auth.login import login  # User login page logic
 from utils.state_manager import StateManager  # Session state management
 # Utility function for creating ship grids
 from utils.grid_utils import create_ship_grid
+from tasks.ship_geometry import DEFAULT_GEOMETRY  # Default bay dimensions
 # Database configuration and connection management
 from config.db_config import DBConfig
 
@@ -69,14 +70,16 @@ def render_page(page_name):
 # Main application execution starts here
 if __name__ == "__main__":
     # Set up initial configurations for the application
-    # Define the dimensions for the ship's grid
-    rows, cols = 8, 12
+    # Define the dimensions for the ship's grid, until a manifest says otherwise
+    if "geometry" not in st.session_state:
+        st.session_state.geometry = DEFAULT_GEOMETRY
+    geometry = st.session_state.geometry
 
     # Check if the ship grid is already initialized in the session state
     if "ship_grid" not in st.session_state:
         # Create a new ship grid and store it in the session state
         st.session_state.ship_grid = create_ship_grid(
-            rows, cols)  # A utility function initializes an 8x12 grid for ship containers
+            geometry.rows, geometry.cols)  # A utility function initializes the grid for ship containers
 
     # Determine the current page based on the session state and render it
     render_page(state_manager.get_page())
@@ -0,0 +1,151 @@
+# Dockership/benchmarks/fuzz_manifests.py
+
+"""
+Fuzzes the manifest parser and the planners with generated manifests.
+
+Each seed picks a random bay size, fill ratio, hull, weight distribution,
+duplicate rate and imbalance, generates a manifest, and checks that:
+    - the manifest parser reads it back to the same manifest and state,
+    - balance keeps every container, never leaves one floating, and reports a
+      balanced ship only when it is,
+    - load_containers adds the new containers and unload_containers removes
+      the requested ones without touching the rest.
+
+Failing seeds are printed with their parameters so they can be replayed.
+
+Usage (from the repository root):
+    python -m benchmarks.fuzz_manifests --runs 200 --seed 0
+"""
+
+import argparse  # Command-line options
+import contextlib  # Silencing planner progress output
+import io  # Sink for planner progress output
+import random  # Seeded parameter choices
+import sys  # Exit status
+from collections import Counter  # Container multisets
+
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.ship_balancer import balance, calculate_balance, update_manifest
+from tasks.ship_geometry import ShipGeometry
+from tasks.ship_state import ShipState
+from tasks.ship_loader import load_containers, unload_containers
+from utils.manifest_generator import HULL_SHAPES, WEIGHT_DISTRIBUTIONS, generate_manifest
+
+SIZES = ((4, 6), (8, 12), (10, 16))
+
+# Small search budget so a run covers many seeds
+FUZZ_MAX_NODES = 5000
+FUZZ_TIME_LIMIT = 0.2
+
+
+def random_params(seed):
+    rng = random.Random(seed)
+    rows, cols = rng.choice(SIZES)
+    return {
+        "geometry": ShipGeometry(rows, cols),
+        "fill": round(rng.uniform(0, 0.7), 2),
+        "hull": rng.choice(HULL_SHAPES),
+        "hull_depth": rng.randint(0, 3),
+        "weights": rng.choice(WEIGHT_DISTRIBUTIONS),
+        "duplicates": rng.choice((0.0, 0.0, 0.2, 0.5)),
+        "imbalance": rng.choice((None, 0.3, 1.0, 3.0)),
+        "seed": seed,
+    }
+
+
+def parse(lines):
+    return parse_manifest_lines(lines).to_grid()
+
+
+def cargo(ship_grid):
+    return Counter((slot.container.name, slot.container.weight)
+                   for row in ship_grid for slot in row if slot.hasContainer)
+
+
+def floating(ship_grid):
+    """
+    Returns the (row, col) of containers sitting over an empty slot.
+    """
+    return [(r, c) for r in range(1, len(ship_grid)) for c in range(len(ship_grid[0]))
+            if ship_grid[r][c].hasContainer and not ship_grid[r - 1][c].hasContainer
+            and ship_grid[r - 1][c].available]
+
+
+def check(params):
+    """
+    Runs every check for one set of generator parameters.
+
+    Returns:
+        list[str]: Problems found, empty if the seed passes.
+    """
+    problems = []
+    lines = generate_manifest(**params)
+
+    ship_grid, containers = parse(lines)
+    if ShipGeometry.from_grid(ship_grid) != ShipGeometry(params["geometry"].rows, params["geometry"].cols):
+        problems.append("parsed geometry differs from the generated one")
+    if update_manifest(ship_grid) != lines:
+        problems.append("manifest does not round-trip through the parser")
+    if parse_manifest_lines(lines).to_state() != ShipState.from_grid(ship_grid):
+        problems.append("the parsed state differs from the state of the parsed grid")
+
+    before = cargo(ship_grid)
+    _, _, balanced = balance(ship_grid, containers, FUZZ_MAX_NODES, FUZZ_TIME_LIMIT)
+    if cargo(ship_grid) != before:
+        problems.append("balance lost or duplicated containers")
+    if floating(ship_grid):
+        problems.append(f"balance left floating containers at {floating(ship_grid)}")
+    if balanced and not calculate_balance(ship_grid)[2]:
+        problems.append("balance reported success on an unbalanced ship")
+
+    ship_grid, containers = parse(lines)
+    names = ["Fuzz A", "Fuzz B"]
+    loaded, _, _, _ = load_containers(ship_grid, names, {name: 1000 for name in names})
+    added = cargo(loaded) - cargo(ship_grid)
+    free = sum(1 for row in ship_grid for slot in row if slot.available)
+    if free > len(names) and added != Counter((name, 1000) for name in names):
+        problems.append(f"load_containers added {dict(added)}")
+
+    if containers:
+        rng = random.Random(params["seed"])
+        picks = rng.sample(containers, min(2, len(containers)))
+        unload_names = [ship_grid[r][c].container.name for r, c in picks]
+        unloaded, _, _, _ = unload_containers(ship_grid, unload_names)
+        removed = cargo(ship_grid) - cargo(unloaded)
+        if sorted(name for name, _ in removed.elements()) != sorted(unload_names):
+            problems.append(f"unload_containers removed {sorted(removed.elements())}, "
+                            f"expected {sorted(unload_names)}")
+        if cargo(unloaded) - cargo(ship_grid):
+            problems.append("unload_containers created containers")
+        if floating(unloaded):
+            problems.append(f"unload_containers left floating containers at {floating(unloaded)}")
+
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fuzz the planners with generated manifests.")
+    parser.add_argument("--runs", type=int, default=100, help="Number of seeds to try.")
+    parser.add_argument("--seed", type=int, default=0, help="First seed.")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for seed in range(args.seed, args.seed + args.runs):
+        params = random_params(seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                problems = check(params)
+            except Exception as e:  # Report the seed instead of stopping the run
+                problems = [f"{type(e).__name__}: {e}"]
+        if problems:
+            failures += 1
+            print(f"seed {seed}: {params}")
+            for problem in problems:
+                print(f"    {problem}")
+
+    print(f"{args.runs - failures}/{args.runs} seeds passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# Dockership/benchmarks/grid_scaling.py
+
+"""
+How planning time grows with the size of the ship bay.
+
+Builds seeded random ships of each requested size, then times balancing in
+both search modes, loading and unloading on each one. Balancing is also timed on
+generated manifests whose left side is several times heavier than the right,
+where the greedy plan both modes start from is far from the cheapest.
+
+Usage (from the repository root):
+    python -m benchmarks.grid_scaling --sizes 8x12 12x24 16x40 --fill 0.5 --imbalance 1.3 2 --seed 7
+"""
+
+import argparse  # Command-line options
+import copy  # Balancing the same ship in both modes
+import random  # Seeded random ships
+import time  # Wall-clock timing
+
+from tasks.balance_greedy import greedy_balance
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.ship_balancer import Container, Slot, balance, create_ship_grid
+from tasks.ship_geometry import ShipGeometry
+from tasks.ship_loader import load_containers, unload_containers
+from utils.manifest_generator import generate_manifest
+
+
+def parse_size(text):
+    """
+    Parses a "ROWSxCOLS" argument into a ShipGeometry.
+    """
+    try:
+        rows, cols = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected ROWSxCOLS, got '{text}'.")
+    return ShipGeometry(rows, cols)
+
+
+def random_ship(geometry, fill, rng):
+    """
+    Builds a ship with about `fill` of its slots occupied, stacked from the bottom.
+
+    The top row is kept free so the crane can always pass over the stacks.
+
+    Returns:
+        tuple: (ship_grid, container locations)
+    """
+    ship_grid = create_ship_grid(geometry.rows, geometry.cols)
+    for row in ship_grid:
+        for col in range(geometry.cols):
+            row[col] = Slot(None, hasContainer=False, available=True)
+
+    heights = [0] * geometry.cols
+    containers = []
+    target = int(fill * (geometry.rows - 1) * geometry.cols)
+
+    while len(containers) < target:
+        col = rng.randrange(geometry.cols)
+        if heights[col] >= geometry.rows - 1:
+            continue
+        weight = rng.randint(1, 99999)
+        ship_grid[heights[col]][col] = Slot(Container(f"C{len(containers):04d}", weight),
+                                            hasContainer=True, available=False)
+        containers.append([heights[col], col])
+        heights[col] += 1
+
+    return ship_grid, containers
+
+
+def imbalanced_ship(geometry, fill, imbalance, seed):
+    """
+    Builds a ship from a generated manifest with a left / right weight ratio of about `imbalance`.
+
+    Returns:
+        tuple: (ship_grid, container locations)
+    """
+    lines = generate_manifest(geometry, fill=fill, imbalance=imbalance, seed=seed)
+    return parse_manifest_lines(lines).to_grid()
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def plan_cost(steps):
+    return sum(move.cost for step in steps for move in step)
+
+
+def run(geometry, fill, seed, imbalance=None):
+    """
+    Times the planners on one random ship.
+
+    Args:
+        imbalance (float, optional): Balance a generated ship with this left /
+            right weight ratio instead of the random one.
+
+    Returns:
+        dict: Timings in seconds plus the number of containers, the crane minutes
+            of the greedy plan, and the moves and crane minutes of the balance
+            plan in each mode.
+    """
+    rng = random.Random(seed)
+
+    ship_grid, containers = random_ship(geometry, fill, rng)
+    if imbalance is not None:
+        ship_grid, containers = imbalanced_ship(geometry, fill, imbalance, seed)
+    greedy = greedy_balance(ship_grid)
+    beam_grid = copy.deepcopy(ship_grid)
+    balance_time, (steps, _, balanced) = timed(balance, ship_grid, containers)
+    beam_time, (beam_steps, _, beam_balanced) = timed(balance, beam_grid, containers, mode="beam")
+
+    ship_grid, containers = random_ship(geometry, fill, rng)
+    names = [f"L{i}" for i in range(5)]
+    load_time, _ = timed(load_containers, ship_grid, names, {name: 1000 for name in names},
+                         geometry=geometry)
+
+    picks = rng.sample(containers, min(5, len(containers)))
+    unload_names = [ship_grid[r][c].container.name for r, c in picks]
+    unload_time, _ = timed(unload_containers, ship_grid, unload_names, geometry=geometry)
+
+    return {
+        "size": f"{geometry.rows}x{geometry.cols}",
+        "imbalance": imbalance,
+        "containers": len(containers),
+        "greedy_cost": greedy[1] if greedy is not None else None,
+        "balance_s": balance_time,
+        "balance_moves": len(steps),
+        "balance_cost": plan_cost(steps),
+        "balanced": balanced,
+        "beam_s": beam_time,
+        "beam_moves": len(beam_steps),
+        "beam_cost": plan_cost(beam_steps),
+        "beam_balanced": beam_balanced,
+        "load_s": load_time,
+        "unload_s": unload_time,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=parse_size,
+                        default=[parse_size(size) for size in ("8x12", "12x24", "16x40")],
+                        help="Bay sizes as ROWSxCOLS.")
+    parser.add_argument("--fill", type=float, default=0.5,
+                        help="Fraction of the slots below the top row to fill.")
+    parser.add_argument("--imbalance", nargs="*", type=float, default=[2.0],
+                        help="Left / right weight ratios of the generated ships to balance as well.")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed.")
+    args = parser.parse_args(argv)
+
+    header = (f"{'size':>7} {'imb':>4} {'ctrs':>5} {'greedy':>6} {'balance_s':>10} {'moves':>6} {'cost':>5} {'bal':>5} "
+              f"{'beam_s':>7} {'moves':>6} {'cost':>5} {'bal':>5} {'load_s':>8} {'unload_s':>9}")
+    print(header)
+    for geometry in args.sizes:
+        for imbalance in [None] + args.imbalance:
+            result = run(geometry, args.fill, args.seed, imbalance)
+            print(f"{result['size']:>7} {result['imbalance'] or '-':>4} {result['containers']:>5} "
+                  f"{str(result['greedy_cost']):>6} {result['balance_s']:>10.3f} "
+                  f"{result['balance_moves']:>6} {result['balance_cost']:>5} {str(result['balanced']):>5} "
+                  f"{result['beam_s']:>7.3f} {result['beam_moves']:>6} {result['beam_cost']:>5} "
+                  f"{str(result['beam_balanced']):>5} {result['load_s']:>8.3f} {result['unload_s']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Dockership/benchmarks/manifest_parsing.py
+
+"""
+How long it takes to read a manifest into a ship grid and a search state.
+
+Times the one-pass manifest parser against the per-line approach it replaced
+(two regex substitutions and a split per line, on a grid sized by the parser), on the bundled manifests and on generated bays of each requested
+size. Each row reports the best of `--repeat` runs, in milliseconds.
+
+Usage (from the repository root):
+    python -m benchmarks.manifest_parsing --sizes 8x12 16x40 40x100 --repeat 20
+"""
+
+import argparse  # Command-line options
+import glob  # Bundled manifests
+import os  # Paths to the bundled manifests
+import re  # The legacy per-line parsing
+import time  # Wall-clock timing
+
+from benchmarks.grid_scaling import parse_size
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.ship_balancer import Container, Slot, create_ship_grid
+from tasks.ship_state import ShipState
+from utils.manifest_generator import generate_manifest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def legacy_grid(lines):
+    """
+    Builds a grid the way the pages did before the shared parser.
+    """
+    geometry = parse_manifest_lines(lines).geometry()
+    ship_grid, containers = create_ship_grid(geometry.rows, geometry.cols), []
+    for line in lines:
+        slot_data = line.split()
+        loc = [int(val) - 1 for val in re.sub(r"[\[\]]", '', slot_data[0]).split(",")[:2]]
+        weight = int(re.sub(r"[\{\}\,]", '', slot_data[1]))
+        status = " ".join(slot_data[2:])
+        x, y = loc
+        if status == "NAN":
+            ship_grid[x][y] = Slot(None, hasContainer=False, available=False)
+        elif status == "UNUSED":
+            ship_grid[x][y] = Slot(None, hasContainer=False, available=True)
+        else:
+            ship_grid[x][y] = Slot(Container(status, weight), hasContainer=True, available=False)
+            containers.append(loc)
+    return ship_grid, containers
+
+
+def best_time(function, lines, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(lines)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(name, lines, repeat):
+    """
+    Times every way of reading one manifest.
+
+    Returns:
+        dict: Timings in milliseconds.
+    """
+    if parse_manifest_lines(lines).to_grid()[1] != legacy_grid(lines)[1]:
+        raise AssertionError(f"{name}: the parser and the legacy code disagree")
+
+    return {
+        "name": name,
+        "slots": len(lines),
+        "legacy_grid_ms": best_time(legacy_grid, lines, repeat),
+        "parse_ms": best_time(parse_manifest_lines, lines, repeat),
+        "grid_ms": best_time(lambda text: parse_manifest_lines(text).to_grid(), lines, repeat),
+        "legacy_state_ms": best_time(lambda text: ShipState.from_grid(legacy_grid(text)[0]), lines, repeat),
+        "state_ms": best_time(lambda text: parse_manifest_lines(text).to_state(), lines, repeat),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=parse_size,
+                        default=[parse_size(size) for size in ("8x12", "16x40", "40x100")],
+                        help="Generated bay sizes as ROWSxCOLS.")
+    parser.add_argument("--fill", type=float, default=0.5, help="Fraction of the generated slots to fill.")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per timing; the best is kept.")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for the generated bays.")
+    args = parser.parse_args(argv)
+
+    cases = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.txt"))):
+        with open(path) as file:
+            lines = [line for line in file.read().splitlines() if line.strip()]
+        cases.append((os.path.splitext(os.path.basename(path))[0], lines))
+    for geometry in args.sizes:
+        cases.append((f"{geometry.rows}x{geometry.cols}",
+                      generate_manifest(geometry, fill=args.fill, seed=args.seed)))
+
+    print(f"{'manifest':>12} {'slots':>6} {'legacy_grid':>12} {'parse':>8} {'grid':>8} "
+          f"{'legacy_state':>13} {'state':>8}")
+    for name, lines in cases:
+        result = run(name, lines, args.repeat)
+        print(f"{result['name']:>12} {result['slots']:>6} {result['legacy_grid_ms']:>12.3f} "
+              f"{result['parse_ms']:>8.3f} {result['grid_ms']:>8.3f} "
+              f"{result['legacy_state_ms']:>13.3f} {result['state_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
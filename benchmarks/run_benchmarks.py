@@ -0,0 +1,314 @@
+# Dockership/benchmarks/run_benchmarks.py
+
+"""
+Benchmark harness for the planners.
+
+Runs balance (anytime and beam modes), sift, load and unload from tasks.ship_balancer,
+load_containers, unload_containers and plan_port_call from tasks.ship_loader,
+and the parallel balance_portfolio, on the bundled manifests in data/ and on seeded synthetic manifests at several
+fill levels. Each run reports wall time, peak memory, plan cost and move count.
+Results can be saved as a JSON baseline and later runs compared against it.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks --save benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --compare benchmarks/baseline.json
+"""
+
+import argparse  # Command-line options
+import contextlib  # Silencing planner progress output
+import glob  # Finding bundled manifests
+import io  # Sink for planner progress output
+import json  # Baseline files
+import os  # Paths and case names
+import platform  # Recording where a baseline was taken
+import sys  # Exit status for regressions
+import time  # Wall-clock timing
+import tracemalloc  # Peak memory
+
+from tasks.balance_portfolio import balance_portfolio
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.plan_history import PlanHistory
+from tasks.ship_balancer import (
+    Container,
+    balance,
+    load,
+    sift,
+    unload,
+)
+from tasks.ship_geometry import DEFAULT_GEOMETRY
+from tasks.ship_loader import load_containers, plan_port_call, unload_containers
+from utils.manifest_generator import WEIGHT_DISTRIBUTIONS, generate_manifest
+
+DEFAULT_FILLS = (0.2, 0.4, 0.6)
+DEFAULT_SEED = 7
+
+# A run counts as a regression when it is this much slower or hungrier than the baseline
+DEFAULT_TOLERANCE = 1.5
+
+
+# Building cases
+
+def manifest_case(lines):
+    """
+    Returns a case factory that builds a fresh grid from manifest lines, parsed once.
+    """
+    manifest = parse_manifest_lines(lines)
+
+    def build():
+        return manifest.to_grid()
+
+    return build
+
+
+def collect_cases(data_dir, fills, weights, seed):
+    """
+    Returns (name, factory) pairs for the bundled and synthetic manifests.
+    """
+    cases = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.txt"))):
+        with open(path) as file:
+            lines = [line for line in file.read().splitlines() if line.strip()]
+        cases.append((os.path.splitext(os.path.basename(path))[0], manifest_case(lines)))
+    for distribution in weights:
+        for fill in fills:
+            lines = generate_manifest(DEFAULT_GEOMETRY, fill=fill, weights=distribution, seed=seed)
+            cases.append((f"synth-{distribution}-fill{fill:g}", manifest_case(lines)))
+    return cases
+
+
+# Operations: each takes a fresh (ship_grid, containers) and returns (cost, moves)
+
+def lowest_free_slots(ship_grid, count):
+    """
+    Returns the bottom free slot of the `count` emptiest columns, for load targets.
+    """
+    heights = []
+    for col in range(len(ship_grid[0])):
+        row = 0
+        while row < len(ship_grid) and not ship_grid[row][col].available:
+            row += 1
+        if row < len(ship_grid) - 1:
+            heights.append((row, col))
+    return [list(slot) for slot in sorted(heights)[:count]]
+
+
+def topmost_containers(containers, count):
+    return sorted(containers, key=lambda loc: (-loc[0], loc[1]))[:count]
+
+
+def plan_cost(steps):
+    return sum(move.cost for step in steps for move in step), len(steps)
+
+
+def run_balance(ship_grid, containers):
+    steps, _, _ = balance(ship_grid, containers)
+    return plan_cost(steps)
+
+
+def run_beam(ship_grid, containers):
+    steps, _, _ = balance(ship_grid, containers, mode="beam")
+    return plan_cost(steps)
+
+
+def run_sift(ship_grid, containers):
+    history = PlanHistory(ship_grid)
+    sift(ship_grid, history)
+    return plan_cost(history.steps)
+
+
+def run_load(ship_grid, containers):
+    targets = lowest_free_slots(ship_grid, 2)
+    steps, _ = load([(Container(f"Bench{i}", 1000 * (i + 1)), loc) for i, loc in enumerate(targets)],
+                    ship_grid)
+    return plan_cost(steps)
+
+
+def run_unload(ship_grid, containers):
+    steps, _ = unload(topmost_containers(containers, 2), ship_grid)
+    return plan_cost(steps)
+
+
+def run_load_containers(ship_grid, containers):
+    names = ["BenchA", "BenchB"]
+    _, _, cost, steps = load_containers(ship_grid, names, {name: 1000 for name in names})
+    return cost, sum(len(steps.moves(i)) for i in range(len(steps)))
+
+
+def run_unload_containers(ship_grid, containers):
+    names = [ship_grid[r][c].container.name for r, c in topmost_containers(containers, 2)]
+    _, _, cost, steps = unload_containers(ship_grid, names)
+    return cost, sum(len(steps.moves(i)) for i in range(len(steps)))
+
+
+def run_port_call(ship_grid, containers):
+    names = [ship_grid[r][c].container.name for r, c in topmost_containers(containers, 2)]
+    loads = ["BenchA", "BenchB"]
+    _, _, cost, steps = plan_port_call(ship_grid, loads, {name: 1000 for name in loads}, names)
+    return cost, sum(len(steps.moves(i)) for i in range(len(steps)))
+
+
+def run_portfolio(ship_grid, containers):
+    result = balance_portfolio(ship_grid)
+    if result.column_moves is None:
+        raise RuntimeError("No legal plan before the deadline")
+    return result.cost, len(result.column_moves)
+
+
+OPERATIONS = {
+    "balance": run_balance,
+    "beam": run_beam,
+    "portfolio": run_portfolio,
+    "sift": run_sift,
+    "load": run_load,
+    "unload": run_unload,
+    "load_containers": run_load_containers,
+    "unload_containers": run_unload_containers,
+    "port_call": run_port_call,
+}
+
+
+# Measuring
+
+def measure(build, operation, repeat):
+    """
+    Runs one operation on one case.
+
+    Wall time is the best of `repeat` runs; peak memory is taken from a separate
+    run under tracemalloc so that tracing does not skew the timings.
+
+    Returns:
+        dict: wall_s, peak_kb, cost and moves.
+    """
+    wall = float("inf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            ship_grid, containers = build()
+            start = time.perf_counter()
+            cost, moves = operation(ship_grid, containers)
+            wall = min(wall, time.perf_counter() - start)
+
+        ship_grid, containers = build()
+        tracemalloc.start()
+        try:
+            operation(ship_grid, containers)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {"wall_s": wall, "peak_kb": peak / 1024, "cost": cost, "moves": moves}
+
+
+def run_all(cases, operations, repeat):
+    results = []
+    for case_name, build in cases:
+        for op_name in operations:
+            result = {"case": case_name, "operation": op_name}
+            try:
+                result.update(measure(build, OPERATIONS[op_name], repeat))
+            except Exception as e:  # Keep going so one broken case does not hide the rest
+                result["error"] = f"{type(e).__name__}: {e}"
+            results.append(result)
+            print(format_row(result), flush=True)
+    return results
+
+
+# Reporting
+
+HEADER = f"{'case':<28} {'operation':<18} {'wall_s':>9} {'peak_kb':>10} {'cost':>8} {'moves':>6}"
+
+
+def format_row(result):
+    if "error" in result:
+        return f"{result['case']:<28} {result['operation']:<18} ERROR {result['error']}"
+    return (f"{result['case']:<28} {result['operation']:<18} {result['wall_s']:>9.4f} "
+            f"{result['peak_kb']:>10.1f} {result['cost']:>8} {result['moves']:>6}")
+
+
+def save_baseline(path, results, args):
+    baseline = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": args.seed,
+            "fills": args.fills,
+            "weights": args.weights,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2)
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Prints each result next to its baseline and returns the number of regressions.
+
+    A regression is a run that is `tolerance` times slower or hungrier than the
+    baseline, a costlier plan, or a run that now fails.
+    """
+    with open(baseline_path) as file:
+        baseline = {(r["case"], r["operation"]): r for r in json.load(file)["results"]}
+
+    print()
+    print(f"{'case':<28} {'operation':<18} {'time x':>7} {'mem x':>7} {'cost':>12}  status")
+    regressions = 0
+    for result in results:
+        key = (result["case"], result["operation"])
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if "error" in result or "error" in old:
+            status = "REGRESSION" if "error" in result and "error" not in old else "ok"
+            regressions += status != "ok"
+            print(f"{key[0]:<28} {key[1]:<18} {'-':>7} {'-':>7} {'-':>12}  {status}")
+            continue
+
+        time_ratio = result["wall_s"] / old["wall_s"] if old["wall_s"] else 1.0
+        mem_ratio = result["peak_kb"] / old["peak_kb"] if old["peak_kb"] else 1.0
+        worse = time_ratio > tolerance or mem_ratio > tolerance or result["cost"] > old["cost"]
+        regressions += worse
+        print(f"{key[0]:<28} {key[1]:<18} {time_ratio:>7.2f} {mem_ratio:>7.2f} "
+              f"{str(old['cost']) + '->' + str(result['cost']):>12}  {'REGRESSION' if worse else 'ok'}")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Dockership planners.")
+    parser.add_argument("--data-dir", default="data", help="Directory of bundled manifests.")
+    parser.add_argument("--fills", nargs="*", type=float, default=list(DEFAULT_FILLS),
+                        help="Fill levels of the synthetic manifests.")
+    parser.add_argument("--weights", nargs="*", choices=WEIGHT_DISTRIBUTIONS, default=["uniform"],
+                        help="Weight distributions of the synthetic manifests.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed for synthetic manifests.")
+    parser.add_argument("--operations", nargs="+", choices=sorted(OPERATIONS), default=list(OPERATIONS),
+                        help="Operations to run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the best is kept.")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a JSON baseline.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Slowdown or memory growth factor that counts as a regression.")
+    args = parser.parse_args(argv)
+
+    cases = collect_cases(args.data_dir, args.fills, args.weights, args.seed)
+
+    print(HEADER)
+    results = run_all(cases, args.operations, args.repeat)
+
+    if args.save:
+        save_baseline(args.save, results, args)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{regressions} regression(s) against {args.compare}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+# Dockership/cli.py
+
+"""
+Headless batch planning for a day of port calls.
+
+Plans every manifest given on the command line without the web app: a
+manifest with a transfer list gets its loads and unloads planned together,
+and one without is balanced. Manifests are planned in parallel processes. For
+each one the OUTBOUND manifest and a JSON plan are written to the output
+directory, and a summary.csv of times and costs covers the whole batch.
+
+A transfer list sits next to its manifest (or in --transfers) as
+<manifest name>.transfer.txt, with one container per line:
+    LOAD, <name>, <weight>
+    UNLOAD, <name>
+Blank lines and lines starting with "#" are skipped.
+
+Usage (from the repository root):
+    python cli.py data/ --out outbound --workers 4
+    python cli.py "manifests/*.txt" --transfers transfers/ --time-limit 5
+"""
+
+import contextlib  # Silencing planner progress output
+import csv  # Batch summary
+import glob  # Manifest patterns
+import io  # Sink for planner progress output
+import json  # Plan files
+import os  # Paths and CPU count
+import time  # Planning time per manifest
+from concurrent.futures import ProcessPoolExecutor, as_completed  # Planning manifests in parallel
+
+import click  # Command-line interface
+
+from tasks.balance_search import DEFAULT_TIME_LIMIT
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.manifest_writer import ManifestWriter
+from tasks.moves import summarize_moves
+from tasks.ship_balancer import balance
+from tasks.ship_loader import DEFAULT_PORT_CALL_TIME_LIMIT, append_outbound_to_filename, plan_port_call
+
+TRANSFER_SUFFIX = ".transfer.txt"
+
+SUMMARY_FIELDS = ("manifest", "operation", "containers", "steps", "cost", "cost_unit", "seconds",
+                  "status", "error")
+
+
+def read_transfer_list(path):
+    """
+    Reads a transfer list.
+
+    Returns:
+        tuple: (load_names, load_weights, unload_names)
+
+    Raises:
+        ValueError: If a line is not a LOAD or UNLOAD entry.
+    """
+    load_names, load_weights, unload_names = [], {}, []
+    with open(path) as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = [field.strip() for field in line.split(",")]
+            action = fields[0].upper()
+            if action == "LOAD" and len(fields) == 3 and fields[2].isdigit():
+                load_names.append(fields[1])
+                load_weights[fields[1]] = int(fields[2])
+            elif action == "UNLOAD" and len(fields) == 2:
+                unload_names.append(fields[1])
+            else:
+                raise ValueError(f"{path}, line {line_number}: expected 'LOAD, name, weight' "
+                                 f"or 'UNLOAD, name': '{line}'")
+    return load_names, load_weights, unload_names
+
+
+def collect_manifests(sources):
+    """
+    Expands directories and glob patterns into manifest paths, skipping transfer lists and outbound manifests.
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = glob.glob(os.path.join(source, "*.txt"))
+        else:
+            matches = glob.glob(source) or [source]
+        paths.extend(path for path in matches
+                     if not path.endswith(TRANSFER_SUFFIX) and not path.endswith("_OUTBOUND.txt"))
+    return sorted(set(paths))
+
+
+def transfer_list_path(manifest_path, transfers_dir=None):
+    """
+    Returns the transfer list for a manifest, or None if it has none.
+    """
+    stem = os.path.splitext(os.path.basename(manifest_path))[0]
+    path = os.path.join(transfers_dir or os.path.dirname(manifest_path), stem + TRANSFER_SUFFIX)
+    return path if os.path.exists(path) else None
+
+
+def plan_json(name, operation, steps, status, cost, cost_unit, messages):
+    """
+    Returns the JSON-ready plan: each step's moves as 0-based Move records, with a 1-based summary.
+    """
+    plan_steps = []
+    for moves in steps:
+        if not moves:
+            continue
+        summary = summarize_moves(moves)
+        plan_steps.append({
+            "container": summary.container,
+            "move": summary.describe(),
+            "cost": summary.cost,
+            "moves": [move._asdict() for move in moves],
+        })
+    return {"manifest": name, "operation": operation, "status": status, "cost": cost,
+            "cost_unit": cost_unit, "messages": messages, "steps": plan_steps}
+
+
+def summary_row(manifest_path, transfer_path):
+    """
+    Returns an empty summary row for a manifest.
+    """
+    row = dict.fromkeys(SUMMARY_FIELDS, "")
+    row.update(manifest=os.path.basename(manifest_path), operation="transfer" if transfer_path else "balance")
+    return row
+
+
+def plan_manifest(manifest_path, transfer_path, out_dir, time_limit=None, mode="anytime"):
+    """
+    Plans one manifest and writes its OUTBOUND manifest and JSON plan.
+
+    Runs in a worker process, so it returns only the summary row and reports
+    failures in it instead of raising.
+
+    Returns:
+        dict: One summary.csv row.
+    """
+    name = os.path.basename(manifest_path)
+    row = summary_row(manifest_path, transfer_path)
+    start = time.perf_counter()
+
+    try:
+        with open(manifest_path) as file:
+            ship_grid, containers = parse_manifest_lines(file).to_grid()
+        row["containers"] = len(containers)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            if transfer_path:
+                load_names, load_weights, unload_names = read_transfer_list(transfer_path)
+                ship_grid, messages, cost, history = plan_port_call(
+                    ship_grid, load_names, load_weights, unload_names,
+                    time_limit=DEFAULT_PORT_CALL_TIME_LIMIT if time_limit is None else time_limit)
+                steps, cost_unit = history.steps, "seconds"
+                status = not any(message.startswith("Error") for message in messages)
+            else:
+                steps, _, status = balance(
+                    ship_grid, containers,
+                    time_limit=DEFAULT_TIME_LIMIT if time_limit is None else time_limit, mode=mode)
+                messages, cost_unit = [], "minutes"
+                cost = sum(move.cost for moves in steps for move in moves)
+
+        with open(os.path.join(out_dir, append_outbound_to_filename(name)), "wb") as file:
+            ManifestWriter().write(ship_grid, file)
+        with open(os.path.join(out_dir, os.path.splitext(name)[0] + "_plan.json"), "w") as file:
+            json.dump(plan_json(name, row["operation"], steps, status, cost, cost_unit, messages), file, indent=2)
+    except Exception as e:
+        # One bad manifest must not cost the rest of the batch its results
+        return error_row(row, start, e)
+
+    row.update(steps=sum(1 for moves in steps if moves), cost=cost, cost_unit=cost_unit,
+               seconds=round(time.perf_counter() - start, 3), status="ok" if status else "partial")
+    return row
+
+
+def error_row(row, start, error):
+    """
+    Marks a summary row as failed with the error that stopped it.
+    """
+    row.update(seconds=round(time.perf_counter() - start, 3), status="error",
+               error=str(error) or type(error).__name__)
+    return row
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.argument("sources", nargs=-1, required=True)
+@click.option("--transfers", type=click.Path(file_okay=False), default=None,
+              help="Directory of <manifest name>.transfer.txt lists; defaults to each manifest's directory.")
+@click.option("--out", "out_dir", type=click.Path(file_okay=False), default="outbound", show_default=True,
+              help="Directory for OUTBOUND manifests, JSON plans and summary.csv.")
+@click.option("--workers", type=click.IntRange(min=1), default=os.cpu_count() or 1, show_default=True,
+              help="Manifests planned in parallel.")
+@click.option("--time-limit", type=click.FloatRange(min=0, min_open=True), default=None,
+              help="Planning budget per manifest in seconds; defaults to each planner's own.")
+@click.option("--mode", type=click.Choice(["anytime", "beam"]), default="anytime", show_default=True,
+              help="Balance search; beam keeps memory bounded on large bays.")
+def main(sources, transfers, out_dir, workers, time_limit, mode):
+    """
+    Plans every manifest in SOURCES (files, directories or glob patterns).
+    """
+    manifests = collect_manifests(sources)
+    if not manifests:
+        raise click.UsageError("No manifests found.")
+    os.makedirs(out_dir, exist_ok=True)
+
+    jobs = [(path, transfer_list_path(path, transfers), out_dir, time_limit, mode) for path in manifests]
+    rows = []
+    summary_path = os.path.join(out_dir, "summary.csv")
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(jobs))) if workers != 1 else None
+    try:
+        if pool is None:
+            results = ((job, lambda job=job: plan_manifest(*job)) for job in jobs)
+        else:
+            futures = {pool.submit(plan_manifest, *job): job for job in jobs}
+            results = ((futures[future], future.result) for future in as_completed(futures))
+        for job, result in results:
+            start = time.perf_counter()
+            try:
+                row = result()
+            except Exception as e:
+                # A worker that died, or a failure outside plan_manifest's own handling
+                row = error_row(summary_row(job[0], job[1]), start, e)
+            rows.append(row)
+            detail = row["error"] or f"{row['steps']} steps, {row['cost']} {row['cost_unit']}"
+            click.echo(f"{row['manifest']}: {row['operation']} {row['status']} ({detail}, {row['seconds']} s)")
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        # Written even if the batch is interrupted, with the manifests planned so far
+        with open(summary_path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            writer.writerows(sorted(rows, key=lambda row: row["manifest"]))
+
+    failed = sum(1 for row in rows if row["status"] == "error")
+    click.echo(f"Planned {len(rows) - failed} of {len(rows)} manifests; summary in {summary_path}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+# Dockership/conftest.py
+
+"""
+Puts the repository root on sys.path, so tests import tasks/ and utils/ as the app does.
+"""
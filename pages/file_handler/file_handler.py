@@ -17,8 +17,10 @@ from utils.components.buttons import (
 # Functions for grid creation and validation
 from utils.grid_utils import create_ship_grid, validate_ship_grid
 from utils.logging import log_action  # Function to log user actions
-# Function to update the ship grid with container data
-from tasks.ship_balancer import update_ship_grid
+# Manifest parse errors, and the cache that parses each manifest once
+from tasks.manifest_parser import ManifestError
+from utils.plan_cache import PLAN_CACHE, manifest_digest
+from tasks.name_index import NameIndex  # Container name lookups for unloading
 # Database configuration class for connection and collections
 from config.db_config import DBConfig
 
@@ -52,54 +54,71 @@ def file_handler():
     )  # Allow users to upload only .txt files
 
     if uploaded_file:
-        # Read and decode the file content
-        file_content = uploaded_file.read().decode("utf-8")
+        data = uploaded_file.getvalue()
         filename = uploaded_file.name
-
-        # Log the file upload event
-        log_file_upload(username, filename)
-
-        # Validate the file content
-        is_valid, error_message = validate_file_content(file_content)
-        if not is_valid:
-            # Display error if validation fails
-            st.error(error_message)
-            return
-
-        # Process file content and initialize the ship grid
-        file_lines = process_file_content(file_content)
-        # Store the raw manifest content in session state
-        st.session_state.file_content = file_content
-        st.session_state.filename = filename  # Store the file name in session state
-
-        # Initialize ship grid and container list if not already initialized
-        if "ship_grid" not in st.session_state:
+        digest = manifest_digest(data)
+
+        # Streamlit reruns this page on every click; only a new manifest resets the ship
+        if st.session_state.get("manifest_digest") != digest:
+            # Decode the file content
+            file_content = data.decode("utf-8")
+
+            # Log the file upload event
+            log_file_upload(username, filename)
+
+            # Validate the file content
+            is_valid, error_message = validate_file_content(file_content)
+            if not is_valid:
+                # Display error if validation fails
+                st.error(error_message)
+                return
+
+            # Parse the manifest, or reuse the parse from another session that opened it
+            try:
+                parsed = PLAN_CACHE.manifest(data)
+            except ManifestError as e:
+                st.error(f"Invalid manifest: {e}")
+                return
+
+            # Store the raw manifest content in session state
+            st.session_state.file_content = file_content
+            st.session_state.filename = filename  # Store the file name in session state
+
+            # Build a fresh ship grid and container list sized by the manifest
+            geometry = parsed.manifest.geometry()
+            st.session_state.geometry = geometry
             st.session_state.ship_grid = create_ship_grid(
-                8, 12
-            )  # Create an 8x12 grid for the ship
-        if "containers" not in st.session_state:
-            st.session_state.containers = []  # Initialize an empty container list
-
-        # Update the ship grid with container data from the file
-        update_ship_grid(
-            file_lines, st.session_state.ship_grid, st.session_state.containers
-        )
-
-        # Validate the grid structure
-        try:
-            validate_ship_grid(st.session_state.ship_grid)
-        except ValueError as e:
-            # Display error if grid validation fails
-            st.error(f"Grid validation failed: {e}")
-            return
-
-        # Count the number of containers on the ship
+                geometry.rows, geometry.cols
+            )
+            st.session_state.containers = []
+
+            # Update the ship grid with container data from the file
+            st.session_state.name_index = NameIndex()
+            parsed.manifest.fill_grid(
+                st.session_state.ship_grid, st.session_state.containers,
+                st.session_state.name_index
+            )
+
+            # Validate the grid structure
+            try:
+                validate_ship_grid(st.session_state.ship_grid)
+            except ValueError as e:
+                # Display error if grid validation fails
+                st.error(f"Grid validation failed: {e}")
+                return
+            st.session_state.manifest_digest = digest
+
+            # Count the number of containers on the ship
+            log_action(
+                username=username,
+                action="COUNT_CONTAINERS",
+                notes=f"Manifest {filename} processed. "
+                      f"Total containers: {count_containers_on_ship(st.session_state.ship_grid)}",
+            )  # Log the container count
+
+        # Process file content for display
+        file_lines = process_file_content(st.session_state.file_content)
         container_count = count_containers_on_ship(st.session_state.ship_grid)
-        log_action(
-            username=username,
-            action="COUNT_CONTAINERS",
-            notes=f"Manifest {filename} processed. Total containers: {container_count}",
-        )  # Log the container count
 
         # Display success message and processed data
         st.success("File processed successfully!")
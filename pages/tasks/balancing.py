@@ -13,6 +13,12 @@ from tasks.ship_balancer import (
     balance,
 )
 
+from tasks.balance_search import DEFAULT_TIME_LIMIT
+from tasks.manifest_writer import ManifestWriter
+from tasks.moves import summarize_moves
+from tasks.name_index import NameIndex
+from tasks.ship_geometry import DEFAULT_GEOMETRY
+from utils.plan_cache import PLAN_CACHE, grid_digest
 from tasks.balancing_utils import (
     plotly_visualize_grid,
     convert_grid_to_manifest,
@@ -65,9 +71,8 @@ def visualize_steps_with_overlay():
         ) - 1
         # Get current sub-step details
         current_sub_step = selected_step[sub_step_number]
-        from_coords, to_coords = current_sub_step.replace("[", "").replace("]", "").split(" to ")
-        from_x, from_y = map(int, from_coords.split(","))
-        to_x, to_y = map(int, to_coords.split(","))
+        from_x, from_y = current_sub_step.from_row, current_sub_step.from_col
+        to_x, to_y = current_sub_step.to_row, current_sub_step.to_col
         # Overlay the sub-step movement on the base grid
         overlay_plot = plotly_visualize_grid_with_overlay(
             base_grid, (from_x, from_y), (to_x,
@@ -102,8 +107,8 @@ def balancing_page():
     # Streamlit App
     st.title("Ship Balancing System")
     username = st.session_state.get("username", "User")
-    rows = 8  # Fixed to match the manifest
-    columns = 12  # Fixed to match the manifest
+    geometry = st.session_state.get("geometry", DEFAULT_GEOMETRY)  # Matches the manifest
+    rows, columns = geometry.rows, geometry.cols
 
     if "containers" not in st.session_state:
         st.session_state.containers = []
@@ -123,6 +128,9 @@ def balancing_page():
     if "outbound_filename" not in st.session_state:
         st.session_state.outbound_filename = "manifest.txt"
 
+    if "manifest_writer" not in st.session_state:
+        st.session_state.manifest_writer = ManifestWriter()
+
     if "ship_grids" not in st.session_state:
         st.session_state.ship_grids = []
 
@@ -179,6 +187,12 @@ def balancing_page():
             st.error(
                 "The ship is significantly unbalanced. Balancing is highly recommended.")
    # Perform balancing
+    time_budget = st.slider("Planning time budget (seconds)", min_value=1, max_value=30,
+                            value=int(DEFAULT_TIME_LIMIT),
+                            help="A first plan is shown at once; cheaper ones replace it until the budget runs out.")
+    search_mode = st.radio("Search", ["anytime", "beam"], horizontal=True,
+                           help="Anytime search proves plans optimal on small bays; "
+                                "beam search keeps memory bounded on large ones.")
     if st.button("Balance Ship"):
         # Save the initial grid only once to preserve its state
         if "initial_grid" not in st.session_state:
@@ -196,38 +210,58 @@ def balancing_page():
             log_action(username=username, action="BALANCE_START", 
                     notes=f"{username} started ship balancing.")
 
-            # Perform balancing and get steps
-            steps, ship_grids, status = balance(
-                st.session_state.ship_grid, st.session_state.containers)
+            # Show each plan as soon as it is found, then replace it when a cheaper one arrives
+            plan_status = st.empty()
+
+            def show_plan(column_moves, cost):
+                plan_status.info(f"Best plan so far: {len(column_moves)} moves, {cost} minutes. "
+                                 f"Looking for a cheaper one...")
+
+            # Perform balancing and get steps, reusing a plan already made for this ship
+            (steps, ship_grids, status), cached = PLAN_CACHE.plan(
+                grid_digest(st.session_state.ship_grid), "balance", (search_mode, time_budget),
+                lambda: balance(st.session_state.ship_grid, st.session_state.containers,
+                                time_limit=time_budget, callback=show_plan, mode=search_mode))
+            plan_status.empty()
+            if cached:
+                st.info("Reused the plan computed earlier for this ship.")
             
-            # Store intermediate grids and steps
-            st.session_state.steps = steps
-            st.session_state.ship_grids = ship_grids  
-            st.session_state.ship_grid = ship_grids[-1]
+            if not ship_grids:
+                # Neither a balance nor a SIFT plan came back, so there is no final grid to show
+                st.error("No balancing or SIFT plan could be found for this ship. The ship grid is unchanged.")
+                log_action(username=username, action="BALANCE_FAILED",
+                        notes=f"{username} could not balance or SIFT the ship.")
+            else:
+                # Store intermediate grids and steps
+                st.session_state.steps = steps
+                st.session_state.ship_grids = ship_grids  
+                st.session_state.ship_grid = ship_grids[-1]
+                # Containers have moved, so reindex their names for unloading
+                st.session_state.name_index = NameIndex.from_grid(st.session_state.ship_grid)
             
-            # Visualize final grid
-            st.session_state.final_plot = plotly_visualize_grid(
-                st.session_state.ship_grid, title="Final Ship Grid After Balancing"
-            )
+                # Visualize final grid
+                st.session_state.final_plot = plotly_visualize_grid(
+                    st.session_state.ship_grid, title="Final Ship Grid After Balancing"
+                )
 
-            # Log each substep
-            for step_number, step_list in enumerate(steps):
-                for sub_step_number, sub_step in enumerate(step_list):
-                    log_action(
-                        username=username,
-                        action="BALANCE_STEP",
-                        notes=f"{username} performed Step {step_number + 1}, Sub-Step {sub_step_number + 1}: {sub_step}"
-                    )
+                # Log each substep
+                for step_number, step_list in enumerate(steps):
+                    for sub_step_number, sub_step in enumerate(step_list):
+                        log_action(
+                            username=username,
+                            action="BALANCE_STEP",
+                            notes=f"{username} performed Step {step_number + 1}, Sub-Step {sub_step_number + 1}: {sub_step.describe()}"
+                        )
 
-            # Display success or warning message
-            if status:
-                st.success("Ship balanced successfully!")
-                log_action(username=username, action="BALANCE_COMPLETE", 
-                        notes=f"{username} successfully balanced the ship.")
-            else:
-                st.warning("Ship could not be perfectly balanced. Using SIFT.")
-                log_action(username=username, action="BALANCE_PARTIAL", 
-                        notes=f"{username} could not perfectly balance the ship.")
+                # Display success or warning message
+                if status:
+                    st.success("Ship balanced successfully!")
+                    log_action(username=username, action="BALANCE_COMPLETE", 
+                            notes=f"{username} successfully balanced the ship.")
+                else:
+                    st.warning("Ship could not be perfectly balanced. Using SIFT.")
+                    log_action(username=username, action="BALANCE_PARTIAL", 
+                            notes=f"{username} could not perfectly balance the ship.")
 
 
     # Tabs for navigation
@@ -246,19 +280,8 @@ def balancing_page():
                 with st.expander(f"Step {step_number + 1}"):
                     st.markdown(f"### Step {step_number + 1}:")
                     for sub_step_number, sub_step in enumerate(step_list):
-                        # Parse and increment the coordinates
-                        original_step = sub_step.replace("[", "").replace("]", "")  # Remove brackets for processing
-                        from_coords, to_coords = original_step.split(" to ")  # Split into 'from' and 'to' parts
-                        from_x, from_y = map(int, from_coords.split(","))
-                        to_x, to_y = map(int, to_coords.split(","))
-                        # Increment the coordinates
-                        from_x += 1
-                        from_y += 1
-                        to_x += 1
-                        to_y += 1
-                        # Format back into the desired string
-                        incremented_step = f"[{from_x},{from_y}] to [{to_x},{to_y}]"
-                        st.write(f"{sub_step_number + 1}. {incremented_step}")
+                        # Display the move in 1-based manifest coordinates
+                        st.write(f"{sub_step_number + 1}. {sub_step.describe()}")
 
     elif selected_tab == "Steps with Grids":
         # visualize_steps_with_grids()
@@ -272,38 +295,16 @@ def balancing_page():
         if "steps" in st.session_state and "ship_grids" in st.session_state:
             st.subheader("Summarized Steps with Plots")
 
-            def summarize_steps(steps):
-                summarized_steps = []
-                for step_number, step_list in enumerate(steps):
-                    if not step_list:
-                        continue
-                    start_coords = None
-                    end_coords = None
-                    for sub_step in step_list:
-                        # Parse the coordinates
-                        from_coords, to_coords = sub_step.replace("[", "").replace("]", "").split(" to ")
-                        from_x, from_y = map(int, from_coords.split(","))
-                        to_x, to_y = map(int, to_coords.split(","))
-                        if start_coords is None:
-                            # Convert to 1-based index
-                            start_coords = (from_x + 1, from_y + 1)
-                        # Update the latest destination
-                        end_coords = (to_x + 1, to_y + 1)
-                    summarized_steps.append(
-                        f"[{start_coords[0]},{start_coords[1]}] to [{end_coords[0]},{end_coords[1]}]")
-                return summarized_steps
-            # Summarize the steps
-            summarized_steps = summarize_steps(st.session_state.steps)
+            # Summarize the steps, one start-to-end move per container
+            summarized_steps = [summarize_moves(step_list)
+                                for step_list in st.session_state.steps if step_list]
 
             for step_number, summary in enumerate(summarized_steps):
                 # Use an expander for each step
-                with st.expander(f"Step {step_number + 1}: {summary}"):
-                    # Extract start and end coordinates
-                    start_coords, end_coords = summary.split(" to ")
-                    start_x, start_y = map(int, start_coords.replace(
-                        "[", "").replace("]", "").split(","))
-                    end_x, end_y = map(int, end_coords.replace(
-                        "[", "").replace("]", "").split(","))
+                with st.expander(f"Step {step_number + 1}: {summary.describe()}"):
+                    # Extract start and end coordinates (1-based)
+                    start_x, start_y = summary.from_row + 1, summary.from_col + 1
+                    end_x, end_y = summary.to_row + 1, summary.to_col + 1
                     # Get the base grid for this step
                     base_grid = (
                         st.session_state.ship_grids[step_number - 1]
@@ -453,7 +454,7 @@ def balancing_page():
     with col1:
         if st.button("Update Manifest"):
             updated_manifest = convert_grid_to_manifest(
-                st.session_state.ship_grid)
+                st.session_state.ship_grid, st.session_state.manifest_writer)
             outbound_filename = append_outbound_to_filename(
                 st.session_state.get("file_name", "manifest.txt")
             )
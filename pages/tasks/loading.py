@@ -3,6 +3,8 @@
 import streamlit as st  # Streamlit for building the frontend
 # Functions for loading and unloading containers
 from tasks.ship_loader import load_containers, unload_containers
+from tasks.ship_geometry import DEFAULT_GEOMETRY  # Default bay dimensions
+from tasks.name_index import NameIndex  # Container name lookups for unloading
 # Functions to manage and visualize the ship grid
 from utils.grid_utils import create_ship_grid, plotly_visualize_grid
 from utils.components.buttons import (
@@ -11,7 +13,9 @@ from utils.components.buttons import (
 )
 # Manifest-related utilities
 from tasks.balancing_utils import convert_grid_to_manifest, append_outbound_to_filename
+from tasks.manifest_writer import ManifestWriter  # Incremental manifest export
 from utils.logging import log_action  # Function to log user actions
+from utils.plan_cache import PLAN_CACHE, grid_digest  # Reusing plans made for the same ship
 import os  # Standard library for interacting with the operating system
 
 
@@ -43,6 +47,9 @@ def initialize_session_state(rows, cols):
     if "outbound_filename" not in st.session_state:
         # Filename for the updated manifest
         st.session_state.outbound_filename = "manifest.txt"
+    if "manifest_writer" not in st.session_state:
+        # Writer that reformats only the slots changed since the last export
+        st.session_state.manifest_writer = ManifestWriter()
     if "load_steps" not in st.session_state:
         st.session_state.load_steps = []  # Steps involved in loading containers
     if "unload_steps" not in st.session_state:
@@ -75,8 +82,8 @@ def loading_task():
     username = st.session_state.get("username", "User")
 
     # Initialize session state variables
-    rows, cols = 8, 12  # Default dimensions of the ship grid
-    initialize_session_state(rows, cols)
+    geometry = st.session_state.get("geometry", DEFAULT_GEOMETRY)  # Dimensions of the ship grid
+    initialize_session_state(geometry.rows, geometry.cols)
 
     # Action selection for loading or unloading
     tab = st.radio(
@@ -85,25 +92,27 @@ def loading_task():
 
     # Visualize grid based on selected action and steps
     if tab == "Load Containers" and st.session_state.load_steps:
-        step = st.selectbox(
+        history = st.session_state.load_steps
+        index = st.selectbox(
             "View loading steps:",
-            options=[step['name'] for step in st.session_state.load_steps]
+            options=range(len(history)),
+            format_func=lambda i: history.info(i)['name']
         )
-        step_data = next(
-            s for s in st.session_state.load_steps if s['name'] == step)
-        plotly_visualize_grid(step_data['grid'], title=f"Ship Grid - {step}")
+        step_data = history.info(index)
+        plotly_visualize_grid(history[index], title=f"Ship Grid - {step_data['name']}")
         st.info(f"Step Cost: {step_data['cost']} seconds")
         for msg in step_data['messages']:
             st.write(msg)
 
     elif tab == "Unload Containers" and st.session_state.unload_steps:
-        step = st.selectbox(
+        history = st.session_state.unload_steps
+        index = st.selectbox(
             "View unloading steps:",
-            options=[step['name'] for step in st.session_state.unload_steps]
+            options=range(len(history)),
+            format_func=lambda i: history.info(i)['name']
         )
-        step_data = next(
-            s for s in st.session_state.unload_steps if s['name'] == step)
-        plotly_visualize_grid(step_data['grid'], title=f"Ship Grid - {step}")
+        step_data = history.info(index)
+        plotly_visualize_grid(history[index], title=f"Ship Grid - {step_data['name']}")
         st.info(f"Step Cost: {step_data['cost']} seconds")
         for msg in step_data['messages']:
             st.write(msg)
@@ -150,11 +159,20 @@ def loading_task():
                 )
 
             if st.button("Confirm Load"):
-                updated_grid, messages, cost, steps = load_containers(
-                    st.session_state.ship_grid,
-                    st.session_state.container_names_to_load,
-                    st.session_state.container_weights
+                load_names = st.session_state.container_names_to_load
+                weights = st.session_state.container_weights
+                (updated_grid, messages, cost, steps), cached = PLAN_CACHE.plan(
+                    grid_digest(st.session_state.ship_grid), "load",
+                    (tuple(load_names), tuple(weights.get(name) for name in load_names)),
+                    lambda: load_containers(
+                        st.session_state.ship_grid, load_names, weights,
+                        geometry=geometry,
+                        names=st.session_state.get("name_index")
+                    )
                 )
+                if cached:
+                    # A reused plan leaves the session's name index behind, so rebuild it
+                    st.session_state.name_index = NameIndex.from_grid(updated_grid)
                 st.session_state.ship_grid = updated_grid
                 st.session_state.messages.extend(messages)
                 st.session_state.total_cost += cost
@@ -179,9 +197,16 @@ def loading_task():
             if container_names_input:
                 container_names = [name.strip()
                                    for name in container_names_input.split(",")]
-                updated_grid, messages, cost, steps = unload_containers(
-                    st.session_state.ship_grid, container_names
+                (updated_grid, messages, cost, steps), cached = PLAN_CACHE.plan(
+                    grid_digest(st.session_state.ship_grid), "unload", tuple(container_names),
+                    lambda: unload_containers(
+                        st.session_state.ship_grid, container_names, geometry=geometry,
+                        names=st.session_state.get("name_index")
+                    )
                 )
+                if cached:
+                    # A reused plan leaves the session's name index behind, so rebuild it
+                    st.session_state.name_index = NameIndex.from_grid(updated_grid)
                 st.session_state.ship_grid = updated_grid
                 st.session_state.messages.extend(messages)
                 st.session_state.total_cost += cost
@@ -206,7 +231,7 @@ def loading_task():
     with col1:
         if st.button("Update Manifest"):
             updated_manifest = convert_grid_to_manifest(
-                st.session_state.ship_grid)
+                st.session_state.ship_grid, st.session_state.manifest_writer)
             outbound_filename = append_outbound_to_filename(
                 st.session_state.get("file_name", "manifest.txt")
             )
@@ -0,0 +1,84 @@
+# Dockership/tasks/balance_feasibility.py
+
+"""
+Exact balance feasibility from container weights alone.
+
+Whether any split of the containers satisfies 0.9 < left / right < 1.1 is a
+subset-sum question. Reachable left-side totals are kept as the set bits of one
+Python integer (bit s is set when some subset of containers weighs s), so adding
+a container is a single shift-and-or over the whole bitset.
+
+The check ignores slot capacity: an infeasible answer is final, while a feasible
+one still leaves the search to find a physical arrangement.
+"""
+
+from collections import namedtuple  # Compact, immutable result record
+
+
+BalanceFeasibility = namedtuple(
+    "BalanceFeasibility", "feasible best_ratio best_left lowest_left highest_left"
+)
+BalanceFeasibility.__doc__ = """
+Outcome of a balance feasibility check.
+
+Attributes:
+    feasible (bool): True if some split of the weights is balanced.
+    best_ratio (float): left / right ratio of the most even split (at most 1.0).
+    best_left (int): Left-side total of the most even split.
+    lowest_left (int or None): Smallest balanced left-side total, None if infeasible.
+    highest_left (int or None): Largest balanced left-side total, None if infeasible.
+"""
+
+
+def reachable_sums(weights):
+    """
+    Returns the subset sums of the weights as a bitset.
+
+    Args:
+        weights (iterable[int]): Container weights.
+
+    Returns:
+        int: Bitset whose bit s is set when some subset of the weights sums to s.
+    """
+    bits = 1
+    for weight in weights:
+        bits |= bits << weight
+    return bits
+
+
+def _lowest_bit(bits):
+    return (bits & -bits).bit_length() - 1
+
+
+def check_balance_feasibility(weights):
+    """
+    Decides whether any split of the weights satisfies the balance rule.
+
+    Args:
+        weights (list[int]): Weights of every container on the ship.
+
+    Returns:
+        BalanceFeasibility: Feasibility, the most even split, and the range of
+            balanced left-side totals.
+    """
+    total = sum(weights)
+    if total == 0:
+        return BalanceFeasibility(True, 1.0, 0, 0, 0)
+
+    bits = reachable_sums(weights)
+
+    # Splits are symmetric, so the most even one is the largest sum up to half
+    best_left = (bits & ((1 << (total // 2 + 1)) - 1)).bit_length() - 1
+    best_ratio = best_left / (total - best_left)
+
+    # 0.9 < left / right < 1.1 with right = total - left, in integers:
+    # 19 * left > 9 * total and 21 * left < 11 * total
+    low = 9 * total // 19 + 1
+    high = (11 * total - 1) // 21
+    in_band = (bits >> low) & ((1 << max(high - low + 1, 0)) - 1)
+
+    if not in_band:
+        return BalanceFeasibility(False, best_ratio, best_left, None, None)
+
+    return BalanceFeasibility(True, best_ratio, best_left,
+                              low + _lowest_bit(in_band), low + in_band.bit_length() - 1)
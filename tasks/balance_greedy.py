@@ -0,0 +1,175 @@
+# Dockership/tasks/balance_greedy.py
+
+"""
+Greedy balancing over a NumPy copy of the container weights.
+
+A WeightGrid holds the weights in an array with the running left and right
+totals, and updates both in O(1) per move instead of rescanning the grid. Each
+greedy step scores every movable container (the top of each column on the
+heavier side) in one vectorised expression: the side totals after moving it,
+whether that balances the ship, and the crane minutes to the cheapest column on
+the lighter side. A drop that would fill the top row of a column is kept for
+the move that balances the ship: a full column is a wall the crane cannot cross,
+and stacking one would cut the heavier side off from the columns beyond it. The
+plan is not optimal, but it is found in microseconds per move, so it serves when
+the A* search runs out of budget.
+"""
+
+import numpy as np  # Weight arrays and vectorised candidate scoring
+
+from tasks.balance_search import BALANCE_LOWER, BALANCE_UPPER, is_balanced  # Balance rule
+from tasks.ship_state import ShipState  # One-pass packing of the grid
+
+
+class WeightGrid:
+    """
+    Container weights of a ship as a NumPy array, with running side totals.
+
+    Attributes:
+        weights (np.ndarray): rows x cols weights, or EMPTY / NAN as in ShipState.
+        heights (np.ndarray): Occupied height of each column, NAN slots included.
+        left (int): Total weight on the left half.
+        right (int): Total weight on the right half.
+    """
+
+    def __init__(self, weights, heights, left, right):
+        self.weights = weights
+        self.heights = heights
+        self.left = left
+        self.right = right
+        self.rows, self.cols = weights.shape
+        self.mid = self.cols // 2
+        self.is_left = np.arange(self.cols) < self.mid
+
+    @classmethod
+    def from_grid(cls, ship_grid):
+        """
+        Builds the weight arrays of a grid of Slot objects, or of a ShipState.
+        """
+        state = ShipState.of(ship_grid)
+        weights = np.array(state.cells, dtype=np.int64).reshape(state.rows, state.cols)
+        return cls(weights, np.array(state.heights, dtype=np.int64), state.left, state.right)
+
+    def top_weights(self):
+        """
+        Returns the weight of the top container of every column, negative where a column has none.
+        """
+        tops = self.weights[np.maximum(self.heights - 1, 0), np.arange(self.cols)]
+        return np.where(self.heights > 0, tops, -1)
+
+    def travel_costs(self, from_col):
+        """
+        Crane minutes from the top of from_col onto every column, as crane_travel computes them.
+
+        Returns:
+            np.ndarray: Cost per destination column, infinity where the path leaves
+                the grid and for from_col itself.
+        """
+        heights = self.heights
+        from_row = heights[from_col] - 1
+
+        # Tallest column strictly between from_col and each destination
+        between = np.zeros(self.cols, dtype=np.int64)
+        if from_col > 1:
+            between[:from_col - 1] = np.maximum.accumulate(heights[from_col - 1::-1])[:from_col - 1][::-1]
+        if from_col < self.cols - 2:
+            between[from_col + 2:] = np.maximum.accumulate(heights[from_col + 1:])[:-1]
+
+        clear_row = np.maximum(np.maximum(heights, from_row), between)
+        costs = ((clear_row - from_row) + np.abs(np.arange(self.cols) - from_col)
+                 + (clear_row - heights)).astype(float)
+        costs[(heights >= self.rows) | (clear_row >= self.rows)] = np.inf
+        costs[from_col] = np.inf
+        return costs
+
+    def move(self, from_col, to_col):
+        """
+        Carries the top container of from_col onto to_col, updating the side totals.
+        """
+        from_row, to_row = self.heights[from_col] - 1, self.heights[to_col]
+        weight = int(self.weights[from_row, from_col])
+        self.weights[from_row, from_col] = -1
+        self.weights[to_row, to_col] = weight
+        self.heights[from_col] -= 1
+        self.heights[to_col] += 1
+        if self.is_left[from_col] and not self.is_left[to_col]:
+            self.left, self.right = self.left - weight, self.right + weight
+        elif self.is_left[to_col] and not self.is_left[from_col]:
+            self.left, self.right = self.left + weight, self.right - weight
+
+    @property
+    def balanced(self):
+        return is_balanced(self.left, self.right)
+
+
+def greedy_balance(ship_grid, max_moves=None):
+    """
+    Balances the ship by repeatedly moving a container from the heavier side to the lighter one.
+
+    If some top container balances the ship on its own, the cheapest such move
+    is made. Otherwise the move that brings the sides closest to even is made,
+    as long as it improves on the current split; such moves never fill the top
+    row of a column, so the crane can still reach the rest of the lighter side.
+
+    Args:
+        ship_grid (list[list[Slot]] or ShipState): The ship (not modified).
+        max_moves (int, optional): Move limit; defaults to one per slot.
+
+    Returns:
+        tuple: (column_moves, cost) like astar_balance, or None if the greedy
+            moves stop improving before the ship is balanced.
+    """
+    grid = WeightGrid.from_grid(ship_grid)
+    if max_moves is None:
+        max_moves = grid.rows * grid.cols
+
+    column_moves, total = [], 0
+    while not grid.balanced:
+        if len(column_moves) >= max_moves:
+            return None
+
+        heavy_left = grid.left > grid.right
+        tops = grid.top_weights()
+        movable = (tops >= 0) & (grid.is_left == heavy_left)
+
+        # Cheapest drop on the lighter side for each movable container, and the
+        # cheapest one that leaves a free top row in its column
+        walls = grid.heights >= grid.rows - 1
+        targets, open_targets = np.full(grid.cols, -1), np.full(grid.cols, -1)
+        travel, open_travel = np.full(grid.cols, np.inf), np.full(grid.cols, np.inf)
+        for col in np.flatnonzero(movable):
+            costs = grid.travel_costs(col)
+            costs[grid.is_left == heavy_left] = np.inf
+            targets[col] = np.argmin(costs)
+            travel[col] = costs[targets[col]]
+            costs[walls] = np.inf
+            open_targets[col] = np.argmin(costs)
+            open_travel[col] = costs[open_targets[col]]
+        movable &= np.isfinite(travel)
+        if not movable.any():
+            return None
+
+        # Side totals after each candidate move, all at once
+        shift = np.where(movable, tops, 0) * (1 if heavy_left else -1)
+        left, right = grid.left - shift, grid.right + shift
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.minimum(left, right) / np.maximum(left, right)
+            balances = movable & (left / right > BALANCE_LOWER) & (left / right < BALANCE_UPPER)
+
+        if balances.any():
+            col = int(np.argmin(np.where(balances, travel, np.inf)))
+        else:
+            targets, travel = open_targets, open_travel
+            current = min(grid.left, grid.right) / max(grid.left, grid.right)
+            ratio = np.where(movable & np.isfinite(travel), np.nan_to_num(ratio), -1.0)
+            best = ratio.max()
+            if best <= current:
+                return None
+            col = int(np.argmin(np.where(ratio == best, travel, np.inf)))
+
+        to_col = int(targets[col])
+        total += int(travel[col])
+        column_moves.append((col, to_col))
+        grid.move(col, to_col)
+
+    return column_moves, total
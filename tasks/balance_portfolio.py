@@ -0,0 +1,213 @@
+# Dockership/tasks/balance_portfolio.py
+
+"""
+Runs several balance planners on the same ship in parallel.
+
+Different manifests favour different strategies: the greedy balancer answers at
+once, A* finds the cheapest plan when the ship is small enough, weighted A*
+trades optimality for speed, beam search keeps large bays within a bounded
+memory, and SIFT always produces a legal layout. A portfolio starts each
+configuration in its own process with the compact ShipState, keeps the first
+legal plan that arrives and then the cheapest one that finishes before the
+deadline. Multi-core hosts cut the wait on hard manifests to that of the fastest
+planner that succeeds.
+"""
+
+import os  # CPU count
+import time  # Wall-clock deadline
+from collections import namedtuple  # Compact, immutable result records
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait  # Planner processes
+
+from tasks.balance_beam import beam_balance
+from tasks.balance_feasibility import check_balance_feasibility  # Reachable balanced left totals
+from tasks.balance_greedy import greedy_balance
+from tasks.balance_search import DEFAULT_MAX_NODES, DEFAULT_TIME_LIMIT, astar_balance, is_balanced
+from tasks.crane import TRAVEL_COSTS  # Checking plans before they are accepted
+from tasks.ship_state import ShipState  # Compact, picklable ship state
+from tasks.sift_planner import DEFAULT_PLACE_TIME_LIMIT, DEFAULT_SIFT_TIME_LIMIT, plan_sift
+
+# (planner, options) pairs run by default; options are passed to the planner as keywords.
+# Quick planners come first so that hosts with fewer cores than configurations still get a plan.
+DEFAULT_CONFIGS = (
+    ("greedy", {}),
+    ("sift", {}),
+    ("beam", {}),
+    ("astar", {"weight": 2.0}),
+    ("astar", {}),
+)
+
+# Time kept back from each planner's own limit for starting its process and returning the plan
+RESULT_MARGIN = 0.1
+
+
+PortfolioRun = namedtuple("PortfolioRun", "planner options cost balanced seconds")
+PortfolioRun.__doc__ = """
+Outcome of one planner configuration.
+
+Attributes:
+    planner (str): Key of PLANNERS.
+    options (dict): Keyword options the planner ran with.
+    cost (int or None): Crane minutes of its plan, None if it found none or
+        did not finish before the deadline.
+    balanced (bool): True if the plan balances the ship (SIFT plans may not).
+    seconds (float or None): Time from the start of the portfolio to the plan.
+"""
+
+PortfolioResult = namedtuple("PortfolioResult", "column_moves cost planner balanced first runs")
+PortfolioResult.__doc__ = """
+Outcome of a portfolio.
+
+Attributes:
+    column_moves (list or None): (from_col, to_col) pairs of the chosen plan,
+        None if no planner produced a legal plan.
+    cost (int or None): Crane minutes of the chosen plan.
+    planner (str or None): Planner that produced it.
+    balanced (bool): True if the chosen plan balances the ship.
+    first (PortfolioRun or None): The first legal plan to arrive.
+    runs (list[PortfolioRun]): Every configuration that was run, in the order given.
+"""
+
+
+def _run_greedy(state, time_limit, left_range, **options):
+    return greedy_balance(state, **options)
+
+
+def _run_astar(state, time_limit, left_range, **options):
+    options.setdefault("max_nodes", DEFAULT_MAX_NODES)
+    return astar_balance(state, time_limit=time_limit, left_range=left_range, **options)
+
+
+def _run_beam(state, time_limit, left_range, **options):
+    return beam_balance(state, time_limit=time_limit, left_range=left_range, **options)
+
+
+def _run_sift(state, time_limit, left_range, **options):
+    options.setdefault("time_limit", min(time_limit, DEFAULT_SIFT_TIME_LIMIT))
+    options.setdefault("place_time_limit", min(time_limit, DEFAULT_PLACE_TIME_LIMIT))
+    return plan_sift(state, **options)
+
+
+PLANNERS = {
+    "greedy": _run_greedy,
+    "astar": _run_astar,
+    "beam": _run_beam,
+    "sift": _run_sift,
+}
+
+
+def run_planner(planner, options, state, time_limit, left_range):
+    """
+    Runs one configuration; this is what each worker process executes.
+
+    Returns:
+        tuple: (column_moves, cost) or None, as the planner returns it.
+    """
+    return PLANNERS[planner](state, time_limit, left_range, **options)
+
+
+def replay(state, column_moves):
+    """
+    Applies a plan to a state, checking every move against the crane.
+
+    Returns:
+        tuple: (final state, cost), or None if a move is illegal.
+    """
+    cost = 0
+    for from_col, to_col in column_moves:
+        if from_col == to_col or state.top(from_col) is None:
+            return None
+        travel = TRAVEL_COSTS.table(state.heights, state.rows)[from_col][to_col]
+        if travel is None:
+            return None
+        cost += travel
+        state = state.move(from_col, to_col)
+    return state, cost
+
+
+def balance_portfolio(ship_grid, configs=DEFAULT_CONFIGS, deadline=DEFAULT_TIME_LIMIT, max_workers=None,
+                      callback=None):
+    """
+    Plans a balance with several planner configurations at once.
+
+    Every returned plan is replayed on the starting state before it is accepted.
+    Balanced plans beat unbalanced (SIFT) ones, and cheaper plans beat dearer
+    ones. When the weights cannot be balanced at all, only the SIFT
+    configurations are run. Configurations still running at the deadline are
+    abandoned; each one is also given the deadline as its own time limit, so
+    its process stops soon after.
+
+    Args:
+        ship_grid (list[list[Slot]] or ShipState): The ship (not modified).
+        configs (iterable[tuple]): (planner, options) pairs; planner is a key of PLANNERS.
+        deadline (float): Wall-clock budget in seconds.
+        max_workers (int, optional): Number of processes; defaults to one per configuration,
+            up to the number of CPUs.
+        callback (callable, optional): Called as callback(column_moves, cost) with
+            the first legal plan and with every better one, as plan_balance does.
+
+    Returns:
+        PortfolioResult: The best plan and the outcome of every configuration.
+    """
+    start = time.perf_counter()
+    state = ShipState.of(ship_grid)
+    configs = [(planner, dict(options)) for planner, options in configs]
+
+    feasibility = check_balance_feasibility([weight for weight in state.cells if weight >= 0])
+    if feasibility.feasible:
+        left_range = (feasibility.lowest_left, feasibility.highest_left)
+    else:
+        left_range = None
+        configs = [(planner, options) for planner, options in configs if planner == "sift"]
+
+    runs = [PortfolioRun(planner, options, None, False, None) for planner, options in configs]
+    best, first = None, None
+
+    if not configs:
+        return PortfolioResult(None, None, None, False, None, runs)
+
+    pool = ProcessPoolExecutor(max_workers=max_workers or min(len(configs), os.cpu_count() or 1))
+    try:
+        # The feasibility check has already used part of the deadline
+        time_limit = max(deadline - (time.perf_counter() - start) - RESULT_MARGIN, 0)
+        pending = {
+            pool.submit(run_planner, planner, options, state, time_limit, left_range): i
+            for i, (planner, options) in enumerate(configs)
+        }
+        while pending:
+            remaining = deadline - (time.perf_counter() - start)
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    plan = future.result()
+                except Exception as e:  # One broken planner must not sink the others
+                    print(f"Planner {configs[i][0]} failed: {type(e).__name__}: {e}")
+                    continue
+                if plan is None:
+                    continue
+
+                checked = replay(state, plan[0])
+                if checked is None:
+                    print(f"Planner {configs[i][0]} returned an illegal plan.")
+                    continue
+                final, cost = checked
+
+                run = runs[i]._replace(cost=cost, balanced=is_balanced(final.left, final.right),
+                                       seconds=time.perf_counter() - start)
+                runs[i] = run
+                if first is None:
+                    first = run
+                if best is None or (run.balanced, -cost) > (best[1].balanced, -best[1].cost):
+                    best = (plan[0], run)
+                    if callback is not None:
+                        callback(plan[0], cost)
+    finally:
+        # Do not wait for configurations still running past the deadline
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if best is None:
+        return PortfolioResult(None, None, None, False, None, runs)
+    column_moves, run = best
+    return PortfolioResult(column_moves, run.cost, run.planner, run.balanced, first, runs)
@@ -0,0 +1,203 @@
+# Dockership/tasks/balance_search.py
+
+"""
+A* search over whole ship states for the balancing operation.
+
+States are ShipState snapshots of container weights. Containers of equal weight
+are interchangeable for balancing purposes, so states that only differ by which
+same-weight container sits where are merged. An action carries the top container
+of one column onto the top of another column, and its cost is the number of grid
+cells the crane travels (one minute per cell).
+"""
+
+import heapq  # Priority queue for the open list
+import itertools  # Tie-breaking counter for heap entries
+import time  # Wall-clock budget
+
+from tasks.crane import TRAVEL_COSTS  # Memoised crane travel costs
+from tasks.ship_state import ShipState  # Compact hashable search state
+
+# Bounds used by calculate_balance: the ship is balanced when 0.9 < left / right < 1.1
+BALANCE_LOWER = 0.9
+BALANCE_UPPER = 1.1
+
+# Search budget, sized to keep the 8x12 manifests within a few seconds
+DEFAULT_MAX_NODES = 200000
+DEFAULT_TIME_LIMIT = 3.0
+
+# Heuristic weights of the successive passes of plan_balance, greediest first
+ANYTIME_WEIGHTS = (3.0, 2.0, 1.5, 1.0)
+
+
+def is_balanced(left_balance, right_balance):
+    """
+    Applies the balance rule used by calculate_balance to a pair of side weights.
+
+    Args:
+        left_balance (int): Total weight on the left half of the ship.
+        right_balance (int): Total weight on the right half of the ship.
+
+    Returns:
+        bool: True if the ship counts as balanced.
+    """
+    if left_balance == 0 and right_balance == 0:
+        return True
+    if right_balance == 0:
+        return False
+    return BALANCE_LOWER < left_balance / right_balance < BALANCE_UPPER
+
+
+def _transfer_need(state, left_range=None):
+    """
+    Weight the heavier side must still hand over to the other side to balance.
+
+    When the balanced left-side totals that are actually reachable are known,
+    this is the distance to the nearest of them rather than to the band edge.
+    """
+    left_balance, right_balance = state.left, state.right
+    if left_balance > right_balance:
+        if left_range is not None:
+            return left_balance - left_range[1]
+        return (left_balance - BALANCE_UPPER * right_balance) / (1 + BALANCE_UPPER)
+    if left_range is not None:
+        return left_range[0] - left_balance
+    return (BALANCE_LOWER * right_balance - left_balance) / (1 + BALANCE_LOWER)
+
+
+def _transfer_bound(state, mid, left_range=None):
+    """
+    Admissible lower bound on the crane minutes still needed to balance.
+
+    The heavier side must hand over at least `need` weight to the other side, and
+    each donated container travels at least its column distance to the midline.
+    When the balanced left-side totals that are actually reachable are known,
+    `need` is the distance to the nearest of them rather than to the band edge.
+    The bound is the fractional (LP) cover of `need` by the heavier side's
+    containers, cheapest minutes-per-weight first.
+    """
+    need = _transfer_need(state, left_range)
+    if need <= 0:
+        return 0
+
+    if state.left > state.right:
+        donors = ((mid - col, col) for col in range(mid))
+    else:
+        donors = ((col - mid + 1, col) for col in range(mid, state.cols))
+
+    rates = sorted(
+        (distance / weight, weight)
+        for distance, col in donors
+        for weight in state.column(col)
+        if weight > 0
+    )
+
+    bound = 0.0
+    for rate, weight in rates:
+        take = min(weight, need)
+        bound += take * rate
+        need -= take
+        if need <= 0:
+            break
+
+    return bound
+
+
+def astar_balance(ship_grid, max_nodes=DEFAULT_MAX_NODES, time_limit=DEFAULT_TIME_LIMIT,
+                  left_range=None, weight=1.0, cost_bound=None, stats=None):
+    """
+    Finds the lowest crane-minute sequence of container moves that balances the ship.
+
+    With a weight above 1 the heuristic is inflated (weighted A*): plans come
+    sooner but may cost up to `weight` times the optimum. A cost bound prunes
+    every state that cannot lead to a plan cheaper than it.
+
+    Args:
+        ship_grid (list[list[Slot]] or ShipState): The ship (not modified).
+        max_nodes (int): Maximum number of distinct states kept in memory.
+        time_limit (float): Wall-clock budget in seconds.
+        left_range (tuple, optional): (lowest, highest) balanced left-side totals
+            reachable with these weights, from check_balance_feasibility; tightens
+            the search heuristic.
+        weight (float): Heuristic weight, 1.0 for optimal plans.
+        cost_bound (int, optional): Only plans cheaper than this are searched for.
+        stats (dict, optional): Receives "expanded", the number of states
+            expanded, and "exhausted", True when the search found no plan after
+            trying every state within the bound (so none cheaper exists).
+
+    Returns:
+        tuple: (column_moves, cost) where column_moves is a list of
+            (from_col, to_col) pairs, or None if no balanced state (cheaper
+            than cost_bound) was found within the budget.
+    """
+    start = ShipState.of(ship_grid)
+    rows, cols = start.rows, start.cols
+    mid = cols // 2
+
+    if stats is None:
+        stats = {}
+    stats.update(expanded=0, exhausted=False)
+
+    if is_balanced(start.left, start.right):
+        return ([], 0) if cost_bound is None or cost_bound > 0 else None
+
+    deadline = time.perf_counter() + time_limit
+    counter = itertools.count()
+    if cost_bound is None:
+        cost_bound = float("inf")
+
+    # Transposition table: best known cost and parent link for every state seen
+    best_g = {start: 0}
+    parents = {start: None}
+    open_list = [(_transfer_bound(start, mid, left_range), 0, next(counter), start)]
+    expanded = 0
+    pruned = False  # A state was dropped for the memory budget, so an empty open list proves nothing
+
+    while open_list:
+        _, g, _, state = heapq.heappop(open_list)
+        if g > best_g[state]:
+            continue  # Stale entry superseded by a cheaper path
+
+        if is_balanced(state.left, state.right):
+            column_moves = []
+            while parents[state] is not None:
+                state, move = parents[state]
+                column_moves.append(move)
+            column_moves.reverse()
+            stats["expanded"] = expanded
+            return column_moves, g
+
+        expanded += 1
+        stats["expanded"] = expanded
+        if time.perf_counter() > deadline:
+            print("Balance search ran out of time.")
+            return None
+
+        travel_costs = TRAVEL_COSTS.table(state.heights, rows)
+
+        for from_col in range(cols):
+            if state.top(from_col) is None:
+                continue
+
+            for to_col, travel in enumerate(travel_costs[from_col]):
+                if travel is None:
+                    continue
+
+                child = state.move(from_col, to_col)
+                child_g = g + travel
+                if child_g >= best_g.get(child, float("inf")):
+                    continue
+                if child not in best_g and len(best_g) >= max_nodes:
+                    pruned = True
+                    continue
+                bound = _transfer_bound(child, mid, left_range)
+                if child_g + bound >= cost_bound:
+                    continue
+
+                best_g[child] = child_g
+                parents[child] = (state, (from_col, to_col))
+                heapq.heappush(open_list, (child_g + weight * bound, child_g, next(counter), child))
+
+    if pruned:
+        print("Balance search ran out of memory budget.")
+    stats["exhausted"] = not pruned
+    return None
@@ -1,10 +1,12 @@
 # Dockership/tasks/balancing.py
 
 import copy  # For deep copying ship grids
-import re  # For parsing and handling manifest file strings
 import numpy as np  # For numerical operations (not used directly here)
 from collections.abc import Iterable  # For type checking iterables
 
+from tasks.manifest_parser import SLOT_CONTAINER, SLOT_UNUSED, parse_manifest_text  # Shared manifest parser
+from tasks.ship_balancer import calculate_balance  # Shared left/right weight and balance rule
+
 # Class to represent a container
 
 
@@ -61,54 +63,19 @@ def update_ship_grid(file_content, ship_grid, containers):
         file_content (str): Manifest file content.
         ship_grid (list[list[Slot]]): The ship grid to update.
         containers (list): List to store container locations.
+
+    Raises:
+        ManifestError: If a line is malformed.
     """
-    for line in file_content.splitlines():
-        slot_data = line.split()
-        loc = [int(val) - 1 for val in re.sub(r"[\[\]]", '',
-                                              slot_data[0]).split(",")[:2]]  # Extract location
-        weight = int(re.sub(r"[\{\}\,]", '', slot_data[1]))  # Extract weight
-        status = slot_data[2] if len(slot_data) == 3 else " ".join(
-            slot_data[2:])  # Extract status
-        x, y = loc
-
-        if 0 <= x < len(ship_grid) and 0 <= y < len(ship_grid[0]):
-            if status == "NAN":
+    for x, y, weight, kind, status in parse_manifest_text(file_content).records():
+        if x < len(ship_grid) and y < len(ship_grid[0]):
+            if kind == SLOT_CONTAINER:
                 ship_grid[x][y] = Slot(
-                    None, has_container=False, available=False)
-            elif status == "UNUSED":
-                ship_grid[x][y] = Slot(
-                    None, has_container=False, available=True)
+                    Container(status, weight), has_container=True, available=False)
+                containers.append([x, y])
             else:
                 ship_grid[x][y] = Slot(
-                    Container(status, weight), has_container=True, available=False)
-                containers.append(loc)
-
-
-# Function to calculate weight balance between the ship's left and right sides
-def calculate_balance(ship_grid):
-    """
-    Calculates the left and right weight balance of the ship.
-
-    Args:
-        ship_grid (list[list[Slot]]): The ship grid.
-
-    Returns:
-        tuple: Left weight, right weight, and whether the ship is balanced.
-    """
-    left_balance, right_balance = 0, 0
-    halfway = len(ship_grid[0]) // 2
-
-    for row in ship_grid:
-        for idx, slot in enumerate(row):
-            if slot.container:
-                if idx < halfway:
-                    left_balance += slot.container.weight
-                else:
-                    right_balance += slot.container.weight
-
-    balanced = 0.9 <= left_balance / \
-        right_balance <= 1.1 if right_balance > 0 else False
-    return left_balance, right_balance, balanced
+                    None, has_container=False, available=kind == SLOT_UNUSED)
 
 
 # Function to balance the ship by moving containers
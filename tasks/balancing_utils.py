@@ -1,6 +1,5 @@
 import streamlit as st
 import plotly.graph_objects as go
-from copy import deepcopy
 from tasks.ship_balancer import (
     create_ship_grid,
     update_ship_grid,
@@ -9,6 +8,7 @@ from tasks.ship_balancer import (
     calculate_balance,
     balance,
 )
+from tasks.manifest_writer import ManifestWriter
 import os
 
 def plotly_visualize_grid(grid, title="Ship Grid"):
@@ -153,23 +153,17 @@ def plotly_visualize_grid(grid, title="Ship Grid"):
         plot_bgcolor="black",  # Ensure the background is white for contrast
     )
     return fig
-def convert_grid_to_manifest(ship_grid):
+def convert_grid_to_manifest(ship_grid, writer=None):
     """
     Converts the updated grid back to manifest format.
     Args:
         ship_grid (list): The ship grid with Slot objects.
+        writer (ManifestWriter, optional): Writer kept from the last export, so
+            only the slots changed since then are formatted again.
     Returns:
         str: manifest string representing the updated grid.
     """
-    manifest_lines = []
-    for row_idx, row in enumerate(ship_grid):
-        for col_idx, slot in enumerate(row):
-            coordinates = f"[{row_idx + 1:02},{col_idx + 1:02}]"  # Row, Column coordinates
-            weight = f"{{{slot.container.weight:05}}}" if slot.container else "{00000}"  # Weight with 5 digits
-            status_or_name = slot.container.name if slot.container else ("NAN" if not slot.available else "UNUSED")  # Name, NAN, or UNUSED
-            line = f"{coordinates}, {weight}, {status_or_name}"
-            manifest_lines.append(line)
-    return "\n".join(manifest_lines)
+    return (writer or ManifestWriter()).text(ship_grid)
 
 
 def append_outbound_to_filename(filename):
@@ -351,10 +345,9 @@ def generate_animation_with_annotations():
                 else st.session_state.initial_grid
             )
             for sub_step in step:
-                # Parse coordinates
-                from_coords, to_coords = sub_step.replace("[", "").replace("]", "").split(" to ")
-                from_x, from_y = map(int, from_coords.split(","))
-                to_x, to_y = map(int, to_coords.split(","))
+                # Coordinates of this sub-step
+                from_x, from_y = sub_step.from_row, sub_step.from_col
+                to_x, to_y = sub_step.to_row, sub_step.to_col
                 # Prepare z values and annotations for this frame
                 z_frame = []
                 annotations_frame = []
@@ -471,13 +464,12 @@ def generate_animation_with_annotations():
 def generate_stepwise_animation(initial_grid, steps, ship_grids):
     
     frames = []
-    base_grid = deepcopy(initial_grid)
+    base_grid = initial_grid
     # Add a frame for each step and sub-step
     for step_idx, (step, step_grid) in enumerate(zip(steps, ship_grids)):
         for sub_step_idx, sub_step in enumerate(step):
-            from_coords, to_coords = sub_step.replace("[", "").replace("]", "").split(" to ")
-            from_x, from_y = map(int, from_coords.split(","))
-            to_x, to_y = map(int, to_coords.split(","))
+            from_x, from_y = sub_step.from_row, sub_step.from_col
+            to_x, to_y = sub_step.to_row, sub_step.to_col
             # Create the plot for this sub-step
             frame_fig = plotly_visualize_grid_with_overlay(
                 base_grid, (from_x, from_y), (to_x, to_y),
@@ -490,8 +482,8 @@ def generate_stepwise_animation(initial_grid, steps, ship_grids):
                     name=f"step_{step_idx}_substep_{sub_step_idx}",
                 )
             )
-        # Update base grid to the final state of the current step
-        base_grid = deepcopy(step_grid)
+        # Update base grid to the final state of the current step (grids are only read)
+        base_grid = step_grid
     # Create the main figure
     fig = go.Figure(
         data=frames[0].data if frames else [],
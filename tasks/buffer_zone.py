@@ -0,0 +1,137 @@
+# Dockership/tasks/buffer_zone.py
+
+"""
+Buffer area beside the ship.
+
+Containers that only have to leave the ship for a while can be parked in the
+buffer instead of being moved to another column. The buffer is a bay of its
+own: containers stack in its columns, and every trip between the ship and the
+buffer pays a fixed crane transfer time on top of the travel on each side.
+On the ship side the crane lifts over the stacks in between, as it does when
+relocating a container, given the loader's ColumnIndex of the grid. Costs are
+in seconds, like the loader's.
+"""
+
+from tasks.crane import TRAVEL_COSTS  # Travel over the ship's stacks
+from tasks.ship_balancer import manhattan_distance  # Travel within the buffer
+
+DEFAULT_BUFFER_ROWS = 4
+DEFAULT_BUFFER_COLS = 24
+
+# Crane time to carry a container between the ship's crane origin and the buffer's entry slot
+DEFAULT_TRANSFER_COST = 240
+
+# Crane time per slot travelled, as in calculate_move_cost
+SLOT_COST = 60
+
+
+def _ship_travel(from_pos, to_pos, index=None):
+    """
+    Slots the crane travels between two ship slots; with a ColumnIndex it lifts over
+    the stacks in between, as calculate_move_cost does, else the Manhattan distance.
+    """
+    if index is not None:
+        return TRAVEL_COSTS.slot_cost(index.heights, index.rows, from_pos, to_pos)
+    return manhattan_distance(from_pos, to_pos)
+
+
+class BufferZone:
+    """
+    Stacks of containers parked off the ship.
+
+    Attributes:
+        rows (int): Number of rows, row 0 at the bottom.
+        cols (int): Number of columns.
+        transfer_cost (int): Crane time between the ship's crane origin and the
+            buffer's entry slot, the top-right one, nearest the ship.
+        capacity (int): Most containers that may be parked at once.
+    """
+
+    def __init__(self, rows=DEFAULT_BUFFER_ROWS, cols=DEFAULT_BUFFER_COLS, transfer_cost=DEFAULT_TRANSFER_COST,
+                 capacity=None):
+        if rows < 1 or cols < 1:
+            raise ValueError(f"A buffer needs at least 1 row and 1 column, got {rows}x{cols}.")
+
+        self.rows = rows
+        self.cols = cols
+        self.transfer_cost = transfer_cost
+        self.capacity = rows * cols if capacity is None else min(capacity, rows * cols)
+        self.entry = (rows - 1, cols - 1)
+        self.heights = [0] * cols
+        self._parked = []  # (slot, container, home column), in the order they were parked
+
+    def next_slot(self):
+        """
+        Returns the free (row, col) nearest the entry slot, or None if the buffer is full.
+        """
+        if len(self) >= self.capacity:
+            return None
+        slots = [(height, col) for col, height in enumerate(self.heights) if height < self.rows]
+        return min(slots, key=lambda slot: (manhattan_distance(slot, self.entry), -slot[1]), default=None)
+
+    def cost_in(self, ship_pos, origin, slot, is_first_move=False, index=None):
+        """
+        Crane time to carry a container from the ship to a buffer slot; index is the grid's ColumnIndex.
+        """
+        travel = _ship_travel(ship_pos, origin, index) + manhattan_distance(self.entry, slot)
+        return travel * SLOT_COST + self.transfer_cost + (SLOT_COST if is_first_move else 0)
+
+    def cost_out(self, slot, origin, ship_pos, index=None):
+        """
+        Crane time to carry a container from a buffer slot back onto the ship; index is the grid's ColumnIndex.
+        """
+        travel = manhattan_distance(slot, self.entry) + _ship_travel(origin, ship_pos, index)
+        return travel * SLOT_COST + self.transfer_cost
+
+    def round_trip_cost(self, ship_pos, origin, is_first_move=False, index=None):
+        """
+        Crane time to park a container and later put it back where it was.
+
+        Both ship-side trips are priced over the stacks as they are now.
+
+        Returns:
+            float: The cost, or infinity if the buffer is full.
+        """
+        slot = self.next_slot()
+        if slot is None:
+            return float('inf')
+        return (self.cost_in(ship_pos, origin, slot, is_first_move, index)
+                + self.cost_out(slot, origin, ship_pos, index))
+
+    def put(self, container, home_col):
+        """
+        Parks a container in the slot next_slot returns.
+
+        Args:
+            container (Container): The container.
+            home_col (int): Ship column it came from, where it is restored to if there is room.
+
+        Returns:
+            tuple: The (row, col) buffer slot used.
+        """
+        slot = self.next_slot()
+        if slot is None:
+            raise ValueError("The buffer is full.")
+        self.heights[slot[1]] += 1
+        self._parked.append((slot, container, home_col))
+        return slot
+
+    def take(self):
+        """
+        Removes the most recently parked container, which is always on top of its stack.
+
+        Returns:
+            tuple: (slot, container, home column)
+        """
+        slot, container, home_col = self._parked.pop()
+        self.heights[slot[1]] -= 1
+        return slot, container, home_col
+
+    def slot_number(self, slot):
+        """
+        Returns the number Move records use for a buffer slot, counting row by row from the bottom left.
+        """
+        return slot[0] * self.cols + slot[1]
+
+    def __len__(self):
+        return len(self._parked)
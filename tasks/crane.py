@@ -0,0 +1,288 @@
+# Dockership/tasks/crane.py
+
+"""
+Closed-form crane travel costs over per-column stack heights.
+
+A container is lifted in its own column until it clears every column between
+its source and destination, carried across, then lowered onto the destination
+stack. Given the occupied height of each column (containers and NAN slots), the
+cost of that path is a simple formula, so planners never need to simulate a
+cell-by-cell walk on a copy of the grid.
+
+The formula only depends on the tallest column between source and destination,
+so TravelCosts works out all destinations of a source column in one sweep and
+remembers them per height profile. Search planners meet the same profile in
+many states (they differ only in which weights sit where), and the loader asks
+about the same few profiles over and over, so most lookups never sweep the
+columns again.
+"""
+
+from collections import OrderedDict  # Least-recently-used profile tables
+
+# Height profiles whose tables the shared TRAVEL_COSTS keeps
+DEFAULT_PROFILE_CACHE_SIZE = 4096
+
+
+def column_heights(ship_grid):
+    """
+    Returns the occupied height of every column, counting containers and NAN slots.
+
+    Args:
+        ship_grid (list[list[Slot]]): The ship grid.
+
+    Returns:
+        list[int]: Height of each column; the next free slot of column c is row heights[c].
+    """
+    heights = [0] * len(ship_grid[0])
+    for r, row in enumerate(ship_grid):
+        for c, slot in enumerate(row):
+            if slot.hasContainer or not slot.available:
+                heights[c] = r + 1
+    return heights
+
+
+def crane_travel(heights, rows, from_col, to_col, from_row=None):
+    """
+    Computes the crane path for carrying a container from one column onto another.
+
+    Args:
+        heights (list[int]): Occupied height of each column, NAN slots included.
+        rows (int): Number of rows in the grid.
+        from_col (int): Column the container is taken from.
+        to_col (int): Column the container is placed on.
+        from_row (int, optional): Row of the container; defaults to the top of from_col.
+
+    Returns:
+        tuple: (cost, clear_row), or None if the path leaves the grid.
+    """
+    if from_row is None:
+        from_row = heights[from_col] - 1
+    to_row = heights[to_col]
+    if to_row >= rows:
+        return None
+
+    clear_row = max(from_row, to_row)
+    step = 1 if to_col > from_col else -1
+    for col in range(from_col + step, to_col, step):
+        if heights[col] > clear_row:
+            clear_row = heights[col]
+    if clear_row >= rows:
+        return None
+
+    cost = (clear_row - from_row) + abs(to_col - from_col) + (clear_row - to_row)
+    return cost, clear_row
+
+
+def nearest_column(heights, rows, from_row, from_col):
+    """
+    Finds the cheapest column to drop a container on, other than its own.
+
+    Sweeps outwards from the source column in both directions while keeping the
+    tallest column passed so far, so the whole search is O(columns).
+
+    Args:
+        heights (list[int]): Occupied height of each column, NAN slots included.
+        rows (int): Number of rows in the grid.
+        from_row (int): Row of the container.
+        from_col (int): Column of the container.
+
+    Returns:
+        tuple: (cost, to_col) of the cheapest reachable column, or None if there is none.
+    """
+    best = None
+
+    for direction in (-1, 1):
+        tallest_between = 0
+        col = from_col + direction
+        while 0 <= col < len(heights):
+            to_row = heights[col]
+            if to_row < rows:
+                clear_row = max(from_row, to_row, tallest_between)
+                if clear_row < rows:
+                    cost = (clear_row - from_row) + abs(col - from_col) + (clear_row - to_row)
+                    if best is None or (cost, to_row, col) < best:
+                        best = (cost, to_row, col)
+
+            tallest_between = max(tallest_between, heights[col])
+            if tallest_between >= rows:
+                break  # Nothing beyond this column can be reached
+            col += direction
+
+    if best is None:
+        return None
+    return best[0], best[2]
+
+
+def carry_path(from_loc, to_loc, clear_row):
+    """
+    Lists the cells a container passes through on its way from from_loc to to_loc.
+
+    Args:
+        from_loc (list): [row, col] the container starts at.
+        to_loc (list): [row, col] the container ends at.
+        clear_row (int): Row the container is carried across at.
+
+    Returns:
+        list: [row, col] cells from from_loc to to_loc inclusive.
+    """
+    path = [list(from_loc)]
+    r, c = from_loc
+    while r < clear_row:
+        r += 1
+        path.append([r, c])
+    while c != to_loc[1]:
+        c += 1 if to_loc[1] > c else -1
+        path.append([r, c])
+    while r > to_loc[0]:
+        r -= 1
+        path.append([r, c])
+    return path
+
+
+class TravelTable:
+    """
+    Crane travel costs over one column-height profile, worked out per source column on first use.
+
+    table[from_col][to_col] is crane_travel's cost for the top container of
+    from_col, or None where crane_travel returns None (and where from_col is
+    empty or to_col is from_col). Rows are shared, so callers must not change them.
+    """
+
+    __slots__ = ("heights", "rows", "_between", "_costs")
+
+    def __init__(self, heights, rows):
+        self.heights = bytes(heights)
+        self.rows = rows
+        self._between = [None] * len(heights)
+        self._costs = [None] * len(heights)
+
+    def __getitem__(self, from_col):
+        costs = self._costs[from_col]
+        if costs is None:
+            self._sweep(from_col)
+            costs = self._costs[from_col]
+        return costs
+
+    def between(self, from_col):
+        """
+        Returns the height of the tallest column strictly between from_col and every column.
+        """
+        between = self._between[from_col]
+        if between is None:
+            self._sweep(from_col)
+            between = self._between[from_col]
+        return between
+
+    def _sweep(self, from_col):
+        """
+        Fills in the row of from_col, sweeping outwards once in each direction.
+        """
+        heights, rows = self.heights, self.rows
+        cols = len(heights)
+        between = [0] * cols
+        costs = [None] * cols
+        from_row = heights[from_col] - 1
+
+        for direction in (-1, 1):
+            tallest = 0
+            col = from_col + direction
+            while 0 <= col < cols:
+                between[col] = tallest
+                to_row = heights[col]
+                if from_row >= 0 and to_row < rows:
+                    clear_row = max(from_row, to_row, tallest)
+                    if clear_row < rows:
+                        costs[col] = (clear_row - from_row) + abs(col - from_col) + (clear_row - to_row)
+                if to_row > tallest:
+                    tallest = to_row
+                col += direction
+
+        self._between[from_col] = between
+        self._costs[from_col] = costs
+
+
+class TravelCosts:
+    """
+    Memoised crane travel costs for column-height profiles.
+
+    Keeps a TravelTable for each profile seen, keyed by the number of rows and
+    the bytes of the heights, so a cost is looked up by (profile, from column,
+    to column). The least recently used table is dropped once `maxsize` are kept.
+
+    Attributes:
+        maxsize (int): Most profiles kept.
+        hits (int): Lookups answered from a kept table.
+        misses (int): Lookups that had to start a new table.
+    """
+
+    def __init__(self, maxsize=DEFAULT_PROFILE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._tables = OrderedDict()
+
+    def table(self, heights, rows):
+        """
+        Returns the TravelTable of a height profile.
+
+        Args:
+            heights (list[int] or array): Occupied height of each column, NAN slots included.
+            rows (int): Number of rows in the grid.
+
+        Returns:
+            TravelTable: table[from_col][to_col] is the cost of a top-of-column move, or None.
+        """
+        key = (rows, bytes(heights))
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            self.hits += 1
+            return table
+
+        self.misses += 1
+        table = TravelTable(heights, rows)
+        self._tables[key] = table
+        if len(self._tables) > self.maxsize:
+            self._tables.popitem(last=False)
+        return table
+
+    def travel(self, heights, rows, from_col, to_col):
+        """
+        Memoised crane_travel for the top container of from_col.
+
+        Returns:
+            tuple: (cost, clear_row), or None if the path leaves the grid.
+        """
+        table = self.table(heights, rows)
+        cost = table[from_col][to_col]
+        if cost is None:
+            return None
+        return cost, max(heights[from_col] - 1, heights[to_col], table.between(from_col)[to_col])
+
+    def slot_cost(self, heights, rows, from_pos, to_pos):
+        """
+        Crane travel between any two slots, lifting over the columns in between.
+
+        Unlike travel, the slots need not be stack tops, and the path may pass
+        above the top row of the grid (as when the loader's crane carries a
+        container over a full column).
+
+        Args:
+            heights (list[int] or array): Occupied height of each column, NAN slots included.
+            rows (int): Number of rows in the grid.
+            from_pos (tuple): (row, col) the container starts at.
+            to_pos (tuple): (row, col) the container ends at.
+
+        Returns:
+            int: The number of cells travelled.
+        """
+        (from_row, from_col), (to_row, to_col) = from_pos, to_pos
+        if from_col == to_col:
+            return abs(from_row - to_row)
+        tallest = self.table(heights, rows).between(from_col)[to_col]
+        clear_row = max(from_row, to_row, tallest)
+        return (clear_row - from_row) + abs(to_col - from_col) + (clear_row - to_row)
+
+
+# Shared by the planners, so a profile worked out by one is reused by the others
+TRAVEL_COSTS = TravelCosts()
@@ -0,0 +1,225 @@
+# Dockership/tasks/manifest_parser.py
+
+"""
+One parser for ship manifests.
+
+Every manifest line has the form "[rr,cc], {wwwww}, NAME", where NAME is NAN for
+a slot outside the hull, UNUSED for a free slot, or the container name (which
+may contain spaces). A single compiled pattern reads each line once into a
+columnar Manifest: flat arrays of 0-based positions, weights and slot kinds, plus
+the interned names. Pages and planners build their grids, states and geometries
+from it instead of re-parsing the text, and a malformed line is reported with
+its line number.
+"""
+
+import re  # The compiled line pattern
+import sys  # Interning container names
+from array import array  # Compact columns
+
+from tasks.ship_geometry import ShipGeometry  # Bay dimensions
+from tasks.ship_state import EMPTY, NAN, ShipState, zobrist_key  # Packing a state without a grid
+
+# Slot kinds
+SLOT_NAN = 0  # Not part of the hull
+SLOT_UNUSED = 1  # Free slot
+SLOT_CONTAINER = 2  # Holds a container
+
+MANIFEST_LINE = re.compile(r"\[\s*(\d+)\s*,\s*(\d+)\s*\]\s*,\s*\{\s*(\d+)\s*\}\s*,\s*(\S.*)")
+
+_KINDS = {"NAN": SLOT_NAN, "UNUSED": SLOT_UNUSED}
+
+
+class ManifestError(ValueError):
+    """
+    A manifest line that cannot be read.
+
+    Attributes:
+        line_number (int): 1-based number of the offending line.
+        line (str): The line itself.
+    """
+
+    def __init__(self, reason, line_number, line):
+        super().__init__(f"Line {line_number}: {reason}: '{line}'")
+        self.reason = reason
+        self.line_number = line_number
+        self.line = line
+
+
+class Manifest:
+    """
+    Parsed manifest, one entry per slot line, in file order.
+
+    Attributes:
+        rows (int): Highest row number listed (the bay height).
+        cols (int): Highest column number listed (the bay width).
+        slot_rows (array): 0-based row of each entry, row 0 at the bottom.
+        slot_cols (array): 0-based column of each entry.
+        weights (array): Weight of each entry.
+        kinds (array): SLOT_NAN, SLOT_UNUSED or SLOT_CONTAINER for each entry.
+        names (list[str]): Interned name of each entry (NAN and UNUSED included).
+        line_numbers (array): 1-based line each entry was read from.
+    """
+
+    __slots__ = ("rows", "cols", "slot_rows", "slot_cols", "weights", "kinds", "names", "line_numbers")
+
+    def __init__(self):
+        self.rows = 0
+        self.cols = 0
+        self.slot_rows = array("H")
+        self.slot_cols = array("H")
+        self.weights = array("q")
+        self.kinds = array("b")
+        self.names = []
+        self.line_numbers = array("I")
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def records(self):
+        """
+        Yields (row, col, weight, kind, name) for every entry, with 0-based positions.
+        """
+        return zip(self.slot_rows, self.slot_cols, self.weights, self.kinds, self.names)
+
+    def geometry(self, **kwargs):
+        """
+        Returns the bay geometry covering every listed slot, or the default bay if none is listed.
+
+        Args:
+            **kwargs: Crane origin and buffer capacity, passed through.
+        """
+        if self.rows == 0 or self.cols == 0:
+            return ShipGeometry(**kwargs)
+        return ShipGeometry(self.rows, self.cols, **kwargs)
+
+    def fill_grid(self, ship_grid, containers=None, names=None):
+        """
+        Writes every entry into a grid of Slot objects.
+
+        Args:
+            ship_grid (list[list[Slot]]): The grid to fill, at least as large as the manifest.
+            containers (list, optional): Receives the [row, col] of each container.
+            names (NameIndex, optional): Receives each container's name and slot.
+
+        Raises:
+            ManifestError: If an entry lies outside the grid.
+        """
+        from tasks.ship_balancer import Container, Slot  # ship_balancer parses with this module
+
+        grid_rows, grid_cols = len(ship_grid), len(ship_grid[0])
+        for i, (row, col, weight, kind, name) in enumerate(self.records()):
+            if row >= grid_rows or col >= grid_cols:
+                raise ManifestError(f"slot is outside the {grid_rows}x{grid_cols} bay",
+                                    self.line_numbers[i], _format_line(row, col, weight, name))
+            if kind == SLOT_CONTAINER:
+                ship_grid[row][col] = Slot(Container(name, weight), hasContainer=True, available=False)
+                if containers is not None:
+                    containers.append([row, col])
+                if names is not None:
+                    names.add(name, (row, col))
+            else:
+                ship_grid[row][col] = Slot(None, hasContainer=False, available=kind == SLOT_UNUSED)
+
+    def to_grid(self, names=None):
+        """
+        Builds a grid of the manifest's own size; slots it does not list are NAN.
+
+        Returns:
+            tuple: (ship_grid, container locations)
+        """
+        from tasks.ship_balancer import create_ship_grid  # ship_balancer parses with this module
+
+        geometry = self.geometry()
+        ship_grid, containers = create_ship_grid(geometry.rows, geometry.cols), []
+        self.fill_grid(ship_grid, containers, names)
+        return ship_grid, containers
+
+    def to_state(self):
+        """
+        Packs the manifest straight into a ShipState, without building Slot objects.
+
+        Returns:
+            ShipState: The same state ShipState.from_grid(self.to_grid()[0]) gives.
+        """
+        geometry = self.geometry()
+        rows, cols = geometry.rows, geometry.cols
+        mid = cols // 2
+        cells = array("i", [NAN]) * (rows * cols)
+        for row, col, weight, kind, _ in self.records():
+            cells[row * cols + col] = weight if kind == SLOT_CONTAINER else NAN if kind == SLOT_NAN else EMPTY
+
+        heights = array("B", bytes(cols))
+        left = right = zobrist = 0
+        for cell, weight in enumerate(cells):
+            if weight == EMPTY:
+                continue
+            row, col = divmod(cell, cols)
+            heights[col] = row + 1
+            if weight >= 0:
+                zobrist ^= zobrist_key(cell, weight)
+                if col < mid:
+                    left += weight
+                else:
+                    right += weight
+
+        return ShipState(rows, cols, heights, cells, left, right, zobrist)
+
+
+def _format_line(row, col, weight, name):
+    return f"[{row + 1:02d},{col + 1:02d}], {{{weight:05d}}}, {name}"
+
+
+def parse_manifest_lines(lines):
+    """
+    Parses manifest lines in one pass; blank lines are skipped.
+
+    Args:
+        lines (iterable[str]): Manifest lines, with or without line endings.
+
+    Returns:
+        Manifest: The parsed entries.
+
+    Raises:
+        ManifestError: For the first line that is malformed, has a 0 coordinate,
+            or repeats a slot listed earlier.
+    """
+    manifest = Manifest()
+    match_line = MANIFEST_LINE.fullmatch
+    intern = sys.intern
+    seen = set()
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        match = match_line(line)
+        if match is None:
+            raise ManifestError("expected '[row,col], {weight}, name'", line_number, line)
+        row, col, weight, name = match.groups()
+        row, col = int(row), int(col)
+        if row == 0 or col == 0:
+            raise ManifestError("rows and columns are numbered from 1", line_number, line)
+        if (row, col) in seen:
+            raise ManifestError("slot is listed twice", line_number, line)
+        seen.add((row, col))
+
+        manifest.slot_rows.append(row - 1)
+        manifest.slot_cols.append(col - 1)
+        manifest.weights.append(int(weight))
+        manifest.kinds.append(_KINDS.get(name, SLOT_CONTAINER))
+        manifest.names.append(intern(name))
+        manifest.line_numbers.append(line_number)
+        if row > manifest.rows:
+            manifest.rows = row
+        if col > manifest.cols:
+            manifest.cols = col
+
+    return manifest
+
+
+def parse_manifest_text(text):
+    """
+    Parses the text of a whole manifest; see parse_manifest_lines.
+    """
+    return parse_manifest_lines(text.splitlines())
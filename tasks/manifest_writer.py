@@ -0,0 +1,125 @@
+# Dockership/tasks/manifest_writer.py
+
+"""
+One writer for ship manifests.
+
+Writes a grid out as "[rr,cc], {wwwww}, NAME" lines, row by row from the
+bottom. The "[rr,cc], {" prefixes are formatted once per bay size, and a
+ManifestWriter remembers the line and contents of every slot it wrote, so
+writing the same ship again after a few moves only formats the slots that
+changed. Lines are streamed into a file a row at a time, or joined into one
+string or bytes buffer.
+"""
+
+from functools import lru_cache  # Coordinate prefixes per bay size
+
+_NAN_TAIL = "00000}, NAN"
+_UNUSED_TAIL = "00000}, UNUSED"
+
+
+@lru_cache(maxsize=16)
+def coordinate_prefixes(rows, cols):
+    """
+    Returns the "[rr,cc], {" prefix of every slot of a rows x cols bay.
+
+    Returns:
+        tuple[tuple[str]]: prefixes[row][col], with 0-based indices.
+    """
+    return tuple(tuple(f"[{row + 1:02d},{col + 1:02d}], {{" for col in range(cols))
+                 for row in range(rows))
+
+
+def _key(slot):
+    """
+    Returns what a slot's manifest line depends on.
+    """
+    if slot.hasContainer:
+        return slot.container.weight, slot.container.name
+    return bool(slot.available)
+
+
+class ManifestWriter:
+    """
+    Writes grids as manifests, reformatting only the slots that changed since the last write.
+
+    Attributes:
+        changed (int): Slots formatted by the last write.
+    """
+
+    def __init__(self):
+        self.changed = 0
+        self._shape = None
+        self._keys = []
+        self._lines = []
+
+    def lines(self, ship_grid):
+        """
+        Returns the manifest lines of a grid.
+
+        Args:
+            ship_grid (list[list[Slot]]): The ship grid.
+
+        Returns:
+            list[list[str]]: The lines of each row, bottom row first, without line endings.
+        """
+        rows, cols = len(ship_grid), len(ship_grid[0])
+        if self._shape != (rows, cols):
+            self._shape = (rows, cols)
+            self._keys = [[None] * cols for _ in range(rows)]
+            self._lines = [[None] * cols for _ in range(rows)]
+
+        prefixes = coordinate_prefixes(rows, cols)
+        changed = 0
+        for row, keys, lines, prefix in zip(ship_grid, self._keys, self._lines, prefixes):
+            for col, slot in enumerate(row):
+                key = _key(slot)
+                if lines[col] is not None and keys[col] == key:
+                    continue
+                if key is True:
+                    tail = _UNUSED_TAIL
+                elif key is False:
+                    tail = _NAN_TAIL
+                else:
+                    tail = "%05d}, %s" % key
+                keys[col] = key
+                lines[col] = prefix[col] + tail
+                changed += 1
+
+        self.changed = changed
+        return self._lines
+
+    def text(self, ship_grid):
+        """
+        Returns the manifest of a grid as one string, lines separated by "\\n".
+        """
+        return "\n".join("\n".join(lines) for lines in self.lines(ship_grid))
+
+    def to_bytes(self, ship_grid):
+        """
+        Returns the manifest of a grid as UTF-8 bytes, lines separated by "\\n".
+        """
+        return self.text(ship_grid).encode("utf-8")
+
+    def write(self, ship_grid, file):
+        """
+        Streams the manifest of a grid into a binary file, one row at a time.
+
+        Args:
+            ship_grid (list[list[Slot]]): The ship grid.
+            file: Binary file object (or io.BytesIO) to write to.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        written = 0
+        for index, lines in enumerate(self.lines(ship_grid)):
+            chunk = ("\n" if index else "") + "\n".join(lines)
+            written += file.write(chunk.encode("utf-8"))
+        return written
+
+
+def manifest_lines(ship_grid):
+    """
+    Returns the manifest lines of a grid as one flat list, bottom row first.
+    """
+    return [line for lines in ManifestWriter().lines(ship_grid) for line in lines]
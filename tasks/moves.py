@@ -0,0 +1,64 @@
+# Dockership/tasks/moves.py
+
+"""
+Structured move records shared by every planner.
+
+Planners emit Move records instead of strings such as "[0, 1] to [0, 2]";
+coordinates stay 0-based integers until a page formats them for display.
+"""
+
+from collections import namedtuple  # Compact, immutable record type
+
+
+class Move(namedtuple("Move", "from_row from_col to_row to_col container cost")):
+    """
+    A single crane move of one container.
+
+    Attributes:
+        from_row (int): 0-based row the container is taken from (-1 for the buffer).
+        from_col (int): 0-based column the container is taken from, or the
+            BufferZone slot number when from_row is -1.
+        to_row (int): 0-based row the container is put down at (-1 for the buffer).
+        to_col (int): 0-based column the container is put down at, or the
+            BufferZone slot number when to_row is -1.
+        container (str or None): Name of the container being moved.
+        cost (int): Time the move takes (minutes for the balancer, seconds for the loader).
+    """
+
+    __slots__ = ()
+
+    @property
+    def from_loc(self):
+        return [self.from_row, self.from_col]
+
+    @property
+    def to_loc(self):
+        return [self.to_row, self.to_col]
+
+    def __str__(self):
+        # Matches the legacy 0-based step strings
+        return f"[{self.from_row}, {self.from_col}] to [{self.to_row}, {self.to_col}]"
+
+    def describe(self):
+        """
+        Returns the move in the 1-based coordinates operators see on the manifest.
+        """
+        return f"[{self.from_row + 1},{self.from_col + 1}] to [{self.to_row + 1},{self.to_col + 1}]"
+
+
+def summarize_moves(moves):
+    """
+    Collapses the sub-steps of one container move into a single start-to-end Move.
+
+    Args:
+        moves (list[Move]): Consecutive sub-steps of the same container.
+
+    Returns:
+        Move: Move from the first origin to the last destination with the summed cost,
+            or None if moves is empty.
+    """
+    if not moves:
+        return None
+    first, last = moves[0], moves[-1]
+    return Move(first.from_row, first.from_col, last.to_row, last.to_col,
+                first.container, sum(move.cost for move in moves))
@@ -0,0 +1,93 @@
+# Dockership/tasks/name_index.py
+
+"""
+Name-to-position index of the containers on a ship.
+
+A NameIndex maps each container name to the slots holding a container with
+that name, so unload requests and duplicate-name resolution look up only the
+containers they ask for instead of scanning the grid. It is built while the
+manifest is parsed and kept current by the loader as containers move.
+"""
+
+
+class NameIndex:
+    """
+    Multimap from container name to the 0-based (row, col) slots holding it.
+    """
+
+    def __init__(self):
+        self._positions = {}
+        self._count = 0
+
+    @classmethod
+    def from_grid(cls, ship_grid):
+        """
+        Builds the index of every container on a grid.
+        """
+        names = cls()
+        names.rebuild(ship_grid)
+        return names
+
+    def rebuild(self, ship_grid):
+        """
+        Replaces the contents of the index with the containers on a grid.
+        """
+        self._positions = {}
+        self._count = 0
+        for row_idx, row in enumerate(ship_grid):
+            for col_idx, slot in enumerate(row):
+                if slot.hasContainer:
+                    self.add(slot.container.name, (row_idx, col_idx))
+
+    def add(self, name, pos):
+        positions = self._positions.setdefault(name, set())
+        if tuple(pos) in positions:
+            return
+        positions.add(tuple(pos))
+        self._count += 1
+
+    def remove(self, name, pos):
+        positions = self._positions.get(name)
+        if positions is None or tuple(pos) not in positions:
+            return
+        positions.discard(tuple(pos))
+        if not positions:
+            del self._positions[name]
+        self._count -= 1
+
+    def move(self, name, from_pos, to_pos):
+        self.remove(name, from_pos)
+        self.add(name, to_pos)
+
+    def positions(self, name):
+        """
+        Returns the slots holding containers with this name, top row first, then
+        left to right, as find_container_positions does.
+        """
+        return sorted(self._positions.get(name, ()), key=lambda pos: (-pos[0], pos[1]))
+
+    def matches(self, ship_grid, names):
+        """
+        Checks the entries for the given names against the grid.
+
+        Returns:
+            bool: False if any listed slot no longer holds a container with its name.
+        """
+        for name in names:
+            for row, col in self._positions.get(name, ()):
+                slot = ship_grid[row][col]
+                if not slot.hasContainer or slot.container.name != name:
+                    return False
+        return True
+
+    def copy(self):
+        names = NameIndex()
+        names._positions = {name: set(positions) for name, positions in self._positions.items()}
+        names._count = self._count
+        return names
+
+    def __contains__(self, name):
+        return name in self._positions
+
+    def __len__(self):
+        return self._count
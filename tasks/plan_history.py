@@ -0,0 +1,150 @@
+# Dockership/tasks/plan_history.py
+
+"""
+Delta-encoded history of a plan.
+
+Instead of deep-copying the whole grid after every move, a PlanHistory keeps the
+initial grid once plus, for every step, the handful of slots that step changed.
+Intermediate grids are rebuilt on demand by replaying deltas from the nearest
+cached grid, and a small LRU keeps the most recently viewed steps ready.
+"""
+
+import copy  # Shallow copies of the slots captured in each delta
+from collections import OrderedDict  # LRU of materialised grids
+
+DEFAULT_CACHE_SIZE = 8
+
+
+class PlanHistory:
+    """
+    Initial grid plus one delta per step, indexable like a list of grids.
+
+    history[i] is the grid after step i (history[-1] is the final grid) and
+    history.grid(k) is the grid after k steps (history.grid(0) is the initial grid).
+    Returned grids are fresh row lists, but Slot objects are shared between steps
+    and must be treated as read-only.
+    """
+
+    def __init__(self, initial_grid, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            initial_grid (list[list[Slot]]): Grid before the first step; it is copied.
+            cache_size (int): Number of materialised grids kept in the LRU.
+        """
+        self._initial = [[copy.copy(slot) for slot in row] for row in initial_grid]
+        self._deltas = []  # Per step: tuple of (row, col, Slot) after the step
+        self._moves = []  # Per step: list of Move records
+        self._info = []  # Per step: free-form metadata (name, messages, cost, ...)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+
+    def record(self, ship_grid, cells, moves=(), **info):
+        """
+        Appends a step, capturing the current contents of the cells it changed.
+
+        Args:
+            ship_grid (list[list[Slot]]): The grid after the step.
+            cells (iterable): (row, col) cells changed by the step; rows < 0
+                (the buffer) are ignored.
+            moves (list[Move]): Moves that make up the step.
+            **info: Metadata stored with the step.
+        """
+        self._deltas.append(self._capture(ship_grid, cells))
+        self._moves.append(list(moves))
+        self._info.append(info)
+
+    def amend(self, ship_grid, cells):
+        """
+        Folds further changes to the given cells into the last step.
+        """
+        changed = {(r, c) for r, c, _ in self._deltas[-1]}
+        changed.update((r, c) for r, c in cells if r >= 0)
+        self._deltas[-1] = self._capture(ship_grid, sorted(changed))
+        self._cache.pop(len(self._deltas), None)
+
+    def extend(self, other, start=0):
+        """
+        Appends the steps of another history, from step `start` on; it must begin at this one's final grid.
+        """
+        self._deltas.extend(other._deltas[start:])
+        self._moves.extend(list(moves) for moves in other._moves[start:])
+        self._info.extend(dict(info) for info in other._info[start:])
+
+    def truncate(self, length):
+        """
+        Drops every step after the first `length` ones.
+        """
+        del self._deltas[length:]
+        del self._moves[length:]
+        del self._info[length:]
+        for k in [k for k in self._cache if k > length]:
+            del self._cache[k]
+
+    @staticmethod
+    def _capture(ship_grid, cells):
+        return tuple((r, c, copy.copy(ship_grid[r][c])) for r, c in cells if r >= 0)
+
+    @property
+    def steps(self):
+        """
+        list[list[Move]]: The moves of every step.
+        """
+        return self._moves
+
+    def moves(self, index):
+        return self._moves[index]
+
+    def delta(self, index):
+        """
+        Returns the (row, col, Slot) cells recorded for a step, after the step.
+        """
+        return self._deltas[index]
+
+    def info(self, index):
+        """
+        Returns the metadata recorded with a step, including its moves.
+        """
+        return dict(self._info[index], moves=self._moves[index])
+
+    def grid(self, k):
+        """
+        Returns the grid after the first k steps (k = 0 gives the initial grid).
+        """
+        if not 0 <= k <= len(self._deltas):
+            raise IndexError("plan history index out of range")
+
+        if k in self._cache:
+            self._cache.move_to_end(k)
+            return [row[:] for row in self._cache[k]]
+
+        # Replay from the closest cached grid at or before step k
+        start = max((j for j in self._cache if j <= k), default=0)
+        base = self._cache[start] if start else self._initial
+        grid = [row[:] for row in base]
+        for delta in self._deltas[start:k]:
+            for r, c, slot in delta:
+                grid[r][c] = slot
+
+        self._cache[k] = grid
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+        return [row[:] for row in grid]
+
+    @property
+    def initial_grid(self):
+        return self.grid(0)
+
+    def __len__(self):
+        return len(self._deltas)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self._deltas)
+        if not 0 <= index < len(self._deltas):
+            raise IndexError("plan history index out of range")
+        return self.grid(index + 1)
+
+    def __iter__(self):
+        for index in range(len(self._deltas)):
+            yield self.grid(index + 1)
@@ -4,7 +4,17 @@ import numpy as np
 import time
 import plotly.graph_objects as go
 
-from collections.abc import Iterable
+from tasks.balance_beam import DEFAULT_BEAM_WIDTH, beam_balance
+from tasks.balance_feasibility import check_balance_feasibility
+from tasks.balance_greedy import greedy_balance
+from tasks.balance_search import astar_balance, is_balanced, ANYTIME_WEIGHTS, DEFAULT_MAX_NODES, DEFAULT_TIME_LIMIT
+from tasks.crane import TRAVEL_COSTS, column_heights, nearest_column, carry_path
+from tasks.moves import Move
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.manifest_writer import manifest_lines
+from tasks.plan_history import PlanHistory
+from tasks.ship_geometry import ShipGeometry
+from tasks.sift_planner import plan_sift
 
 
 class Container:
@@ -54,32 +64,16 @@ def parse_manifest(file_lines):
     """
     Parses the manifest file to create a structured grid.
     Each entry in the manifest is assumed to be in the format: [row,col], {weight}, name.
-    """
-    grid = []
-    max_row, max_col = 0, 0
-
-    for line in file_lines:
-        parts = line.strip().split(", ")
-        if len(parts) != 3:
-            continue
-
-        # Parse row and column
-        row_col = parts[0].strip("[]").split(",")
-        row, col = int(row_col[0]), int(row_col[1])
-
-        # Parse weight and name
-        weight = int(parts[1].strip("{}"))
-        name = parts[2]
-
-        max_row = max(max_row, row)
-        max_col = max(max_col, col)
 
-        grid.append((row, col, weight, name))
+    Raises:
+        ManifestError: If a line is malformed.
+    """
+    manifest = parse_manifest_lines(file_lines)
 
     # Create a grid of appropriate size
-    ship_grid = [["Empty" for _ in range(max_col)] for _ in range(max_row)]
-    for row, col, weight, name in grid:
-        ship_grid[row - 1][col - 1] = {"name": name, "weight": weight}
+    ship_grid = [["Empty" for _ in range(manifest.cols)] for _ in range(manifest.rows)]
+    for row, col, weight, _, name in manifest.records():
+        ship_grid[row][col] = {"name": name, "weight": weight}
 
     return ship_grid
 
@@ -187,7 +181,7 @@ def visualize_ship_grid(ship_grid, title="Ship Grid"):
 #                 ship_grid[x][y].container.name_check = True
 #             containers.append(loc)
 
-def update_ship_grid(lines, ship_grid, containers):
+def update_ship_grid(lines, ship_grid, containers, names=None):
     """
     Updates the ship grid with manifest data from file lines.
 
@@ -195,27 +189,12 @@ def update_ship_grid(lines, ship_grid, containers):
         lines (list): Lines from the manifest file.
         ship_grid (list): The current ship grid.
         containers (list): List to store container locations.
+        names (NameIndex, optional): Index to record each container's name and slot in.
 
-    Returns:
-        None
+    Raises:
+        ManifestError: If a line is malformed or lies outside the grid.
     """
-    for line in lines:
-        slot_data = line.split()
-        loc = [int(val) - 1 for val in re.sub(r"[\[\]]",
-                                              '', slot_data[0]).split(",")[:2]]
-        weight = int(re.sub(r"[\{\}\,]", '', slot_data[1]))
-        status = slot_data[2] if len(
-            slot_data) < 3 else " ".join(slot_data[2:])
-        x, y = loc
-
-        if status == "NAN":
-            ship_grid[x][y] = Slot(None, hasContainer=False, available=False)
-        elif status == "UNUSED":
-            ship_grid[x][y] = Slot(None, hasContainer=False, available=True)
-        else:
-            ship_grid[x][y] = Slot(
-                Container(status, weight), hasContainer=True, available=False)
-            containers.append(loc)
+    parse_manifest_lines(lines).fill_grid(ship_grid, containers, names)
 
 
 
@@ -237,26 +216,28 @@ def print_grid(ship_grid):
     print(np.array(adj_ship_grid[::-1][:]))
 
 
-def load(containers_and_locs, ship_grid):
+def load(containers_and_locs, ship_grid, geometry=None):
 
-    ship_grids, store_goals  = [], []
+    geometry = geometry or ShipGeometry.from_grid(ship_grid)
+    history = PlanHistory(ship_grid)
 
-    steps, unloading_zone = [], [len(ship_grid) - 1, 0]
+    unloading_zone = list(geometry.crane_origin)
 
     containers_and_locs = sorted(containers_and_locs, key=lambda x: x[1][0])
 
     for idx, (container, loc) in enumerate(containers_and_locs):
-        ship_grid[unloading_zone[0]][unloading_zone[1]].container = container
-        ship_grid[unloading_zone[0]][unloading_zone[1]].hasContainer = True
-        ship_grid[unloading_zone[0]][unloading_zone[1]].available = False
+        # Replace the slot rather than mutating it, grids from a PlanHistory share slots
+        ship_grid[unloading_zone[0]][unloading_zone[1]] = Slot(container, hasContainer=True, available=False)
 
         orig_ship_grid = copy.deepcopy(ship_grid)
+        mark = len(history)
 
-        extra_steps, extra_grids = move_to(unloading_zone, loc, ship_grid, store_goals)
+        extra_steps = move_to(unloading_zone, loc, ship_grid, history)
 
         if not extra_steps:
             # If no possible steps, container is being blocked
             ship_grid = orig_ship_grid
+            history.truncate(mark)
             containers = []
             for r, row in enumerate(ship_grid):
                 for c, slot in enumerate(row):
@@ -266,42 +247,36 @@ def load(containers_and_locs, ship_grid):
 
             sorted_containers = sorted(containers, key=lambda x:x[0], reverse=True)
             new_loc = nearest_available(sorted_containers[0], ship_grid)
-            extra_steps, extra_grids = move_to(sorted_containers[0], new_loc, ship_grid, store_goals)
-
-            new_steps, new_grids = move_to(unloading_zone, loc, ship_grid, store_goals)
-
-            extra_steps.append(new_steps)
-            extra_grids.append(new_grids)
+            move_to(sorted_containers[0], new_loc, ship_grid, history)
+            move_to(unloading_zone, loc, ship_grid, history)
 
+        # The container may still be waiting at the unloading zone
+        if len(history) > mark:
+            history.amend(ship_grid, [unloading_zone])
 
-        steps.append(extra_steps)
-        ship_grids.append(extra_grids)
+    return history.steps, history
 
-    r, c = np.array(ship_grid).shape
-    ship_grids = reformat_grid_list(ship_grids, r, c)
 
-    steps = reformat_step_list(steps, store_goals)
-
-    return steps, ship_grids
-
-
-def unload(containers_to_unload, ship_grid):
+def unload(containers_to_unload, ship_grid, geometry=None):
 
     # order containers by height, descending
     containers = sorted(containers_to_unload, key=lambda r: r[0], reverse=True)
 
-    ship_grids, store_goals  = [], []
+    history = PlanHistory(ship_grid)
 
     orig_ship_grid = copy.deepcopy(ship_grid)
 
-    steps, unloading_zone = [], [len(ship_grid) - 1, 0]
+    geometry = geometry or ShipGeometry.from_grid(ship_grid)
+    unloading_zone = list(geometry.crane_origin)
     # move each container to unloading zone
     for container_loc in containers:
-        extra_steps, extra_grids = move_to(container_loc, unloading_zone, ship_grid, store_goals)
+        mark = len(history)
+        extra_steps = move_to(container_loc, unloading_zone, ship_grid, history)
 
         if not extra_steps:
             # If no possible steps, container is being blocked
             ship_grid = orig_ship_grid
+            history.truncate(mark)
             containers = []
             for r, row in enumerate(ship_grid):
                 for c, slot in enumerate(row):
@@ -311,208 +286,205 @@ def unload(containers_to_unload, ship_grid):
 
             sorted_containers = sorted(containers, key=lambda x:x[0], reverse=True)
             new_loc = nearest_available(sorted_containers[0], ship_grid)
-            extra_steps, extra_grids = move_to(sorted_containers[0], new_loc, ship_grid, store_goals)
-
-            new_steps, new_grids = move_to(container_loc, unloading_zone, ship_grid, store_goals)
-
-            extra_steps.append(new_steps)
-            extra_grids.append(new_grids)
-
-        steps.append(extra_steps)
-        ship_grids.append(extra_grids)
-
-        # steps[-1].append(str(unloading_zone) + " to " + "[8, 0]")
+            move_to(sorted_containers[0], new_loc, ship_grid, history)
+            move_to(container_loc, unloading_zone, ship_grid, history)
 
         # Remove container from grid
-        ship_grid[unloading_zone[0]][unloading_zone[1]].container = None
-        ship_grid[unloading_zone[0]][unloading_zone[1]].hasContainer = False
-        ship_grid[unloading_zone[0]][unloading_zone[1]].available = True
-
-    r, c = np.array(ship_grid).shape
-    ship_grids = reformat_grid_list(ship_grids, r, c)
+        ship_grid[unloading_zone[0]][unloading_zone[1]] = Slot(None, hasContainer=False, available=True)
 
-    steps = reformat_step_list(steps, store_goals)
+        # The container leaves the ship at the end of its last step
+        if len(history) > mark:
+            history.amend(ship_grid, [unloading_zone])
 
-    return steps, ship_grids
+    return history.steps, history
 
 
 # Returns move steps and status code (success or failure)
-def balance(ship_grid, containers):
+def balance(ship_grid, containers, max_nodes=DEFAULT_MAX_NODES, time_limit=DEFAULT_TIME_LIMIT, callback=None,
+            mode="anytime", beam_width=DEFAULT_BEAM_WIDTH):
+    """
+    Balances the ship with the best plan found within the time budget, falling back to SIFT.
 
-    store_goals = []
+    Args:
+        ship_grid (list): The ship grid, updated in place with the final layout.
+        containers (list): Locations of the containers on the ship.
+        max_nodes (int): Maximum number of states each search pass may keep in memory.
+        time_limit (float): Wall-clock budget for planning in seconds, the
+            feasibility check included.
+        callback (callable, optional): Called as callback(column_moves, cost)
+            each time a cheaper plan is found; see plan_balance.
+        mode (str): "anytime" for weighted A* passes, "beam" for beam search,
+            which scales to larger bays; see plan_balance.
+        beam_width (int): States kept per layer in "beam" mode.
 
+    Returns:
+        tuple: Steps per container move, a PlanHistory of the grid after each
+            move, and True if the ship was balanced (False if SIFT was used).
+    """
     if len(containers) == 0:
         return [], [], True
 
-    # Calculate current ship balance on each side
-    left_balance, right_balance, balanced = calculate_balance(ship_grid)
-
     # If balanced return, else continue
+    _, _, balanced = calculate_balance(ship_grid)
     if balanced:
-        return None, True
+        return [], [], True
 
-    steps, ship_grids = [], []
-    iter, max_iter = 0, 100
+    history = PlanHistory(ship_grid)
+    deadline = time.perf_counter() + time_limit
 
-    halfway_line = len(ship_grid[0]) / 2
+    # Decide from the weights alone whether any balanced split exists
+    weights = [slot.container.weight for row in ship_grid for slot in row if slot.hasContainer]
+    feasibility = check_balance_feasibility(weights)
 
-    previous_balance_ratio = 0
+    if not feasibility.feasible:
+        print("Balance is impossible with these weights (best ratio {:.3f}), beginning SIFT..."
+              .format(feasibility.best_ratio))
+        sift(ship_grid, history)
+        return history.steps, history, False
 
-    orig_ship_grid = copy.deepcopy(ship_grid)
-    orig_container = copy.deepcopy(containers)
+    # The check can take a second on large bays, so it comes out of the planning budget
+    plan = plan_balance(ship_grid, max_nodes, max(deadline - time.perf_counter(), 0),
+                        (feasibility.lowest_left, feasibility.highest_left), callback,
+                        mode=mode, beam_width=beam_width)
 
-    # On heavier side, cycle through each container
-    while(balanced is False):
+    if plan is None:
+        print("Balance could not be achieved, beginning SIFT...")
+        sift(ship_grid, history)
+        return history.steps, history, False
 
-        # Continue until balanced, or return error
+    column_moves, _ = plan
+    apply_column_moves(column_moves, ship_grid, history)
 
-        # Run until max iterations reached, then return failure
-        if iter >= max_iter:
-            print("Balance could not be achieved, beginning SIFT...")
-            steps, ship_grids, store_goals = [], [], []
-            steps, ship_grids = sift(ship_grid, containers, store_goals)
-            r, c = np.array(ship_grid).shape
-            ship_grids = reformat_grid_list(ship_grids, r, c)
-            steps = reformat_step_list(steps, store_goals)
-            return steps, ship_grids, False
+    return history.steps, history, True
 
-        if left_balance > right_balance:
-            curr_containers = [loc for loc in containers if loc[1] < halfway_line and ship_grid[loc[0]][loc[1]].container is not None]
-        else:
-            curr_containers = [loc for loc in containers if loc[1] >= halfway_line and ship_grid[loc[0]][loc[1]].container is not None]
-
-        move_cost, balance_update = [], []
-        # compute cost for each container to move to other side
-        for container_loc in curr_containers:
-            # compute closeness to balance if moved
-            balance_update.append((container_loc, close_to_balance(ship_grid, container_loc, left_balance, right_balance)))
-
-            # # compute cost to move to nearest open slot
-            # costs.append(compute_cost_to_balance(container_loc, ship_grid))
-
-        # select container with lowest cost that achieves balance or is closest (location of container)
-        sorted_balance_update = sorted(balance_update, key=lambda x: x[1])
-        container_to_move, balance_ratio = sorted_balance_update[0][0], sorted_balance_update[0][1]
-
-        # If there has been no update in balance
-        if (abs(previous_balance_ratio - balance_ratio) < 0.000001):
-            print("Balance could not be achieved, beginning SIFT...")
-            ship_grid, containers = orig_ship_grid, orig_container
-            steps, ship_grids, store_goals = [], [], []
-            steps, ship_grids = sift(ship_grid, containers, store_goals)
-            r, c = np.array(ship_grid).shape
-            ship_grids = reformat_grid_list(ship_grids, r, c)
-            steps = reformat_step_list(steps, store_goals)
-            return steps, ship_grids, False
-
-        # move container
-        goal_loc = list(nearest_available_balance(left_balance, right_balance, ship_grid))
-        new_steps, new_grids = move_to(container_to_move, goal_loc, ship_grid, store_goals)
-        steps.append(new_steps)
-        ship_grids.append(new_grids)
-        # print_grid(ship_grid)
-
-        # Update containers with new changes
-        containers = []
-        for x, row in enumerate(ship_grid):
-            for y, col in enumerate(row):
-                if ship_grid[x][y].hasContainer is True:
-                    containers.append([x, y])
-
-        left_balance, right_balance, balanced = calculate_balance(ship_grid)
-        previous_balance_ratio = balance_ratio
-        iter += 1
-
-    # return updated ship grid and success
-    r, c = np.array(ship_grid).shape
-    ship_grids = reformat_grid_list(ship_grids, r, c)
-
-    steps = reformat_step_list(steps, store_goals)
-
-    return steps, ship_grids, True
-
-
-def sift(ship_grid, containers, store_goals):
-    steps, ship_grids = [], []
-
-    # containers sorted by weights (ascending)
-    container_weights = sorted([(container, ship_grid[container[0]][container[1]].container) for container in containers], key=lambda container: container[1].weight, reverse=True)
-    sorted_container_weights = [tup[0] for tup in container_weights]
-
-    all_sift_slots = calculate_all_sift_slots(ship_grid)
-    new_loc = None
-
-    for idx, container in enumerate(sorted_container_weights):
-
-        # check if container was moved already without updating
-        if ship_grid[container[0]][container[1]].hasContainer is False:
-            # find container
-            for moves in store_goals:
-                try:
-                    if list(moves).index(str(container)) == 0:
-                        # update container location
-                        new_loc = moves[1]
-                        sorted_container_weights[idx] = [int(l) for l in new_loc.strip('][').split(', ')]
-                        container = sorted_container_weights[idx]
-                        break
-                except ValueError:
-                    pass
-
-        next_move = all_sift_slots[0]
-        del all_sift_slots[0]
-        # while current slot is NaN, cycle through available slots
-        while ship_grid[next_move[0]][next_move[1]].hasContainer is False and \
-                    ship_grid[next_move[0]][next_move[1]].available is False:
-
-                    del all_sift_slots[0]
-                    # get next available slot
-                    next_move = all_sift_slots[0]
-
-        if next_move == container:
-            # container is already in place
+
+def plan_balance(ship_grid, max_nodes=DEFAULT_MAX_NODES, time_limit=DEFAULT_TIME_LIMIT, left_range=None,
+                 callback=None, weights=ANYTIME_WEIGHTS, mode="anytime", beam_width=DEFAULT_BEAM_WIDTH):
+    """
+    Finds a balance plan quickly, then keeps looking for cheaper ones until the budget runs out.
+
+    The greedy balancer gives a first plan almost at once. In "anytime" mode,
+    weighted A* passes with decreasing heuristic weights follow, each searching
+    only for plans cheaper than the best so far. A pass that finds nothing
+    cheaper after trying every state within the bound proves the best plan
+    optimal and ends the search early, as does any plan from a pass with weight
+    1.0. In "beam" mode a beam search that starts from the greedy plan follows
+    instead; its memory does not grow with the size of the bay, but its plans
+    are not proven optimal.
+
+    Args:
+        ship_grid (list[list[Slot]]): The ship grid (not modified).
+        max_nodes (int): Maximum number of states each pass may keep in memory.
+        time_limit (float): Wall-clock budget for all passes in seconds.
+        left_range (tuple, optional): Balanced left-side totals, as astar_balance takes.
+        callback (callable, optional): Called as callback(column_moves, cost)
+            with every improved plan, so a caller can show it before the search ends.
+        weights (tuple[float]): Heuristic weight of each A* pass, in order.
+        mode (str): "anytime" or "beam".
+        beam_width (int): States kept per layer in "beam" mode.
+
+    Returns:
+        tuple: (column_moves, cost) of the cheapest plan found, or None.
+    """
+    if mode not in ("anytime", "beam"):
+        raise ValueError(f"Unknown balance mode '{mode}', expected 'anytime' or 'beam'.")
+
+    deadline = time.perf_counter() + time_limit
+    best = greedy_balance(ship_grid)
+    if best is not None and callback is not None:
+        callback(*best)
+
+    if mode == "beam":
+        plan = beam_balance(ship_grid, beam_width=beam_width, time_limit=max(deadline - time.perf_counter(), 0),
+                            left_range=left_range, incumbent=best)
+        if plan is not None and (best is None or plan[1] < best[1]):
+            best = plan
+            if callback is not None:
+                callback(*best)
+        return best
+
+    for weight in weights:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+
+        stats = {}
+        plan = astar_balance(ship_grid, max_nodes=max_nodes, time_limit=remaining, left_range=left_range,
+                             weight=weight, cost_bound=best[1] if best is not None else None, stats=stats)
+        if plan is None:
+            if stats["exhausted"]:
+                break
             continue
 
-        # if there is a container, proceed to move it
-        if ship_grid[next_move[0]][next_move[1]].hasContainer is True:
-            nearest_avail = nearest_available(next_move, ship_grid)
-            # move container to nearest available
-            extra_steps, extra_grids = move_to(next_move, nearest_avail, ship_grid, store_goals)
-            steps.append(extra_steps)
-            ship_grids.append(extra_grids)
+        best = plan
+        if callback is not None:
+            callback(*best)
+        if weight == 1.0:
+            break
+
+    return best
+
 
-            sorted_container_weights[sorted_container_weights.index(next_move)] = nearest_avail
-        # move container to original next move
-        extra_steps, extra_grids = move_to(container, next_move, ship_grid, store_goals)
-        steps.append(extra_steps)
-        ship_grids.append(extra_grids)
+def apply_column_moves(column_moves, ship_grid, history):
+    """
+    Carries out a sequence of top-of-column moves on the ship grid.
+
+    Each container is lifted until it clears the columns in between, carried
+    across and lowered onto the destination stack, one cell per sub-step.
+
+    Args:
+        column_moves (list): (from_col, to_col) pairs.
+        ship_grid (list): The ship grid, updated in place.
+        history (PlanHistory): Receives one step per container move.
+    """
+    rows = len(ship_grid)
+    heights = column_heights(ship_grid)
 
-        sorted_container_weights[idx] = next_move
+    for from_col, to_col in column_moves:
+        _, clear_row = TRAVEL_COSTS.travel(heights, rows, from_col, to_col)
 
-    return steps, ship_grids
+        from_loc = [heights[from_col] - 1, from_col]
+        goal_loc = [heights[to_col], to_col]
+        path = carry_path(from_loc, goal_loc, clear_row)
+        heights[from_col] -= 1
+        heights[to_col] += 1
 
+        name = ship_grid[from_loc[0]][from_loc[1]].container.name
+        moves = [Move(a[0], a[1], b[0], b[1], name, 1) for a, b in zip(path, path[1:])]
 
-def calculate_all_sift_slots(ship_grid):
-    halfway_line = len(ship_grid[0]) / 2
+        ship_grid[from_loc[0]][from_loc[1]], ship_grid[goal_loc[0]][goal_loc[1]] = \
+            ship_grid[goal_loc[0]][goal_loc[1]], ship_grid[from_loc[0]][from_loc[1]]
 
-    all_slots = []
+        history.record(ship_grid, [from_loc, goal_loc], moves)
 
-    for r in range(len(ship_grid)):
-        p = -1
-        curr_slot = [r, halfway_line - 1]
-        for c in range(len(ship_grid[0])):
-            slot = [r, int((curr_slot[1] + (c * pow(-1, p)))) % 12]
-            p += 1
-            all_slots.append(slot)
-            curr_slot = slot
 
-    return all_slots
+def sift(ship_grid, history):
+    """
+    Rearranges the ship into the SIFT layout: heaviest containers lowest and
+    closest to the midline.
+
+    Args:
+        ship_grid (list): The ship grid, updated in place.
+        history (PlanHistory): Receives one step per container move.
+
+    Returns:
+        bool: True if a SIFT plan was found and carried out.
+    """
+    plan = plan_sift(ship_grid)
+    if plan is None:
+        print("SIFT could not be completed.")
+        return False
 
+    column_moves, _ = plan
+    apply_column_moves(column_moves, ship_grid, history)
+    return True
 
-def move_to(container_loc, goal_loc, ship_grid, store_goals):
-    steps, ship_grids = [], []
-    curr_container_loc = copy.deepcopy(container_loc)
 
-    visited = []
+def move_to(container_loc, goal_loc, ship_grid, history):
+    steps, own_moves = [], []
+    curr_container_loc = list(container_loc)
+
+    visited = set()
 
     while (curr_container_loc != goal_loc):
 
@@ -521,7 +493,7 @@ def move_to(container_loc, goal_loc, ship_grid, store_goals):
         curr_container = ship_grid[curr_container_loc[0]][curr_container_loc[1]].container
 
         # if (curr_container is not None):
-        visited.append((curr_container, curr_container_loc))
+        visited.add((id(curr_container), tuple(curr_container_loc)))
 
         # return valid neighbors
         valid_moves = return_valid_moves(curr_container_loc, ship_grid)
@@ -530,9 +502,7 @@ def move_to(container_loc, goal_loc, ship_grid, store_goals):
             if curr_container_loc[0] < len(ship_grid) - 1:
                 if ship_grid[curr_container_loc[0] + 1][curr_container_loc[1]].hasContainer:
                     # print("No valid moves for current container {}... Moving container above".format(str(curr_container_loc)S))
-                    extra_steps, extra_grids = move_container_above(curr_container_loc, ship_grid, store_goals)
-                    steps.append(extra_steps)
-                    ship_grids.append(extra_grids)
+                    steps.append(move_container_above(curr_container_loc, ship_grid, history))
                     valid_moves = return_valid_moves(curr_container_loc, ship_grid)
 
         distances = []
@@ -548,15 +518,17 @@ def move_to(container_loc, goal_loc, ship_grid, store_goals):
             num_moves = [(loc, abs(loc[1] - goal_loc[1]), d) for loc, d in same_distances]
             if not num_moves:
                 print("No moves possible!")
-                return [], []
+                record_moves(curr_container_loc, own_moves, ship_grid, history)
+                return []
             possible_move, _, d = min(num_moves, key = lambda x: x[1])
             # cycle through possible moves until a new move is reached
-            while (curr_container, possible_move) in visited:
+            while (id(curr_container), tuple(possible_move)) in visited:
                 same_distances.remove((possible_move, d))
                 num_moves = [(loc, abs(loc[1] - goal_loc[1]), d) for loc, d in same_distances]
                 if not num_moves:
                     print("No moves possible!")
-                    return [], []
+                    record_moves(curr_container_loc, own_moves, ship_grid, history)
+                    return []
                 possible_move, _, d = min(num_moves, key = lambda x: x[1])
             # If there is still an available new move
             if (len(same_distances) > 0):
@@ -564,122 +536,101 @@ def move_to(container_loc, goal_loc, ship_grid, store_goals):
         else:
             # no equivalent moves, choose best move
             for next_loc, distance in distances:
-                if (curr_container, next_loc) not in visited:
+                if (id(curr_container), tuple(next_loc)) not in visited:
                     next_move = next_loc
                     break
 
-        steps.append(str(curr_container_loc) + " to " + str(next_move))
-
         # No valid moves
         if next_move == [-1, -1]:
-            return_valid_moves(curr_container_loc, ship_grid)
             print("No valid moves!")
             break
 
+        move = Move(curr_container_loc[0], curr_container_loc[1], next_move[0], next_move[1],
+                    curr_container.name if curr_container is not None else None, 1)
+        steps.append(move)
+        own_moves.append(move)
+
         ship_grid[curr_container_loc[0]][curr_container_loc[1]], ship_grid[next_move[0]][next_move[1]] = \
             ship_grid[next_move[0]][next_move[1]], ship_grid[curr_container_loc[0]][curr_container_loc[1]]
 
-        curr_container_loc = copy.deepcopy(next_move)
-
-    # print_grid(ship_grid)
-    ship_grids.append(copy.deepcopy(ship_grid))
-
-    store_goals.append((str(container_loc), str(goal_loc)))
+        curr_container_loc = list(next_move)
 
-    return steps, ship_grids
+    # Each finished move_to records its own sub-steps, nested moves come first
+    record_moves(curr_container_loc, own_moves, ship_grid, history)
 
+    return steps
 
-def compute_cost(container_loc, goal_loc, ship_grid):
-    steps = []
-    curr_container_loc = copy.deepcopy(container_loc)
-
-    visited = []
-
-    while (curr_container_loc != goal_loc):
-
-        curr_container = ship_grid[curr_container_loc[0]][curr_container_loc[1]].container
-
-        # if (curr_container is not None):
-        visited.append((curr_container, curr_container_loc))
-
-        # return valid neighbors
-        valid_moves = return_valid_moves(curr_container_loc, ship_grid)
-
-        if not valid_moves:
-            if curr_container_loc[0] < len(ship_grid) - 1:
-                if ship_grid[curr_container_loc[0] + 1][curr_container_loc[1]].hasContainer:
-                    print("No valid moves for current container... Moving container above")
-                    extra_steps,  _ = move_container_above(curr_container_loc, ship_grid, [])
-                    steps.append(extra_steps)
-
-        distances = []
-        for neighbor in valid_moves:
-            distances.append((neighbor, manhattan_distance(neighbor, goal_loc)))
-
-        distances = sorted(distances, key = lambda x: x[1])
-
-        next_move = [-1, -1]
-        for next_loc, distance in distances:
-            if (curr_container, next_loc) not in visited:
-                next_move = next_loc
-                break
-
-        steps.append(str(curr_container_loc) + " to " + str(next_move))
-
-        # No valid moves
-        if next_move == [-1, -1]:
-            break
 
-        ship_grid[curr_container_loc[0]][curr_container_loc[1]], ship_grid[next_move[0]][next_move[1]] = \
-            ship_grid[next_move[0]][next_move[1]], ship_grid[curr_container_loc[0]][curr_container_loc[1]]
+def record_moves(end_loc, moves, ship_grid, history):
+    """
+    Records the sub-steps of one container move as a step of the plan history.
 
-        curr_container_loc = copy.deepcopy(next_move)
+    Args:
+        end_loc (list): [row, col] the container ended up at.
+        moves (list[Move]): Sub-steps carried out, possibly empty.
+        ship_grid (list): The ship grid after the moves.
+        history (PlanHistory): Receives the step.
+    """
+    if not moves:
+        return
+    cells = [move.from_loc for move in moves] + [end_loc]
+    history.record(ship_grid, cells, moves)
 
-    # print_grid(ship_grid)
 
-    return steps
-
-def move_container_above(container_loc, ship_grid, store_goals):
-    steps, ship_grids = [], []
+def move_container_above(container_loc, ship_grid, history, heights=None):
+    steps = []
     container_above = [container_loc[0] + 1, container_loc[1]]
+    # Column heights for the whole stack being cleared, kept current one pick and drop at a time
+    heights = column_heights(ship_grid) if heights is None else heights
 
     if(container_above[0] < len(ship_grid ) - 1):
         if (ship_grid[container_above[0] + 1][container_above[1]].hasContainer):
-            extra_steps, extra_grids = move_container_above(container_above, ship_grid, store_goals)
-            steps.append(extra_steps)
-            ship_grids.append(extra_grids)
-
-    nearest_avail = nearest_available(container_above, ship_grid)
+            steps.append(move_container_above(container_above, ship_grid, history, heights))
 
-    extra_steps, extra_grids = move_to(container_above, nearest_avail, ship_grid, store_goals)
-    steps.append(extra_steps)
-    ship_grids.append(extra_grids)
+    nearest_avail = nearest_available(container_above, ship_grid, heights)
+    container = ship_grid[container_above[0]][container_above[1]].container
 
-    return steps, ship_grids
+    walk = move_to(container_above, nearest_avail, ship_grid, history)
+    steps.append(walk)
 
+    if ship_grid[nearest_avail[0]][nearest_avail[1]].container is container and \
+            not any(isinstance(step, list) for step in walk):
+        heights[container_above[1]] -= 1
+        heights[nearest_avail[1]] += 1
+    else:
+        # The walk stopped short or had to clear its own way, so count the stacks again
+        heights[:] = column_heights(ship_grid)
 
-# Finds nearest available slot to the side of container_loc column
-def nearest_available(container_loc, ship_grid):
+    return steps
 
-    line_at_container = container_loc[1]
 
-    open_slots = []
+# Finds nearest available slot to the side of container_loc column
+def nearest_available(container_loc, ship_grid, heights=None):
+    """
+    Finds the free slot in another column that is cheapest for the crane to reach.
 
-    for r, row in enumerate(ship_grid):
-        for c, slot in enumerate(row):
-            # Check if slot is available and is not hovering in the air
-            if slot.available is True:
-                # If slot is on the ground or If slot is not hovering in the air
-                if (r == 0 or ship_grid[r - 1][c].available is False) and c != line_at_container:
-                    open_slots.append([r, c])
+    Args:
+        container_loc (list): [row, col] of the container to relocate.
+        ship_grid (list): The ship grid.
+        heights (list[int], optional): column_heights of the grid, kept current by
+            the caller; worked out from the grid if not given.
 
-    distances = []
-    for slot in open_slots:
-        distances.append((slot, len(compute_cost(container_loc, slot, copy.deepcopy(ship_grid)))))
+    Returns:
+        list: [row, col] of the slot the container should be moved to.
+    """
+    rows = len(ship_grid)
+    if heights is None:
+        heights = column_heights(ship_grid)
 
-    distances = sorted(distances, key = lambda x: x[1])
+    nearest = nearest_column(heights, rows, container_loc[0], container_loc[1])
+    if nearest is not None:
+        _, col = nearest
+    else:
+        # No path stays inside the grid, fall back to the closest open column
+        open_cols = [c for c, h in enumerate(heights) if h < rows and c != container_loc[1]]
+        col = min(open_cols, key=lambda c: abs(c - container_loc[1]))
 
-    return distances[0][0]
+    return [heights[col], col]
 
 
 # returns list of valid moves for container loc
@@ -696,9 +647,9 @@ def return_valid_moves(container_loc, ship_grid):
     neighbors.append([container_loc[0], container_loc[1] - 1])
     neighbors.append([container_loc[0], container_loc[1] + 1])
 
-    # only neighbors inside the grid, (x, y) >= 0
-    neighbors = [neighbor for neighbor in neighbors if neighbor[0] >= 0  and neighbor[0] <= 7 and \
-        neighbor[1] >= 0 and neighbor[1] <= 11]
+    # only neighbors inside the grid
+    rows, cols = len(ship_grid), len(ship_grid[0])
+    neighbors = [neighbor for neighbor in neighbors if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols]
 
     valid_moves = []
 
@@ -715,54 +666,10 @@ def manhattan_distance(container_loc, goal_loc):
     return abs(container_loc[0] - goal_loc[0]) + abs(container_loc[1] - goal_loc[1])
 
 
-def nearest_available_balance(left_balance, right_balance, ship_grid):
-
-    halfway_line = int(len(ship_grid[0]) / 2)
-
-    # Check side with lower weight for available slots
-    if left_balance > right_balance:
-        ship_grid_adjusted = [row[halfway_line:] for row in ship_grid]
-    else:
-        ship_grid_adjusted = [row[:halfway_line] for row in ship_grid]
-
-    for x, row in enumerate(ship_grid_adjusted):
-        for y, slot in enumerate(row):
-            # Check if slot is available and is not hovering in the air
-            if slot.available is True:
-                # If slot is on the ground
-                if y == 0:
-                    # If dealing with right half
-                    if (left_balance > right_balance):
-                        return x, y + 6
-                    else:
-                        return x, y
-                # If slot is not hovering in the air
-                if ship_grid[x][y - 1].available is False:
-                    # If dealing with right half
-                    if (left_balance > right_balance):
-                        return x, y + 6
-                    else:
-                        return x, y
-
-    return -1, -1
-
-
-# Returns closeness to perfect balance (1.0)
-def close_to_balance(ship_grid, container_loc, left_balance, right_balance):
-
-    container_weight = ship_grid[container_loc[0]][container_loc[1]].container.weight
-
-    if left_balance > right_balance:
-        closeness = (left_balance - container_weight) / (right_balance + container_weight)
-    else:
-        closeness = (right_balance - container_weight) / (left_balance + container_weight)
-
-    return abs(1.0 - closeness)
-
-
 def calculate_balance(ship_grid):
 
     left_balance, right_balance = 0, 0
+    halfway_line = ShipGeometry.from_grid(ship_grid).mid
 
     for row in ship_grid:
         for loc, slot in enumerate(row):
@@ -770,202 +677,21 @@ def calculate_balance(ship_grid):
             if slot.container is None:
                 continue
             # left half of the ship
-            if loc <= 5:
+            if loc < halfway_line:
                 left_balance += slot.container.weight
             # right half of the ship
             else:
                 right_balance += slot.container.weight
 
-    if left_balance == 0 and right_balance == 0:
-        return left_balance, right_balance, True
-    elif right_balance == 0:
-        return left_balance, right_balance, False
-
-    balanced = True if left_balance / right_balance > 0.9 and left_balance / right_balance < 1.1 else False
-
-    return left_balance, right_balance, balanced
+    return left_balance, right_balance, is_balanced(left_balance, right_balance)
 
 
 def update_manifest(ship_grid):
-    manifest_info = []
-    manifest_row = ''
-    for r, row in enumerate(ship_grid):
-        for c, slot in enumerate(row):
-            manifest_row = "[" + "{0:0=2d}".format(r + 1) + ',' + "{0:0=2d}".format(c + 1) + "], "
-            weight = 0 if slot.hasContainer is False else slot.container.weight
-            manifest_row += "{" + "{0:0=5d}".format(weight) + "}, "
-            name = 'NAN' if slot.hasContainer is False and slot.available is False else \
-                'UNUSED' if slot.hasContainer is False and slot.available is True else \
-                    slot.container.name
-            manifest_row += name
-            manifest_info.append(manifest_row)
-    return manifest_info
-
-
-def flatten(l):
-    for el in l:
-        if isinstance(el, Iterable) and not isinstance(el, (str, bytes)):
-            yield from flatten(el)
-        else:
-            yield el
-
-
-def divide_list(l, n):
-
-    # looping till length l
-    for i in range(0, len(l), n):
-        yield l[i:i + n]
-
-
-def reshape_to_grids(l, r, c):
-    grids = []
-    for el in l:
-        grids.append(np.array(el).reshape(r, c).tolist())
-
-    return grids
-
-
-def reformat_grid_list(ship_grids, r, c):
-    formatted = list(flatten(copy.deepcopy(ship_grids)))
-    formatted = list(divide_list(formatted, r * c))
-    formatted = reshape_to_grids(formatted, r, c)
-
-    return formatted
-
-
-def reformat_step_list(steps, store_goals):
-    str_steps = str(list(flatten(steps)))
-    store = []
-    for start, goal in store_goals:
-        s_idx = str_steps.find(start)
-        e_idx = str_steps.find(goal)
-        step = str_steps[s_idx-1:e_idx+(len(goal)+1)]
-        str_steps = str_steps[e_idx+(len(goal)+1):]
-        store.append(step)
-
-    step_list = []
-    for move_list in store:
-        move_list = move_list.replace('\'', '')
-        step_list.append([ s + ']' for s in move_list.split("], ")])
-
-    for move_list in step_list:
-        move_list[-1] = move_list[-1][:len(move_list[-1])-1]
-
-    # remove empty move_lists:
-    for idx, move_list in enumerate(step_list):
-        if len(move_list) == 1 and len(move_list[0]) <= 1:
-            step_list.remove(move_list)
-
-    return step_list
-
-if __name__=="__main__":
-
-    ship_grid = create_ship_grid(8, 12)
-
-    containers = []
-
-    # Place containers manually
-    if (input("Enter input manually?: ").lower() == 'y'):
-        for n in range(int(input("Number of Containers: "))):
-
-            container_loc = [int(l) for l in input("Enter location, space-separated: ").split()]
-            container_name = input("Enter name of container: ")
-            container_weight = input("Enter weight of container: ")
-            print("Entering container into system...\n")
-
-            ship_grid[container_loc[0]][container_loc[1]].container = Container(container_name, container_weight)
-            ship_grid[container_loc[0]][container_loc[1]].hasContainer = True
-
-            containers.append(container_loc)
-    else:
-        file_loc = input("Enter file directory, or none for default: ")
-        file = open("samples/CUNARD_BLUE.txt", "r") if file_loc == "" else open(file_loc, "r")
-
-        update_ship_grid(file, ship_grid, containers)
-
-    if input("Proceed with balancing? (y/n): ") == "y":
-        left_balance, right_balance, balanced = calculate_balance(ship_grid)
-        total_weight = left_balance + right_balance
-
-        print_grid(ship_grid)
-
-        print("Total Weight:", total_weight)
-        print("Left Balance:", left_balance)
-        print("Right Balance:", right_balance)
-
-        if balanced:
-            print("Balanced!")
-        else:
-            print("Not Balanced!")
-            steps, ship_grids, status = balance(ship_grid, containers)
-
-            if (status is True):
-                print_grid(ship_grid)
-
-                left_balance, right_balance, balanced = calculate_balance(ship_grid)
-
-                print("Total Weight:", total_weight)
-                print("Left Balance:", left_balance)
-                print("Right Balance:", right_balance)
-                print("Balanced!")
-
-            print("Final Grid")
-            print_grid(ship_grid)
-            print()
-            print("Steps:")
-            print(steps)
-
-    else:
-
-        case = int(input("Select a load/unload case from 1 - 5: "))
-
-        print_grid(ship_grid)
-        print()
-
-        steps, ship_grids = [], None
-
-        # Case 1 Unload
-        if case == 1:
-            steps, ship_grids = unload([[0, 1]], ship_grid)
-
-        # Case 2 Load
-        if case == 2:
-            steps, ship_grids = load([(Container("Bat", 5432), [0, 4])], ship_grid)
-
-        # Case 3 Load/Unload
-        if case == 3:
-            steps, ship_grids = load([(Container("Bat", 5432), [0, 4]), (Container("Rat", 5397), [0, 5])], ship_grid)
-
-            new_steps, new_ship_grids = unload([[0, 1]], ship_grids[-1])
-            steps.append(new_steps)
-            ship_grids.append(new_ship_grids)
-
-
-        # Case 4 Load/Unload
-        if case == 4:
-            steps, ship_grids = load([(Container("Nat", 6543), [1, 7])], ship_grid)
-
-            print('Completed Loading')
-            print_grid(ship_grids[-1])
-            print()
-
-            new_steps, new_ship_grids = unload([[6, 4]], ship_grids[-1])
-            steps.append(new_steps)
-            ship_grids.append(new_ship_grids)
-
-        # Case 5 Load/Unload
-        if case == 5:
-            steps, ship_grids = load([(Container("Nat", 153), [0, 7]), (Container("Rat", 2321), [0, 8])], ship_grid)
-
-            print(steps)
+    return manifest_lines(ship_grid)
 
-            new_steps, new_ship_grids = unload([[0, 4], [0, 3]], ship_grids[-1])
-            for step in new_steps:
-                steps.append(step)
-            ship_grids.append(new_ship_grids)
 
-        r, c = np.array(ship_grids[0]).shape
-        ship_grids = reformat_grid_list(ship_grids, r, c)
-        print_grid(ship_grids[-1])
+if __name__ == "__main__":
+    # Batch planning from the command line lives in cli.py
+    from cli import main
 
-        print(steps)    
\ No newline at end of file
+    main()
@@ -0,0 +1,76 @@
+# Dockership/tasks/ship_geometry.py
+
+"""
+Geometry of a ship bay.
+
+A ShipGeometry carries the bay dimensions, the slot where the crane picks up and
+drops off containers, and how many containers the buffer holds. Planners take it
+instead of assuming the 8x12 bay of the sample manifests, so the same code runs
+on larger vessels.
+"""
+
+DEFAULT_ROWS = 8
+DEFAULT_COLS = 12
+DEFAULT_BUFFER_CAPACITY = 5
+
+
+class ShipGeometry:
+    """
+    Dimensions and crane layout of a ship bay.
+
+    Attributes:
+        rows (int): Number of rows, row 0 at the bottom.
+        cols (int): Number of columns; columns below cols // 2 form the left half.
+        crane_origin (tuple): 0-based (row, col) of the slot containers are loaded
+            from and unloaded to; defaults to the top-left slot.
+        buffer_capacity (int): Number of containers the buffer can hold.
+    """
+
+    def __init__(self, rows=DEFAULT_ROWS, cols=DEFAULT_COLS, crane_origin=None,
+                 buffer_capacity=DEFAULT_BUFFER_CAPACITY):
+        if rows < 1 or cols < 2:
+            raise ValueError(f"A ship bay needs at least 1 row and 2 columns, got {rows}x{cols}.")
+
+        self.rows = rows
+        self.cols = cols
+        self.crane_origin = tuple(crane_origin) if crane_origin is not None else (rows - 1, 0)
+        self.buffer_capacity = buffer_capacity
+
+        if not self.in_bounds(*self.crane_origin):
+            raise ValueError(f"Crane origin {list(self.crane_origin)} is outside the {rows}x{cols} bay.")
+
+    @classmethod
+    def from_grid(cls, ship_grid, **kwargs):
+        """
+        Returns the geometry of an existing ship grid.
+        """
+        return cls(len(ship_grid), len(ship_grid[0]), **kwargs)
+
+    @property
+    def mid(self):
+        """
+        int: First column of the right half of the ship.
+        """
+        return self.cols // 2
+
+    def is_left(self, col):
+        return col < self.mid
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def __eq__(self, other):
+        if not isinstance(other, ShipGeometry):
+            return NotImplemented
+        return (self.rows, self.cols, self.crane_origin, self.buffer_capacity) == \
+            (other.rows, other.cols, other.crane_origin, other.buffer_capacity)
+
+    def __hash__(self):
+        return hash((self.rows, self.cols, self.crane_origin, self.buffer_capacity))
+
+    def __repr__(self):
+        return (f"ShipGeometry(rows={self.rows}, cols={self.cols}, "
+                f"crane_origin={self.crane_origin}, buffer_capacity={self.buffer_capacity})")
+
+
+DEFAULT_GEOMETRY = ShipGeometry()
@@ -1,56 +1,122 @@
 from copy import deepcopy
+from collections import Counter
+from itertools import combinations
 import random
 import os
+import time
 from tasks.ship_balancer import Container, Slot, manhattan_distance
+from tasks.buffer_zone import BufferZone
+from tasks.crane import TRAVEL_COSTS
+from tasks.moves import Move
+from tasks.name_index import NameIndex
+from tasks.plan_history import PlanHistory
+from tasks.ship_geometry import ShipGeometry
+
+# Search budget for planning the loads and unloads of a port call together
+DEFAULT_PORT_CALL_TIME_LIMIT = 1.0
+DEFAULT_PORT_CALL_MAX_NODES = 200000
+
+# Choosing among same-named containers: candidates kept per name beyond those requested, and the search budget
+DEFAULT_DUPLICATE_CANDIDATES = 4
+DEFAULT_SELECTION_MAX_NODES = 5000
+
+
+class ColumnIndex:
+    """Per-column stack height, occupied and free-slot counts of a ship grid, kept current in O(1) per move."""
+
+    def __init__(self, ship_grid):
+        self.ship_grid = ship_grid
+        self.rows = len(ship_grid)
+        self.cols = len(ship_grid[0])
+        self.heights = [0] * self.cols  # Lowest available row, or rows if the column is full
+        self.occupied = [0] * self.cols
+        self.free = [0] * self.cols
+        for col in range(self.cols):
+            self.rescan(col)
+
+    def rescan(self, col):
+        """Recompute one column from the grid, for changes that are not a plain push or pop."""
+        column = [row[col] for row in self.ship_grid]
+        self.occupied[col] = sum(1 for slot in column if slot.hasContainer)
+        self.free[col] = sum(1 for slot in column if slot.available)
+        self.heights[col] = next(
+            (row for row in range(self.rows)
+             if column[row].available and (row == 0 or not column[row - 1].available)),
+            self.rows
+        )
+
+    def lowest_available(self, col):
+        """Lowest available row in the column, or -1 if there is none."""
+        return self.heights[col] if self.heights[col] < self.rows else -1
+
+    def top(self, col):
+        """Row of the container on top of the column's stack, or -1 if the stack is empty."""
+        row = self.heights[col] - 1
+        return row if row >= 0 and self.ship_grid[row][col].hasContainer else -1
+
+    def placed(self, row, col):
+        """Record that a container was put down at (row, col)."""
+        self.occupied[col] += 1
+        self.free[col] -= 1
+        above = row + 1
+        if row == self.heights[col] and (above == self.rows or self.ship_grid[above][col].available):
+            self.heights[col] = above
+        else:
+            self.rescan(col)
+
+    def cleared(self, row, col):
+        """Record that the container at (row, col) was taken away."""
+        self.occupied[col] -= 1
+        self.free[col] += 1
+        if row == self.heights[col] - 1:
+            self.heights[col] = row
+        else:
+            self.rescan(col)
 
+    def capacity(self):
+        """Percentage of the grid's slots holding a container."""
+        return sum(self.occupied) / (self.rows * self.cols) * 100
 
-def find_next_available_position(ship_grid):
-    """Find next available bottom-most position."""
-    cols = len(ship_grid[0])
-    rows = len(ship_grid)
 
-    for col_idx in range(cols):
-        for row_idx in range(rows):
-            if ship_grid[row_idx][col_idx].available:
-                if row_idx == 0 or not ship_grid[row_idx - 1][col_idx].available:
-                    return row_idx, col_idx
+def find_next_available_position(ship_grid, index=None):
+    """Find next available bottom-most position."""
+    index = index or ColumnIndex(ship_grid)
+    for col_idx in range(index.cols):
+        row_idx = index.lowest_available(col_idx)
+        if row_idx != -1:
+            return row_idx, col_idx
     return -1, -1
 
-def find_blocking_containers(ship_grid, target_row, target_col):
+def find_blocking_containers(ship_grid, target_row, target_col, index=None):
     """Find containers stacked above target in top-to-bottom order."""
-    blocking = []
-    max_row = len(ship_grid)
-    
-    # Scan top-down starting from highest possible position
-    for row in range(max_row - 1, target_row, -1):
-        if ship_grid[row][target_col].hasContainer:
-            blocking.append((row, target_col))
-            
-    return blocking  # Already in top-to-bottom order
+    index = index or ColumnIndex(ship_grid)
+    return [(row, target_col) for row in range(index.top(target_col), target_row, -1)
+            if ship_grid[row][target_col].hasContainer]
 
-def find_lowest_available_position(ship_grid, col):
+def find_lowest_available_position(ship_grid, col, index=None):
     """Find lowest available position in column."""
-    for row in range(len(ship_grid)):
-        if ship_grid[row][col].available:
-            if row == 0 or not ship_grid[row-1][col].available:
-                return row
-    return -1
+    index = index or ColumnIndex(ship_grid)
+    return index.lowest_available(col)
 
 
-def find_least_occupied_column(ship_grid, current_col, containers_to_unload):
+def find_least_occupied_column(ship_grid, current_col, containers_to_unload, index=None):
     """Find column with fewest containers not in unload list."""
+    index = index or ColumnIndex(ship_grid)
     min_containers = float('inf')
     best_col = -1
     
-    for col in range(len(ship_grid[0])):
+    for col in range(index.cols):
         if col == current_col:
             continue
-            
-        container_count = sum(
-            1 for row in range(len(ship_grid)) 
-            if ship_grid[row][col].hasContainer 
-            and ship_grid[row][col].container.name not in containers_to_unload
-        )
+
+        container_count = index.occupied[col]
+        if containers_to_unload:
+            # Only the stack can hold containers, so scan it rather than the whole column
+            container_count -= sum(
+                1 for row in range(index.top(col) + 1)
+                if ship_grid[row][col].hasContainer
+                and ship_grid[row][col].container.name in containers_to_unload
+            )
         
         if container_count < min_containers:
             min_containers = container_count
@@ -58,62 +124,73 @@ def find_least_occupied_column(ship_grid, current_col, containers_to_unload):
             
     return best_col
 
-def calculate_move_cost(start_pos, end_pos, is_first_move=False):
-    """Calculate movement cost including first move penalty."""
-    base_cost = manhattan_distance(start_pos, end_pos) * 60
+def calculate_move_cost(start_pos, end_pos, is_first_move=False, index=None):
+    """Calculate movement cost including first move penalty; with a ColumnIndex, the crane lifts over the stacks
+    in between rather than travelling the Manhattan distance (which stays a lower bound)."""
+    if index is not None:
+        base_cost = TRAVEL_COSTS.slot_cost(index.heights, index.rows, start_pos, end_pos) * 60
+    else:
+        base_cost = manhattan_distance(start_pos, end_pos) * 60
     return base_cost + (60 if is_first_move else 0)
 
-def move_container(ship_grid, from_pos, to_pos, messages, is_first_move=False):
-    """Move container and update grid."""
+def move_container(ship_grid, from_pos, to_pos, messages, is_first_move=False, index=None, names=None):
+    """Move container, update grid (and its ColumnIndex and NameIndex, if given) and return the Move record."""
     from_row, from_col = from_pos
     to_row, to_col = to_pos
 
-    move_cost = calculate_move_cost(from_pos, to_pos, is_first_move)
+    move_cost = calculate_move_cost(from_pos, to_pos, is_first_move, index)
     container = ship_grid[from_row][from_col].container
     
     ship_grid[to_row][to_col] = Slot(container=container, hasContainer=True, available=False)
     ship_grid[from_row][from_col] = Slot(container=None, hasContainer=False, available=True)
 
+    if index is not None:
+        if from_col == to_col:
+            index.rescan(from_col)
+        else:
+            index.cleared(from_row, from_col)
+            index.placed(to_row, to_col)
+    if names is not None:
+        names.move(container.name, from_pos, to_pos)
+
+    move = Move(from_row, from_col, to_row, to_col, container.name, move_cost)
     messages.append(
         f"Moved container '{container.name}' from [{from_row + 1}, {from_col + 1}] "
         f"to [{to_row + 1}, {to_col + 1}]. Move cost: {move_cost} seconds"
     )
 
-    return move_cost
+    return move
 
-def calculate_grid_capacity(ship_grid):
+def calculate_grid_capacity(ship_grid, index=None):
     """Calculate current capacity percentage."""
-    total_slots = len(ship_grid) * len(ship_grid[0])
-    occupied_slots = sum(1 for row in ship_grid for slot in row if slot.hasContainer)
-    return (occupied_slots / total_slots) * 100
+    index = index or ColumnIndex(ship_grid)
+    return index.capacity()
 
 
-def find_nearest_available_column(ship_grid, current_col):
+def find_nearest_available_column(ship_grid, current_col, index=None, names=None):
     """Find nearest available column, falling back to least occupied if needed."""
-    cols = len(ship_grid[0])
-    rows = len(ship_grid)
+    index = index or ColumnIndex(ship_grid)
+    rows = index.rows
     
     # First try to find columns with direct available space
     column_scores = []
     
-    for col in range(cols):
+    for col in range(index.cols):
         if col == current_col:
             continue
             
         distance = abs(col - current_col)
-        occupied_count = sum(1 for row in range(rows) if ship_grid[row][col].hasContainer)
-        has_space = any(ship_grid[row][col].available for row in range(rows))
         
-        if has_space:
+        if index.free[col] > 0:
             # Score based on distance and occupancy (lower is better)
-            score = (distance * 10) + occupied_count
+            score = (distance * 10) + index.occupied[col]
             column_scores.append((score, col))
     
     if column_scores:
         return min(column_scores, key=lambda x: x[0])[1]
         
     # If no columns with direct space, fall back to least occupied
-    fallback_col = find_least_occupied_column(ship_grid, current_col, set())
+    fallback_col = find_least_occupied_column(ship_grid, current_col, set(), index)
     if fallback_col != -1:
         # Make space in this column by shifting containers up
         for row in range(rows-1, 0, -1):
@@ -123,47 +200,95 @@ def find_nearest_available_column(ship_grid, current_col):
                     container = ship_grid[row][fallback_col].container
                     ship_grid[row-1][fallback_col] = Slot(container=container, hasContainer=True, available=False)
                     ship_grid[row][fallback_col] = Slot(container=None, hasContainer=False, available=True)
+                    if names is not None:
+                        names.move(container.name, (row, fallback_col), (row - 1, fallback_col))
+        index.rescan(fallback_col)
         
         return fallback_col
       
     return -1
 
-def move_blocking_container_low_capacity(ship_grid, block_row, block_col, container_names, messages, first_move):
-    """Handle blocking container movement for low capacity."""
-    target_col = find_nearest_available_column(ship_grid, block_col)
-    
-    if target_col == -1:
-        return -1, None
-    
-    target_row = find_lowest_available_position(ship_grid, target_col)
-    
-    if target_row == -1:
-        return -1, None
-        
-    cost = move_container(ship_grid, (block_row, block_col), (target_row, target_col), messages, first_move)
-    return cost, (target_row, target_col)
-
-def load_containers(ship_grid, container_names, container_weights):
-    """Load containers with step-by-step tracking."""
+def find_relocation_slot(index, current_col, origin):
+    """Slot find_nearest_available_column would pick for a container lifted from current_col, never the crane
+    origin (the next unload would land on it); None if there is none. Does not change the grid."""
+    column_scores = []
+    for col in range(index.cols):
+        row = index.lowest_available(col)
+        if col == current_col or row == -1 or (row, col) == tuple(origin):
+            continue
+        column_scores.append(((abs(col - current_col) * 10) + index.occupied[col], col, row))
+    if not column_scores:
+        return None
+    _, col, row = min(column_scores)
+    return row, col
+
+def move_aside(ship_grid, pos, origin, buffer, messages, first_move, index, names):
+    """
+    Clear a container out of the way, to another column or to the buffer, whichever costs less.
+
+    A relocated container stays where it is put; a buffered one is carried back
+    onto the ship later, so the buffer is charged for both trips. Returns the
+    Move, with a to_row of -1 and the buffer slot number as to_col when the
+    container was buffered, or None if there is nowhere to put it.
+    """
+    container = ship_grid[pos[0]][pos[1]].container
+    relocation = find_relocation_slot(index, pos[1], origin)
+    relocation_cost = (calculate_move_cost(pos, relocation, first_move, index) if relocation is not None
+                       else float('inf'))
+    buffer_cost = buffer.round_trip_cost(pos, origin, first_move, index)
+
+    if relocation is None and buffer_cost == float('inf'):
+        messages.append(f"Error: No room on board or in the buffer for container '{container.name}'")
+        return None
+
+    if relocation_cost <= buffer_cost:
+        return move_container(ship_grid, pos, relocation, messages, first_move, index, names)
+
+    slot = buffer.put(container, pos[1])
+    cost = buffer.cost_in(pos, origin, slot, first_move, index)
+    ship_grid[pos[0]][pos[1]] = Slot(container=None, hasContainer=False, available=True)
+    index.cleared(*pos)
+    names.remove(container.name, pos)
+    messages.append(
+        f"Moved container '{container.name}' from [{pos[0] + 1}, {pos[1] + 1}] to buffer "
+        f"[{slot[0] + 1}, {slot[1] + 1}]. Move cost: {cost} seconds"
+    )
+    return Move(pos[0], pos[1], -1, buffer.slot_number(slot), container.name, cost)
+
+def changed_cells(ship_grid, move):
+    """Cells a move may change, including the target column (the fallback in find_nearest_available_column shifts it)."""
+    cells = [move.from_loc]
+    if move.to_row >= 0:
+        cells.extend([row, move.to_col] for row in range(len(ship_grid)))
+    return cells
+
+def current_name_index(ship_grid, names, index, container_names=()):
+    """Return names if it still matches the grid, rebuilding it (in place, if given) when stale or missing."""
+    if names is None:
+        return NameIndex.from_grid(ship_grid)
+    if len(names) != sum(index.occupied) or not names.matches(ship_grid, container_names):
+        names.rebuild(ship_grid)
+    return names
+
+def load_containers(ship_grid, container_names, container_weights, geometry=None, names=None):
+    """Load containers with step-by-step tracking in a PlanHistory; names, if given, is updated to the returned grid."""
+    geometry = geometry or ShipGeometry.from_grid(ship_grid)
     messages = []
     total_cost = 0
-    steps = []
     current_grid = deepcopy(ship_grid)
+    index = ColumnIndex(current_grid)
+    names = current_name_index(current_grid, names, index)
 
     # Initial state
-    steps.append({
-        'name': 'Initial State',
-        'grid': deepcopy(current_grid),
-        'messages': [],
-        'cost': 0
-    })
-
-    origin = (len(ship_grid) - 1, 0)
+    steps = PlanHistory(current_grid)
+    steps.record(current_grid, [], name='Initial State', messages=[], cost=0)
+
+    origin = geometry.crane_origin
     first_move = True
 
     for container_name in container_names:
         step_messages = []
-        target_pos = find_next_available_position(current_grid)
+        target_pos = find_next_available_position(current_grid, index)
         
         if target_pos == (-1, -1):
             step_messages.append(f"Error: No available positions for container '{container_name}'")
@@ -172,13 +297,16 @@ def load_containers(ship_grid, container_names, container_weights):
 
         # Calculate move cost and load container
         row, col = target_pos
-        move_cost = calculate_move_cost(origin, target_pos, first_move)
+        move_cost = calculate_move_cost(origin, target_pos, first_move, index)
         weight = container_weights.get(container_name, 0.0)
         current_grid[row][col] = Slot(
             container=Container(name=container_name, weight=weight),
             hasContainer=True,
             available=False
         )
+        index.placed(row, col)
+        names.add(container_name, target_pos)
+        move = Move(origin[0], origin[1], row, col, container_name, move_cost)
 
         step_messages.append(
             f"Container '{container_name}' loaded at position [{row + 1}, {col + 1}] "
@@ -186,12 +314,9 @@ def load_containers(ship_grid, container_names, container_weights):
         )
 
         # Add step for this container load
-        steps.append({
-            'name': f'Load Container {container_name}',
-            'grid': deepcopy(current_grid),
-            'messages': step_messages.copy(),
-            'cost': move_cost
-        })
+        steps.record(current_grid, [target_pos], [move],
+                     name=f'Load Container {container_name}',
+                     messages=step_messages.copy(), cost=move_cost)
 
         total_cost += move_cost
         messages.extend(step_messages)
@@ -200,157 +325,99 @@ def load_containers(ship_grid, container_names, container_weights):
     messages.append(f"Total loading cost: {total_cost} seconds")
     return current_grid, messages, total_cost, steps
 
-def handle_origin_container(ship_grid, origin, container_names, current_capacity, messages, first_move):
-    """Handle container at origin position based on grid capacity."""
-    total_cost = 0
-    buffer = []
-    temp_position = None
-    
-    if not ship_grid[origin[0]][origin[1]].hasContainer:
-        return total_cost, buffer, first_move, True, None
-        
-    origin_container = ship_grid[origin[0]][origin[1]].container
-    if origin_container.name in container_names:
-        return total_cost, buffer, first_move, True, None
-
-    # Handle based on capacity
-    if current_capacity > 50.0:
-        # Use buffer for high capacity
-        buffer.append((origin_container, origin[1], None))
-        cost = calculate_move_cost(origin, (-1, len(buffer) - 1), first_move)
-        messages.append(
-            f"Moved container '{origin_container.name}' from origin to buffer. Move cost: {cost} seconds."
-        )
-        ship_grid[origin[0]][origin[1]] = Slot(container=None, hasContainer=False, available=True)
-    else:
-        # Use nearest available column for low capacity - leave container there
-        target_col = find_nearest_available_column(ship_grid, origin[1])
-        if target_col != -1:
-            target_row = find_lowest_available_position(ship_grid, target_col)
-            if target_row != -1:
-                temp_position = (target_row, target_col)
-                # Move container to new position permanently
-                ship_grid[target_row][target_col] = Slot(container=origin_container, hasContainer=True, available=False)
-                ship_grid[origin[0]][origin[1]] = Slot(container=None, hasContainer=False, available=True)
-                cost = calculate_move_cost(origin, temp_position, first_move)
-                messages.append(
-                    f"Moved container '{origin_container.name}' from [{origin[0] + 1}, {origin[1] + 1}] to [{target_row + 1}, {target_col + 1}]. Move cost: {cost} seconds."
-                )
-                # Don't add to buffer since we're not restoring it
-            else:
-                messages.append(f"Error: No available position for origin container '{origin_container.name}'")
-                return total_cost, buffer, first_move, False, None
-        else:
-            messages.append(f"Error: No available column for origin container '{origin_container.name}'")
-            return total_cost, buffer, first_move, False, None
-            
-    total_cost += cost
-    first_move = False
-    
-    return total_cost, buffer, first_move, True, temp_position
-
-def unload_containers(ship_grid, container_names, buffer_capacity=5):
-    """Unload containers efficiently with step tracking."""
+def handle_origin_container(ship_grid, origin, targets, buffer, messages, first_move, index=None, names=None):
+    """Clear the origin slot unless its container is being unloaded; returns (cost, first_move, success, move)."""
+    index = index or ColumnIndex(ship_grid)
+    names = names if names is not None else NameIndex.from_grid(ship_grid)
+
+    if not ship_grid[origin[0]][origin[1]].hasContainer or tuple(origin) in targets:
+        return 0, first_move, True, None
+
+    move = move_aside(ship_grid, origin, origin, buffer, messages, first_move, index, names)
+    if move is None:
+        return 0, first_move, False, None
+    return move.cost, False, True, move
+
+def unload_containers(ship_grid, container_names, buffer_capacity=None, geometry=None, names=None, buffer=None):
+    """
+    Unload containers with step tracking in a PlanHistory; a name listed twice unloads two containers.
+    Blockers go to another column or to the buffer (a BufferZone, by default an empty one holding
+    buffer_capacity containers), whichever costs less, and buffered ones are restored at the end.
+    names, if given, is updated to the returned grid.
+    """
+    geometry = geometry or ShipGeometry.from_grid(ship_grid)
+    if buffer_capacity is None:
+        buffer_capacity = geometry.buffer_capacity
+    if buffer is None:
+        buffer = BufferZone(capacity=buffer_capacity)
     messages = []
     total_cost = 0
-    steps = []  # Track steps
     current_grid = deepcopy(ship_grid)
 
     # Initial state
-    steps.append({
-        'name': 'Initial State',
-        'grid': deepcopy(current_grid),
-        'messages': [],
-        'cost': 0
-    })
-
-    origin = (len(current_grid) - 1, 0)
-    container_names = set(container_names)
+    steps = PlanHistory(current_grid)
+    steps.record(current_grid, [], name='Initial State', messages=[], cost=0)
+
+    origin = geometry.crane_origin
     first_move = True
-    buffer = []
-    unloaded_containers = set()
 
-    current_capacity = calculate_grid_capacity(current_grid)
+    index = ColumnIndex(current_grid)
+    names = current_name_index(current_grid, names, index, set(container_names))
+
+    # Choose which containers to unload, including which of several with the same name
+    containers_to_unload = select_unload_targets(current_grid, container_names, origin, index, names,
+                                                 buffer=buffer)
+    targets = {pos for _, pos in containers_to_unload}
 
     # Handle origin container
-    origin_cost, origin_buffer, first_move, success, temp_position = handle_origin_container(
-        current_grid, origin, container_names, current_capacity, messages, first_move
+    origin_cost, first_move, success, origin_move = handle_origin_container(
+        current_grid, origin, targets, buffer, messages, first_move, index, names
     )
     if not success:
         return current_grid, messages, total_cost, steps
         
     if origin_cost > 0:
-        steps.append({
-            'name': 'Handle Origin Container',
-            'grid': deepcopy(current_grid),
-            'messages': messages.copy(),
-            'cost': origin_cost
-        })
+        steps.record(current_grid, changed_cells(current_grid, origin_move), [origin_move],
+                     name='Handle Origin Container',
+                     messages=messages.copy(), cost=origin_cost)
     
     total_cost += origin_cost
-    buffer.extend(origin_buffer)
-
-    # Find container positions and get optimal positions
-    container_positions = find_container_positions(current_grid, container_names)
-    optimal_positions = get_optimal_container_positions(current_grid, container_positions, origin)
-    containers_to_unload = [(name, pos) for name, pos in optimal_positions.items()]
-    containers_to_unload.sort(key=lambda x: (-x[1][0], x[1][1]))
 
     for container_name, current_pos in containers_to_unload:
         step_messages = []
         step_cost = 0
-        
-        if container_name in unloaded_containers:
-            continue
 
-        # Handle blocking containers
-        blocking = find_blocking_containers(current_grid, current_pos[0], current_pos[1])
+        # Handle blocking containers; targets are unloaded top row first, so none is ever a blocker
+        blocking = find_blocking_containers(current_grid, current_pos[0], current_pos[1], index)
         for block_row, block_col in blocking:
             blocking_container = current_grid[block_row][block_col].container
-            if blocking_container.name in container_names:
-                continue
+            move = move_aside(current_grid, (block_row, block_col), origin, buffer, step_messages, first_move,
+                              index, names)
+            if move is None:
+                messages.extend(step_messages)
+                return current_grid, messages, total_cost, steps
+            cost = move.cost
 
-            if current_capacity > 50.0 and len(buffer) < buffer_capacity:
-                buffer.append((blocking_container, block_col, None))
-                cost = calculate_move_cost((block_row, block_col), (-1, len(buffer) - 1), first_move)
-                step_messages.append(
-                    f"Moved blocking container '{blocking_container.name}' to buffer. Cost: {cost} seconds"
-                )
-                current_grid[block_row][block_col] = Slot(container=None, hasContainer=False, available=True)
-            else:
-                cost, new_pos = move_blocking_container_low_capacity(
-                    current_grid, block_row, block_col, container_names, step_messages, first_move
-                )
-                if cost == -1:
-                    messages.extend(step_messages)
-                    return current_grid, messages, total_cost, steps
-            
             step_cost += cost
             first_move = False
 
-            steps.append({
-                'name': f'Move Blocking Container {blocking_container.name}',
-                'grid': deepcopy(current_grid),
-                'messages': step_messages.copy(),
-                'cost': cost
-            })
+            steps.record(current_grid, changed_cells(current_grid, move), [move],
+                         name=f'Move Blocking Container {blocking_container.name}',
+                         messages=step_messages.copy(), cost=cost)
 
         # Unload target container
-        container = current_grid[current_pos[0]][current_pos[1]].container
-        cost = move_container(current_grid, current_pos, origin, step_messages, first_move)
-        step_cost += cost
+        move = move_container(current_grid, current_pos, origin, step_messages, first_move, index)
+        step_cost += move.cost
         first_move = False
         
-        unloaded_containers.add(container_name)
         current_grid[origin[0]][origin[1]] = Slot(container=None, hasContainer=False, available=True)
+        index.cleared(*origin)
+        names.remove(container_name, current_pos)
         step_messages.append(f"Container '{container_name}' unloaded successfully")
 
-        steps.append({
-            'name': f'Unload Container {container_name}',
-            'grid': deepcopy(current_grid),
-            'messages': step_messages.copy(),
-            'cost': step_cost
-        })
+        steps.record(current_grid, [current_pos, origin], [move],
+                     name=f'Unload Container {container_name}',
+                     messages=step_messages.copy(), cost=step_cost)
         
         total_cost += step_cost
         messages.extend(step_messages)
@@ -358,15 +425,14 @@ def unload_containers(ship_grid, container_names, buffer_capacity=5):
     # Restore buffer containers
     if buffer:
         step_messages = []
+        step_moves = []
         step_cost = 0
         while buffer:
-            container, original_col, _ = buffer.pop(0)
-            if container.name in container_names:
-                continue
+            slot, container, original_col = buffer.take()
 
-            target_row = find_lowest_available_position(current_grid, original_col)
+            target_row = find_lowest_available_position(current_grid, original_col, index)
             if target_row == -1:
-                target_pos = find_next_available_position(current_grid)
+                target_pos = find_next_available_position(current_grid, index)
                 if target_pos == (-1, -1):
                     step_messages.append(f"Error: No position to restore container '{container.name}' from buffer.")
                     continue
@@ -374,21 +440,452 @@ def unload_containers(ship_grid, container_names, buffer_capacity=5):
             else:
                 row, col = target_row, original_col
 
+            cost = buffer.cost_out(slot, origin, (row, col), index)
             current_grid[row][col] = Slot(container=container, hasContainer=True, available=False)
-            step_messages.append(f"Restored container '{container.name}' from buffer to [{row + 1}, {col + 1}].")
-
-        steps.append({
-            'name': 'Restore Buffer Containers',
-            'grid': deepcopy(current_grid),
-            'messages': step_messages.copy(),
-            'cost': step_cost
-        })
+            index.placed(row, col)
+            names.add(container.name, (row, col))
+            step_moves.append(Move(-1, buffer.slot_number(slot), row, col, container.name, cost))
+            step_messages.append(
+                f"Restored container '{container.name}' from buffer to [{row + 1}, {col + 1}]. "
+                f"Move cost: {cost} seconds"
+            )
+            step_cost += cost
+
+        steps.record(current_grid, [move.to_loc for move in step_moves], step_moves,
+                     name='Restore Buffer Containers',
+                     messages=step_messages.copy(), cost=step_cost)
+        total_cost += step_cost
         messages.extend(step_messages)
 
     messages.append(f"Total unloading cost: {total_cost} seconds")
     return current_grid, messages, total_cost, steps
 
 
+def port_call_columns(ship_grid):
+    """Split the grid into usable rows above any NAN and the containers stacked in them, per column."""
+    rows = len(ship_grid)
+    slots, stacks = [], []
+    for col in range(len(ship_grid[0])):
+        floor = max((row + 1 for row in range(rows)
+                     if not ship_grid[row][col].available and not ship_grid[row][col].hasContainer), default=0)
+        slots.append(list(range(floor, rows)))
+        stacks.append([ship_grid[row][col].container for row in range(floor, rows)
+                       if ship_grid[row][col].hasContainer])
+    return slots, stacks
+
+
+def port_call_heights(slots, stacks, rows):
+    """Occupied height of every column (NAN slots included) for containers stacked as in port_call_columns."""
+    return [(col_slots[0] if col_slots else rows) + len(stack) for col_slots, stack in zip(slots, stacks)]
+
+
+def port_call_bound(stacks, slots, targets, origin, rows):
+    """Lower bound on seconds left: targets travel to the origin, their blockers move at least one cell.
+
+    Targets never move until they are unloaded, and only target columns (and the
+    container in the origin slot) ever lose containers, so each target is
+    charged its crane travel over the lowest the columns in between can become.
+    """
+    firsts = [next((height for height, item in enumerate(stack) if item in targets), None) for stack in stacks]
+    lowest = []
+    for col, (stack, first) in enumerate(zip(stacks, firsts)):
+        height = len(stack) if first is None else first
+        if first is None and stack and (slots[col][height - 1], col) == origin:
+            height -= 1
+        lowest.append((slots[col][0] if slots[col] else rows) + height)
+
+    bound = 0
+    for col, (stack, first) in enumerate(zip(stacks, firsts)):
+        if first is None:
+            continue
+        for height in range(first, len(stack)):
+            if stack[height] in targets:
+                bound += TRAVEL_COSTS.slot_cost(lowest, rows, (slots[col][height], col), origin) * 60
+            else:
+                bound += 60
+    return bound
+
+
+def search_port_call(slots, stacks, targets, load_ids, origin, rows,
+                     time_limit=DEFAULT_PORT_CALL_TIME_LIMIT, max_nodes=DEFAULT_PORT_CALL_MAX_NODES,
+                     incumbent=None):
+    """
+    Finds a cheap interleaving of unloads, blocker relocations and loads.
+
+    Depth-first branch-and-bound seeded with the cheaper of a known plan and a
+    greedy plan that digs out the least buried target first, so the bound
+    prunes from the start and the result is never dearer than the known plan;
+    the rest of the budget is spent looking for cheaper ones. The deadline is
+    checked before every state is expanded and between the children scored, so
+    the search returns soon after it. The search keeps its own stack, so plans
+    of any length fit. Exposed targets are always unloaded at once, and
+    once every target is gone each load takes the cheapest free slot.
+
+    Args:
+        slots (list[list[int]]): Usable rows of each column, bottom-up.
+        stacks (list[list[int]]): Container ids in each column, bottom-up.
+        targets (set[int]): Ids of the containers to unload.
+        load_ids (list[int]): Ids of the containers to load, in loading order.
+        origin (tuple): (row, col) where the crane hands containers over.
+        rows (int): Number of rows in the grid.
+        time_limit (float): Wall-clock budget in seconds.
+        max_nodes (int): Maximum number of states remembered.
+        incumbent (list, optional): Actions of a known plan, as returned; ignored
+            if they do not unload exactly the targets and load every container.
+
+    Returns:
+        tuple: (actions, cost) with actions as ("unload", col), ("move", from_col,
+            to_col) or ("load", to_col), or None if no plan was found in time.
+    """
+    cols = len(slots)
+    deadline = time.perf_counter() + time_limit
+    best = [None, float("inf")]
+    seen = {}
+
+    def cell(col, height):
+        return slots[col][height], col
+
+    def travel(state, from_cell, to_cell):
+        # Crane seconds over the stacks as they stand, as unload_containers and load_containers charge them
+        return TRAVEL_COSTS.slot_cost(port_call_heights(slots, state, rows), rows, from_cell, to_cell) * 60
+
+    def room(state, col):
+        height = len(state[col])
+        return height < len(slots[col]) and cell(col, height) != origin
+
+    def children(state, next_load):
+        pending = any(item in targets for stack in state for item in stack)
+
+        # The origin slot must be clear before the crane can hand anything over
+        movable = [col for col, stack in enumerate(state)
+                   if stack and stack[-1] not in targets and cell(col, len(stack) - 1) == origin]
+        origin_blocked = bool(movable)
+
+        if not origin_blocked:
+            for col, stack in enumerate(state):
+                if stack and stack[-1] in targets:
+                    yield ("unload", col), travel(state, cell(col, len(stack) - 1), origin)
+                    return
+            movable = [col for col, stack in enumerate(state)
+                       if any(item in targets for item in stack)]
+        for from_col in movable:
+            from_cell = cell(from_col, len(state[from_col]) - 1)
+            for to_col in range(cols):
+                if to_col != from_col and room(state, to_col):
+                    yield ("move", from_col, to_col), \
+                        travel(state, from_cell, cell(to_col, len(state[to_col])))
+
+        if next_load < len(load_ids) and not origin_blocked:
+            loads = [(travel(state, origin, cell(col, len(state[col]))), col)
+                     for col in range(cols) if room(state, col)]
+            if not pending and loads:
+                loads = [min(loads)]
+            for cost, col in loads:
+                yield ("load", col), cost
+
+    def apply(state, action, next_load):
+        stacks_now = list(state)
+        if action[0] == "unload":
+            stacks_now[action[1]] = state[action[1]][:-1]
+        elif action[0] == "move":
+            _, from_col, to_col = action
+            stacks_now[to_col] = state[to_col] + (state[from_col][-1],)
+            stacks_now[from_col] = state[from_col][:-1]
+        else:
+            stacks_now[action[1]] = state[action[1]] + (load_ids[next_load],)
+            next_load += 1
+        return tuple(stacks_now), next_load
+
+    def done(state, next_load):
+        return next_load == len(load_ids) and not any(item in targets for stack in state for item in stack)
+
+    def expand(state, next_load, g):
+        options = []
+        for action, cost in children(state, next_load):
+            if time.perf_counter() > deadline:
+                break
+            child, child_load = apply(state, action, next_load)
+            child_g = g + cost
+            bound = child_g + port_call_bound(child, slots, targets, origin, rows)
+            if bound >= best[1]:
+                continue
+            key = (child, child_load)
+            if child_g >= seen.get(key, float("inf")):
+                continue
+            if key in seen or len(seen) < max_nodes:
+                seen[key] = child_g
+            options.append((bound, child_g, action, child, child_load))
+        options.sort(key=lambda option: option[:2])
+        return iter(options)
+
+    def blockers(state, col):
+        stack = state[col]
+        top_target = max((height for height, item in enumerate(stack) if item in targets), default=None)
+        return float("inf") if top_target is None else len(stack) - 1 - top_target
+
+    def greedy(state, next_load):
+        # Dig out the target with the fewest blockers, parking each blocker on the
+        # cheapest column holding no targets; a first plan for the bound to prune with
+        actions, g = [], 0
+        for _ in range(4 * (sum(map(len, state)) + len(load_ids)) + 1):
+            if done(state, next_load):
+                return actions, g
+            if time.perf_counter() > deadline:
+                return None
+            options = list(children(state, next_load))
+            if not options:
+                return None
+            if options[0][0][0] == "move":
+                dig = min({action[1] for action, _ in options if action[0] == "move"},
+                          key=lambda col: blockers(state, col))
+                options = [option for option in options if option[0][:2] == ("move", dig)]
+                options.sort(key=lambda option: (any(item in targets for item in state[option[0][2]]),
+                                                 option[1]))
+            action, cost = options[0]
+            state, next_load = apply(state, action, next_load)
+            actions.append(action)
+            g += cost
+        return None
+
+    def replay(actions):
+        # Cost of a known plan, or None if one of its actions is not allowed here
+        state, next_load, g = start, 0, 0
+        for action in actions:
+            origin_blocked = any(stack and stack[-1] not in targets and cell(col, len(stack) - 1) == origin
+                                 for col, stack in enumerate(state))
+            if origin_blocked and action[0] != "move":
+                return None
+            if action[0] == "load":
+                if next_load == len(load_ids) or not room(state, action[1]):
+                    return None
+                cost = travel(state, origin, cell(action[1], len(state[action[1]])))
+            else:
+                stack = state[action[1]]
+                if not stack:
+                    return None
+                from_cell = cell(action[1], len(stack) - 1)
+                if action[0] == "unload":
+                    if stack[-1] not in targets:
+                        return None
+                    cost = travel(state, from_cell, origin)
+                else:
+                    if action[2] == action[1] or not room(state, action[2]):
+                        return None
+                    cost = travel(state, from_cell, cell(action[2], len(state[action[2]])))
+            state, next_load = apply(state, action, next_load)
+            g += cost
+        return (list(actions), g) if done(state, next_load) else None
+
+    start = tuple(tuple(stack) for stack in stacks)
+    if done(start, 0):
+        return [], 0
+    for plan in (replay(incumbent) if incumbent is not None else None, greedy(start, 0)):
+        if plan is not None and plan[1] < best[1]:
+            best[0], best[1] = plan
+
+    # Depth-first with an explicit stack of child iterators, so deep plans on
+    # densely packed bays cannot exhaust the Python stack; path[i] is the action
+    # taken from the state whose children frames[i] iterates over, and states on
+    # the current path are never re-entered
+    frames, path, on_path = [expand(start, 0, 0)], [], [(start, 0)]
+    while frames:
+        if time.perf_counter() > deadline:
+            break
+
+        option = next(frames[-1], None)
+        if option is None or option[0] >= best[1]:
+            frames.pop()
+            on_path.pop()
+            if path:
+                path.pop()
+            continue
+
+        _, child_g, action, child, child_load = option
+        if done(child, child_load):
+            best[0], best[1] = path + [action], child_g
+            continue
+        if (child, child_load) in on_path:
+            continue
+        path.append(action)
+        on_path.append((child, child_load))
+        frames.append(expand(child, child_load, child_g))
+
+    if best[0] is None:
+        return None
+    return best[0], best[1]
+
+
+def sequential_port_call(ship_grid, load_names, load_weights, unload_names, geometry=None):
+    """
+    Plans a port call the plain way: unload_containers, then load_containers on the grid it leaves.
+
+    Returns:
+        tuple: ((current_grid, messages, total_cost, steps) like plan_port_call,
+            actions), where actions are its moves as search_port_call writes
+            them, or None if a container went through the buffer.
+    """
+    geometry = geometry or ShipGeometry.from_grid(ship_grid)
+    origin = tuple(geometry.crane_origin)
+    unloaded, messages, unload_cost, steps = unload_containers(ship_grid, unload_names, geometry=geometry)
+    current_grid, load_messages, load_cost, load_steps = load_containers(unloaded, load_names, load_weights,
+                                                                         geometry=geometry)
+
+    actions = []
+    for move in (move for moves in steps.steps for move in moves):
+        if move.from_row < 0 or move.to_row < 0:
+            actions = None
+            break
+        if (move.to_row, move.to_col) == origin:
+            actions.append(("unload", move.from_col))
+        else:
+            actions.append(("move", move.from_col, move.to_col))
+    if actions is not None:
+        actions.extend(("load", move.to_col) for moves in load_steps.steps for move in moves)
+
+    # Both histories open with an empty 'Initial State' step; keep the first only
+    steps.extend(load_steps, start=1)
+    messages.extend(load_messages)
+    total_cost = unload_cost + load_cost
+    messages.append(f"Total port call cost: {total_cost} seconds")
+    return (current_grid, messages, total_cost, steps), actions
+
+
+def plan_port_call(ship_grid, load_names, load_weights, unload_names, geometry=None,
+                   time_limit=DEFAULT_PORT_CALL_TIME_LIMIT, names=None):
+    """
+    Plans the loads and unloads of one port call together.
+
+    Rather than unloading first and then dropping each new container at the
+    leftmost free slot, the search interleaves unloads, blocker relocations and
+    loads to minimise the total crane time. Burying a container that is still
+    to be unloaded is charged for, so blockers and new containers end up where
+    they will not have to move again. The search starts from the plain
+    sequential_port_call plan, and that plan is returned instead whenever it is
+    still the cheaper one, so the joint plan never costs more. It is also
+    returned when the search finds no plan, as on a full bay where blockers can
+    only go to the buffer.
+
+    Args:
+        ship_grid (list[list[Slot]]): The ship grid (not modified).
+        load_names (list[str]): Containers to load, in order.
+        load_weights (dict): Weight of each container to load, by name.
+        unload_names (list[str]): Containers to unload; a name listed twice
+            unloads two containers with that name.
+        geometry (ShipGeometry, optional): Bay geometry; defaults to the grid's.
+        time_limit (float): Planning budget in seconds, the sequential plan included.
+        names (NameIndex, optional): Index of ship_grid; updated to the returned grid.
+
+    Returns:
+        tuple: (current_grid, messages, total_cost, steps) like load_containers.
+    """
+    deadline = time.perf_counter() + time_limit
+    geometry = geometry or ShipGeometry.from_grid(ship_grid)
+    origin = geometry.crane_origin
+
+    sequential, sequential_actions = sequential_port_call(ship_grid, load_names, load_weights, unload_names,
+                                                          geometry)
+    if any(message.startswith("Error") for message in sequential[1]):
+        sequential, sequential_actions = None, None
+    messages = []
+    current_grid = deepcopy(ship_grid)
+
+    steps = PlanHistory(current_grid)
+    steps.record(current_grid, [], name='Initial State', messages=[], cost=0)
+
+    # Resolve the requested names to containers, choosing the cheapest set of duplicates
+    wanted = Counter(unload_names)
+    index = ColumnIndex(current_grid)
+    names = current_name_index(current_grid, names, index, wanted)
+    selected = select_unload_targets(current_grid, unload_names, origin, index, names)
+    found = Counter(name for name, _ in selected)
+    for name, count in wanted.items():
+        if found[name] < count:
+            messages.append(f"Error: Only {found[name]} container(s) named '{name}' on board, {count} requested")
+    chosen = {pos for _, pos in selected}
+
+    slots, stacks = port_call_columns(current_grid)
+    containers = []
+    id_stacks, targets = [], set()
+    for col, stack in enumerate(stacks):
+        ids = []
+        for height, container in enumerate(stack):
+            if (slots[col][height], col) in chosen:
+                targets.add(len(containers))
+            ids.append(len(containers))
+            containers.append(container)
+        id_stacks.append(ids)
+
+    load_ids = []
+    for name in load_names:
+        load_ids.append(len(containers))
+        containers.append(Container(name=name, weight=load_weights.get(name, 0.0)))
+
+    plan = search_port_call(slots, id_stacks, targets, load_ids, origin, len(current_grid),
+                            max(deadline - time.perf_counter(), 0), incumbent=sequential_actions)
+    if plan is None and sequential is not None:
+        # The search has no buffer, so a full bay can only be worked through the plain plan
+        names.rebuild(sequential[0])
+        return sequential
+    if plan is None:
+        messages.append("Error: No room on board to complete the port call")
+        return current_grid, messages, 0, steps
+
+    actions, _ = plan
+    heights = [len(stack) for stack in id_stacks]
+    loads = iter(load_ids)
+    total_cost = 0
+    first_move = True
+
+    for action in actions:
+        step_messages = []
+        if action[0] == "unload":
+            col = action[1]
+            from_pos = (slots[col][heights[col] - 1], col)
+            move = move_container(current_grid, from_pos, origin, step_messages, first_move, index)
+            current_grid[origin[0]][origin[1]] = Slot(container=None, hasContainer=False, available=True)
+            index.cleared(*origin)
+            names.remove(move.container, from_pos)
+            heights[col] -= 1
+            step_messages.append(f"Container '{move.container}' unloaded successfully")
+            name, cells = f'Unload Container {move.container}', [from_pos, origin]
+        elif action[0] == "move":
+            _, from_col, to_col = action
+            from_pos = (slots[from_col][heights[from_col] - 1], from_col)
+            to_pos = (slots[to_col][heights[to_col]], to_col)
+            move = move_container(current_grid, from_pos, to_pos, step_messages, first_move, index, names)
+            heights[from_col] -= 1
+            heights[to_col] += 1
+            name, cells = f'Move Blocking Container {move.container}', [from_pos, to_pos]
+        else:
+            col = action[1]
+            to_pos = (slots[col][heights[col]], col)
+            container = containers[next(loads)]
+            cost = calculate_move_cost(origin, to_pos, first_move, index)
+            current_grid[to_pos[0]][to_pos[1]] = Slot(container=container, hasContainer=True, available=False)
+            index.placed(*to_pos)
+            names.add(container.name, to_pos)
+            move = Move(origin[0], origin[1], to_pos[0], to_pos[1], container.name, cost)
+            heights[col] += 1
+            step_messages.append(
+                f"Container '{container.name}' loaded at position [{to_pos[0] + 1}, {to_pos[1] + 1}] "
+                f"with weight {container.weight}kg. Move cost: {cost} seconds"
+            )
+            name, cells = f'Load Container {container.name}', [to_pos]
+
+        steps.record(current_grid, cells, [move], name=name, messages=step_messages.copy(), cost=move.cost)
+        messages.extend(step_messages)
+        total_cost += move.cost
+        first_move = False
+
+    if sequential is not None and sequential[2] < total_cost:
+        # Through the buffer, or with other duplicates picked, the plain plan can still be cheaper
+        names.rebuild(sequential[0])
+        return sequential
+
+    messages.append(f"Total port call cost: {total_cost} seconds")
+    return current_grid, messages, total_cost, steps
+
+
 def convert_grid_to_manuscript(ship_grid):
     """Convert grid to manuscript format."""
     manuscript_lines = []
@@ -403,8 +900,11 @@ def append_outbound_to_filename(filename):
     name, ext = os.path.splitext(filename)
     return f"{name}_OUTBOUND{ext}"
 
-def find_container_positions(ship_grid, container_names):
-    """Find all positions of containers, including duplicates."""
+def find_container_positions(ship_grid, container_names, names=None):
+    """Find all positions of containers, including duplicates; O(k) with a NameIndex of the grid."""
+    if names is not None:
+        return {name: names.positions(name) for name in container_names if name in names}
+
     container_positions = {}
     
     for row in range(len(ship_grid)-1, -1, -1):
@@ -418,38 +918,116 @@ def find_container_positions(ship_grid, container_names):
                     
     return container_positions
 
-def estimate_unload_cost(ship_grid, container_pos, origin):
-    """Estimate total cost to unload container including moving blocking containers."""
-    row, col = container_pos
-    total_cost = calculate_move_cost(container_pos, origin, True)
-    
-    # Add cost of moving blocking containers
-    blocking = find_blocking_containers(ship_grid, row, col)
-    for block_pos in blocking:
-        # Estimate cost to nearest available column
-        target_col = find_nearest_available_column(ship_grid, block_pos[1])
-        if target_col != -1:
-            target_row = find_lowest_available_position(ship_grid, target_col)
-            if target_row != -1:
-                total_cost += calculate_move_cost(block_pos, (target_row, target_col), False)
-                
-    return total_cost
-
-def get_optimal_container_positions(ship_grid, container_positions, origin):
-    """For containers with duplicates, select position with lowest unload cost."""
-    optimal_positions = {}
-    
-    for name, positions in container_positions.items():
-        if len(positions) > 1:
-            # Find position with lowest total unload cost
-            costs = [(pos, estimate_unload_cost(ship_grid, pos, origin)) for pos in positions]
-            optimal_pos = min(costs, key=lambda x: x[1])[0]
-            optimal_positions[name] = optimal_pos
-        else:
-            optimal_positions[name] = positions[0]
-            
-    return optimal_positions
+def select_unload_targets(ship_grid, container_names, origin, index=None, names=None, buffer=None,
+                          max_nodes=DEFAULT_SELECTION_MAX_NODES):
+    """
+    Chooses which containers to unload when several share a requested name.
+
+    Every combination of same-named containers is costed for the whole request
+    together: a container's travel to the origin, plus moving aside each
+    container above the lowest pick of its column that is not itself picked.
+    Two picks in one column therefore share their blockers, and burying a pick
+    under a blocker is never charged twice. Column costs are memoised, the
+    search keeps only the cheapest few candidates of each name and stops after
+    `max_nodes` combinations with the best found so far; the first one tried is
+    the cheapest container of each name on its own.
+
+    Args:
+        ship_grid (list[list[Slot]]): The ship grid.
+        container_names (list[str]): Requested names; a name listed twice unloads two containers.
+        origin (tuple): Crane origin.
+        index (ColumnIndex, optional): Index of ship_grid.
+        names (NameIndex, optional): Index of ship_grid.
+        buffer (BufferZone, optional): Buffer blockers may be parked in, as move_aside does.
+        max_nodes (int): Search budget in combinations.
+
+    Returns:
+        list[tuple]: (name, (row, col)) of each container to unload, top row first.
+            Names with fewer containers on board than requested get all of them.
+    """
+    index = index or ColumnIndex(ship_grid)
+    wanted = Counter(container_names)
+    positions = find_container_positions(ship_grid, wanted, names)
+
+    # Where move_aside would send a container lifted from each column
+    relocation = {col: find_relocation_slot(index, col, origin) for col in range(index.cols)}
+    # A container with nowhere to go is charged a crossing of the whole bay
+    stuck_cost = (index.rows + index.cols) * 60
+
+    def aside_cost(pos):
+        target = relocation[pos[1]]
+        cost = calculate_move_cost(pos, target, index=index) if target is not None else float('inf')
+        if buffer is not None:
+            cost = min(cost, buffer.round_trip_cost(pos, origin, index=index))
+        return cost if cost != float('inf') else stuck_cost
+
+    column_costs = {}
+
+    def column_cost(col, rows):
+        key = (col, rows)
+        if key not in column_costs:
+            cost = 0
+            for row in range(index.top(col), rows[0] - 1, -1):
+                if row in rows:
+                    cost += calculate_move_cost((row, col), origin, index=index)
+                elif ship_grid[row][col].hasContainer:
+                    cost += aside_cost((row, col))
+            column_costs[key] = cost
+        return column_costs[key]
+
+    def plan_cost(picks):
+        columns = {}
+        for row, col in picks:
+            columns.setdefault(col, []).append(row)
+        return sum(column_cost(col, tuple(sorted(rows))) for col, rows in columns.items())
+
+    fixed, choices = [], []
+    for name, count in wanted.items():
+        found = positions.get(name, [])
+        if len(found) <= count:
+            fixed.extend((name, pos) for pos in found)
+            continue
+        found = sorted(found, key=lambda pos: column_cost(pos[1], (pos[0],)))
+        choices.append((name, count, found[:count + DEFAULT_DUPLICATE_CANDIDATES]))
+
+    fixed_picks = [pos for _, pos in fixed]
+    if not choices:
+        return sorted(fixed, key=lambda pick: (-pick[1][0], pick[1][1]))
+
+    # Fewest combinations first, so the budget goes on the names with the most choice
+    choices.sort(key=lambda choice: len(choice[2]) - choice[1])
+    # Travel to the origin alone is a lower bound on what each remaining name still costs
+    travel = [sum(sorted(calculate_move_cost(pos, origin) for pos in found)[:count])
+              for _, count, found in choices]
+    remaining = [sum(travel[i:]) for i in range(len(choices) + 1)]
+
+    best = {"cost": float('inf'), "picks": None}
+    nodes = 0
+
+    def search(depth, picks, picked_travel):
+        nonlocal nodes
+        if depth == len(choices):
+            cost = plan_cost(fixed_picks + picks)
+            if cost < best["cost"]:
+                best["cost"], best["picks"] = cost, picks
+            return
+        _, count, found = choices[depth]
+        for combo in combinations(found, count):
+            if nodes >= max_nodes and best["picks"] is not None:
+                return
+            nodes += 1
+            combo_travel = sum(calculate_move_cost(pos, origin) for pos in combo)
+            if picked_travel + combo_travel + remaining[depth + 1] >= best["cost"]:
+                continue
+            search(depth + 1, picks + list(combo), picked_travel + combo_travel)
+
+    search(0, [], sum(calculate_move_cost(pos, origin) for pos in fixed_picks))
 
+    selected = list(fixed)
+    picks = iter(best["picks"])
+    for name, count, _ in choices:
+        selected.extend((name, next(picks)) for _ in range(count))
+    return sorted(selected, key=lambda pick: (-pick[1][0], pick[1][1]))
 
 # def unload_containers(ship_grid, container_names, buffer_capacity=5): 
 #     messages = [] 
@@ -0,0 +1,153 @@
+# Dockership/tasks/ship_state.py
+
+"""
+Compact, hashable ship state for search planners.
+
+A ShipState packs the whole grid into two flat arrays: the occupied height of
+each column and one signed integer per cell holding the container weight, or
+EMPTY / NAN. States are immutable; a move returns a new state whose Zobrist hash
+is updated incrementally from its parent, so closed sets and transposition
+tables get O(1) membership tests.
+"""
+
+from array import array  # Flat, typed storage for heights and cells
+
+EMPTY = -1  # Cell is free (UNUSED in the manifest)
+NAN = -2  # Cell is not part of the hull
+
+_MASK64 = (1 << 64) - 1
+
+
+def zobrist_key(cell, weight):
+    """
+    Returns the 64-bit Zobrist key for a container of the given weight in a cell.
+
+    Keys come from a splitmix64 mix of (cell, weight), so they need no table,
+    cover any weight, and are identical across processes.
+    """
+    z = (cell * 0x9E3779B97F4A7C15 + weight + 1) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class ShipState:
+    """
+    Immutable, array-backed snapshot of container weights on the ship.
+
+    Cells are stored row-major from the bottom row, so cell (row, col) lives at
+    index row * cols + col.
+    """
+
+    __slots__ = ("rows", "cols", "heights", "cells", "left", "right", "_hash")
+
+    def __init__(self, rows, cols, heights, cells, left, right, zobrist):
+        self.rows = rows
+        self.cols = cols
+        self.heights = heights
+        self.cells = cells
+        self.left = left
+        self.right = right
+        self._hash = zobrist
+
+    @classmethod
+    def from_grid(cls, ship_grid):
+        """
+        Builds a state from a grid of Slot objects.
+
+        Args:
+            ship_grid (list[list[Slot]]): The ship grid.
+
+        Returns:
+            ShipState: The packed state.
+        """
+        rows, cols = len(ship_grid), len(ship_grid[0])
+        mid = cols // 2
+        heights = array("B", bytes(cols))
+        cells = array("i", [EMPTY]) * (rows * cols)
+        left = right = zobrist = 0
+
+        for r, row in enumerate(ship_grid):
+            for c, slot in enumerate(row):
+                cell = r * cols + c
+                if slot.hasContainer:
+                    weight = slot.container.weight
+                    cells[cell] = weight
+                    zobrist ^= zobrist_key(cell, weight)
+                    if c < mid:
+                        left += weight
+                    else:
+                        right += weight
+                elif not slot.available:
+                    cells[cell] = NAN
+                else:
+                    continue
+                heights[c] = r + 1
+
+        return cls(rows, cols, heights, cells, left, right, zobrist)
+
+    @classmethod
+    def of(cls, ship_grid):
+        """
+        Returns ship_grid itself if it is already a ShipState, else the state built from it.
+
+        Lets planners take either a grid or a state, so worker processes can be
+        sent the compact state instead of a grid of Slot objects.
+        """
+        return ship_grid if isinstance(ship_grid, cls) else cls.from_grid(ship_grid)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, ShipState):
+            return NotImplemented
+        return (
+            self._hash == other._hash
+            and self.heights == other.heights
+            and self.cells == other.cells
+        )
+
+    def top(self, col):
+        """
+        Returns the weight of the top container in a column, or None if it has none.
+        """
+        height = self.heights[col]
+        if height == 0:
+            return None
+        weight = self.cells[(height - 1) * self.cols + col]
+        return weight if weight >= 0 else None
+
+    def column(self, col):
+        """
+        Returns the container weights in a column from the bottom upwards.
+        """
+        return [weight for weight in self.cells[col::self.cols] if weight >= 0]
+
+    def move(self, from_col, to_col):
+        """
+        Returns the state after carrying the top container of from_col onto to_col.
+
+        The caller is responsible for checking that the move is legal.
+        """
+        cols = self.cols
+        from_cell = (self.heights[from_col] - 1) * cols + from_col
+        to_cell = self.heights[to_col] * cols + to_col
+        weight = self.cells[from_cell]
+
+        heights = array("B", self.heights)
+        heights[from_col] -= 1
+        heights[to_col] += 1
+        cells = array("i", self.cells)
+        cells[from_cell] = EMPTY
+        cells[to_cell] = weight
+
+        left, right = self.left, self.right
+        mid = cols // 2
+        if from_col < mid <= to_col:
+            left, right = left - weight, right + weight
+        elif to_col < mid <= from_col:
+            left, right = left + weight, right - weight
+
+        zobrist = self._hash ^ zobrist_key(from_cell, weight) ^ zobrist_key(to_cell, weight)
+        return ShipState(self.rows, cols, heights, cells, left, right, zobrist)
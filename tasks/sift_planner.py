@@ -0,0 +1,563 @@
+# Dockership/tasks/sift_planner.py
+
+"""
+SIFT planning over whole ship states.
+
+When a ship cannot be balanced, SIFT lays the containers out by weight: the
+heaviest container goes in the bottom row just left of the midline, the next one
+just right of it, and so on outwards and then up row by row, skipping NAN
+slots. The target layout is computed once. The relocation order is then found
+by a cost-aware constructive pass, improved by a bounded weighted A* search, and
+the cheaper of the two plans is returned as (from_col, to_col) column moves.
+Where the constructive pass gets boxed in on a crowded bay, a small bounded
+search digs out and parks containers for it one cell at a time.
+"""
+
+import heapq  # Priority queue for the open list
+import itertools  # Tie-breaking counter for heap entries, nearest-match slicing
+import time  # Wall-clock budget
+
+from array import array  # Flat target layout, comparable with ShipState.cells
+
+from tasks.crane import TRAVEL_COSTS  # Memoised crane travel costs
+from tasks.ship_state import EMPTY, NAN, ShipState  # Compact hashable search state
+
+# Search budget for improving on the constructive plan
+DEFAULT_SIFT_MAX_NODES = 50000
+DEFAULT_SIFT_TIME_LIMIT = 0.5
+SIFT_SEARCH_WEIGHT = 1.5
+
+# Extra cost the constructive pass charges for parking a container somewhere it
+# will have to be moved again, and for each unfinished container it buries
+PARK_PENALTY = 4
+BURY_PENALTY = 3
+
+# Rows above the lowest unfilled cell the constructive pass may fill ahead
+READY_ROWS = 4
+
+# Budget of each dig-and-park search the constructive pass falls back on
+DEFAULT_PLACE_MAX_NODES = 20000
+DEFAULT_PLACE_TIME_LIMIT = 2.0
+
+
+def sift_order(rows, cols):
+    """
+    Returns the SIFT fill order of the grid cells.
+
+    Each row is filled from the midline outwards, alternating left and right,
+    starting just left of the midline; rows are filled from the bottom up.
+
+    Args:
+        rows (int): Number of rows in the grid.
+        cols (int): Number of columns in the grid.
+
+    Returns:
+        list[int]: Cell indices (row * cols + col) in fill order.
+    """
+    mid = cols // 2
+    left, right = list(range(mid - 1, -1, -1)), list(range(mid, cols))
+    col_order = []
+    for i in range(max(len(left), len(right))):
+        col_order.extend(side[i] for side in (left, right) if i < len(side))
+
+    return [r * cols + c for r in range(rows) for c in col_order]
+
+
+def sift_target(state):
+    """
+    Computes the SIFT target layout for a ship state.
+
+    Args:
+        state (ShipState): The current state.
+
+    Returns:
+        tuple: (target, order) where target is an array of cell weights laid out
+            like ShipState.cells, and order lists the target cells that receive a
+            container, in fill order.
+    """
+    weights = sorted((w for w in state.cells if w >= 0), reverse=True)
+    target = array("i", [NAN if w == NAN else EMPTY for w in state.cells])
+
+    order = [cell for cell in sift_order(state.rows, state.cols) if state.cells[cell] != NAN]
+    order = order[:len(weights)]
+    for cell, weight in zip(order, weights):
+        target[cell] = weight
+
+    return target, order
+
+
+def _column_bounds(target, rows, cols):
+    """
+    Lower bound on the crane minutes needed to bring a misplaced container of each
+    weight home from each column: its column distance to the nearest target
+    column for that weight, or 2 if that is its own column (out and back in).
+    """
+    target_cols = {}
+    for cell, weight in enumerate(target):
+        if weight >= 0:
+            target_cols.setdefault(weight, set()).add(cell % cols)
+
+    return {
+        weight: [min(abs(c - tc) if tc != c else 2 for tc in tcols) for c in range(cols)]
+        for weight, tcols in target_cols.items()
+    }
+
+
+def _misplaced_bound(state, target, bounds):
+    cols = state.cols
+    return sum(
+        bounds[weight][cell % cols]
+        for cell, weight in enumerate(state.cells)
+        if weight >= 0 and target[cell] != weight
+    )
+
+
+def _settled_below(state, target, cell):
+    """
+    True if every cell below `cell` in its column already matches the target.
+    """
+    cols = state.cols
+    return all(state.cells[below] == target[below] for below in range(cell % cols, cell, cols))
+
+
+def _park(state, target, locked, from_col, exclude):
+    """
+    Chooses where to put the top container of from_col while clearing a column.
+
+    Returns:
+        tuple: (to_col, travel) for the cheapest destination, or None.
+    """
+    rows, cols = state.rows, state.cols
+    heights = state.heights
+    weight = state.top(from_col)
+    best = None
+
+    for to_col, travel in enumerate(TRAVEL_COSTS.table(heights, rows)[from_col]):
+        if travel is None or to_col in exclude:
+            continue
+
+        landing = heights[to_col] * cols + to_col
+        if target[landing] == weight and _settled_below(state, target, landing):
+            penalty = 0  # Lands exactly where SIFT wants it
+        else:
+            buried = sum(
+                1 for below in range(to_col, landing, cols)
+                if below not in locked and state.cells[below] >= 0
+            )
+            penalty = PARK_PENALTY + BURY_PENALTY * buried
+
+        # Filling a column to the top row walls off everything beyond it
+        walls = heights[to_col] == rows - 1
+        score = (walls, travel + penalty, travel, to_col)
+        if best is None or score < best[0]:
+            best = (score, to_col, travel)
+
+    if best is None:
+        return None
+    return best[1], best[2]
+
+
+def _pick_source(state, target, locked, weight, to_col, candidates=None):
+    """
+    Chooses which container of the given weight to bring to to_col.
+
+    candidates, if given, lists the unlocked cells holding that weight, saving
+    a scan of the grid.
+
+    Returns:
+        int: Cell index of the chosen container, or None if there is none.
+    """
+    cols = state.cols
+    best = None
+
+    if candidates is None:
+        candidates = [cell for cell, w in enumerate(state.cells) if w == weight and cell not in locked]
+    for cell in candidates:
+        row, col = divmod(cell, cols)
+        above = state.heights[col] - 1 - row
+        # Avoid taking a container that already sits where SIFT wants it
+        settled = target[cell] == weight and _settled_below(state, target, cell)
+        score = (above * (PARK_PENALTY + 1) + abs(col - to_col) + (cols if settled else 0), cell)
+        if best is None or score < best[0]:
+            best = (score, cell)
+
+    return None if best is None else best[1]
+
+
+def _bounding_walls(state, col, direction=0):
+    """
+    Returns the nearest column on each side of col that is stacked to the top
+    row, or only on the side given by direction (-1 or 1), nearest first.
+    """
+    rows, heights = state.rows, state.heights
+    walls = []
+    for step, side in ((-1, range(col - 1, -1, -1)), (1, range(col + 1, state.cols))):
+        if direction in (0, step):
+            walls.extend(itertools.islice((c for c in side if heights[c] >= rows), 1))
+    return sorted(walls, key=lambda c: abs(c - col))
+
+
+def _walls_to_room(heights, rows, col, needed):
+    """
+    Counts the full columns the crane must lower before it can park `needed`
+    containers from col, taking the free slots nearest in walls first.
+    """
+    room = []
+    for side in (range(col - 1, -1, -1), range(col + 1, len(heights))):
+        # Free slots reachable on this side after lowering 0, 1, 2, ... walls
+        reachable = [0]
+        for c in side:
+            if heights[c] >= rows:
+                reachable.append(reachable[-1])
+            else:
+                reachable[-1] += rows - heights[c]
+        room.append(reachable)
+
+    left, right = room
+    best = len(left) + len(right) - 2
+    for i, free in enumerate(left):
+        for j, more in enumerate(right):
+            if free + more >= needed:
+                best = min(best, i + j)
+                break
+    return best
+
+
+def _fill_estimate(state, target, locked, cell, sources):
+    """
+    Rough cost of filling a cell: the containers above it and above the chosen
+    source each cost a park, plus the columns between the source and the cell.
+
+    sources maps each weight to the unlocked cells holding it.
+    """
+    row, col = divmod(cell, state.cols)
+    source = _pick_source(state, target, locked, target[cell], col, sources.get(target[cell], ()))
+    if source is None:
+        return float("inf")
+    source_row, source_col = divmod(source, state.cols)
+    heights = state.heights
+    dig = max(heights[col] - row, 0) + heights[source_col] - 1 - source_row
+    return dig * (PARK_PENALTY + 1) + abs(source_col - col)
+
+
+def _dig_and_park(state, target, locked, cell, max_nodes, deadline):
+    """
+    Searches for moves that bring a container of the target weight to one cell.
+
+    Used when the constructive pass gets boxed in. Any unlocked container may be
+    moved anywhere the crane can carry it, so walls are lowered and containers
+    dug out as the search needs. The search is greedy best-first on a count of
+    the containers still to move, with crane minutes breaking ties.
+
+    Returns:
+        list: (from_col, to_col, travel) moves, or None if none were found
+            within max_nodes states and before the deadline.
+    """
+    rows, cols = state.rows, state.cols
+    row, col = divmod(cell, cols)
+    weight = target[cell]
+
+    def estimate(s):
+        if s.cells[cell] == weight:
+            return 0
+        # Everything at or above the cell has to go, then the nearest source has
+        # to be dug out and carried over, lowering any full column in between
+        heights = s.heights
+        clear = max(heights[col] - row, 0)
+        fetch = min(
+            heights[c % cols] - 1 - c // cols
+            + sum(1 for between in range(min(c % cols, col) + 1, max(c % cols, col)) if heights[between] >= rows)
+            for c, w in enumerate(s.cells) if w == weight and c not in locked
+        )
+        # and the containers cleared need somewhere to go
+        return clear + fetch + 1 + _walls_to_room(heights, rows, col, clear)
+
+    counter = itertools.count()
+    parents = {state: None}
+    open_list = [(estimate(state), 0, next(counter), state)]
+    expanded = 0
+
+    while open_list:
+        h, g, _, current = heapq.heappop(open_list)
+        if h == 0:
+            moves = []
+            while parents[current] is not None:
+                current, move = parents[current]
+                moves.append(move)
+            moves.reverse()
+            return moves
+
+        expanded += 1
+        if expanded % 32 == 0 and time.perf_counter() > deadline:
+            return None
+
+        heights = current.heights
+        travel_costs = TRAVEL_COSTS.table(heights, rows)
+        for from_col in range(cols):
+            if current.top(from_col) is None or (heights[from_col] - 1) * cols + from_col in locked:
+                continue
+            for to_col, travel in enumerate(travel_costs[from_col]):
+                if travel is None:
+                    continue
+                child = current.move(from_col, to_col)
+                if child in parents:
+                    continue
+                if len(parents) >= max_nodes:
+                    return None
+                parents[child] = (current, (from_col, to_col, travel))
+                heapq.heappush(open_list, (estimate(child), g + travel, next(counter), child))
+
+    return None
+
+
+def greedy_sift(start, target, order, max_nodes=DEFAULT_PLACE_MAX_NODES, time_limit=DEFAULT_PLACE_TIME_LIMIT):
+    """
+    Builds a SIFT plan by filling the target cells one at a time.
+
+    A cell is ready once every cell below it is filled. The ready cell that
+    looks cheapest to fill is filled next, ties going to the earlier cell in
+    fill order. Containers in the way are parked where they cost the least now
+    and cause the least work later, preferring spots where they already fit the
+    target. A column stacked to the top row that boxes the crane in is lowered
+    first. If the crane still gets boxed in, the next ready cell is tried, and
+    if every one fails, a ready cell is filled by _dig_and_park instead.
+
+    Args:
+        start (ShipState): The state to sift.
+        target (array): Target layout from sift_target.
+        order (list[int]): Target cells in fill order.
+        max_nodes (int): Node budget of each _dig_and_park search.
+        time_limit (float): Wall-clock budget for the _dig_and_park searches in seconds.
+
+    Returns:
+        tuple: (column_moves, cost), or None if a cell could not be filled
+            within the budget.
+    """
+    rows, cols = start.rows, start.cols
+    state, column_moves, cost = start, [], 0
+    locked = set()
+    deadline = time.perf_counter() + time_limit
+
+    def carry(from_col, to_col, travel):
+        nonlocal state, cost
+        state = state.move(from_col, to_col)
+        column_moves.append((from_col, to_col))
+        cost += travel
+
+    def movable(col):
+        return state.top(col) is not None and (state.heights[col] - 1) * cols + col not in locked
+
+    def park(from_col, exclude, direction=0):
+        # Parks the top of from_col; if it is boxed in by columns stacked to the
+        # top row, which the crane cannot carry anything over, the nearest of
+        # those is lowered first by parking its top further out, in turn
+        parking = _park(state, target, locked, from_col, exclude)
+        if parking is None:
+            for wall in _bounding_walls(state, from_col, direction):
+                outwards = 1 if wall > from_col else -1
+                if wall in exclude or not movable(wall) or not park(wall, exclude + (from_col,), outwards):
+                    continue
+                parking = _park(state, target, locked, from_col, exclude)
+                if parking is not None:
+                    break
+        if parking is None:
+            return False
+        carry(from_col, *parking)
+        return True
+
+    def lower_walls(from_col, to_col):
+        # Lowers every column between that is stacked to the top row, parking
+        # outside the span where possible so no new wall goes up in the way
+        span = range(min(from_col, to_col), max(from_col, to_col) + 1)
+        for wall in span[1:-1]:
+            while state.heights[wall] >= rows:
+                if not movable(wall) or not (park(wall, tuple(span)) or park(wall, (from_col, to_col))):
+                    return False
+        return True
+
+    def fill(cell):
+        # Clears the target cell and everything above it, then brings a
+        # container of the right weight there
+        row, col = divmod(cell, cols)
+        weight = target[cell]
+
+        while state.heights[col] > row:
+            if state.top(col) is None or not park(col, ()):
+                return False
+
+        source = _pick_source(state, target, locked, weight, col)
+        if source is None:
+            return False
+        source_row, source_col = divmod(source, cols)
+
+        # Dig the chosen container out
+        while state.heights[source_col] - 1 > source_row:
+            if not park(source_col, (col,)):
+                return False
+
+        travel = TRAVEL_COSTS.table(state.heights, rows)[source_col][col]
+        if travel is None and lower_walls(source_col, col):
+            travel = TRAVEL_COSTS.table(state.heights, rows)[source_col][col]
+        if travel is None:
+            return False
+        carry(source_col, col, travel)
+        return True
+
+    def fillable(cell):
+        below = cell - cols
+        return cell not in locked and (below < 0 or below in locked or target[below] == NAN)
+
+    pending = list(order)
+    while pending:
+        # Cells more than READY_ROWS above the lowest unfilled one wait, so no
+        # low cell is put off until it is buried
+        top_row = pending[0] // cols + READY_ROWS
+        ready = [cell for cell in pending if cell // cols <= top_row and fillable(cell)]
+
+        # A cell that already holds its container only needs locking
+        settled = [cell for cell in ready if state.cells[cell] == target[cell]]
+        if settled:
+            locked.update(settled)
+            pending = [cell for cell in pending if cell not in locked]
+            continue
+
+        # Fill the ready cell that looks cheapest, or failing that the next one
+        sources = {}
+        for cell, weight in enumerate(state.cells):
+            if weight >= 0 and cell not in locked:
+                sources.setdefault(weight, []).append(cell)
+        ready.sort(key=lambda cell: _fill_estimate(state, target, locked, cell, sources))
+        before = state, len(column_moves), cost
+        for cell in ready:
+            if fill(cell):
+                break
+            state, cost = before[0], before[2]
+            del column_moves[before[1]:]
+        else:
+            # Boxed in: dig and park by search instead, giving every ready cell
+            # a small budget before any gets the full one
+            placed = None
+            for budget in (max_nodes // 10, max_nodes):
+                for cell in ready:
+                    placed = _dig_and_park(state, target, locked, cell, budget, deadline)
+                    if placed is not None:
+                        break
+                if placed is not None:
+                    break
+            if placed is None:
+                return None
+            for from_col, to_col, travel in placed:
+                carry(from_col, to_col, travel)
+
+        locked.add(cell)
+        pending.remove(cell)
+
+    return column_moves, cost
+
+
+def astar_sift(start, target, upper_bound=None,
+               max_nodes=DEFAULT_SIFT_MAX_NODES, time_limit=DEFAULT_SIFT_TIME_LIMIT):
+    """
+    Searches for a SIFT plan cheaper than upper_bound with weighted A*.
+
+    Args:
+        start (ShipState): The state to sift.
+        target (array): Target layout from sift_target.
+        upper_bound (int, optional): Cost of a known plan; only cheaper plans are returned.
+        max_nodes (int): Maximum number of distinct states kept in memory.
+        time_limit (float): Wall-clock budget in seconds.
+
+    Returns:
+        tuple: (column_moves, cost), or None if no cheaper plan was found.
+    """
+    rows, cols = start.rows, start.cols
+    bounds = _column_bounds(target, rows, cols)
+    limit = float("inf") if upper_bound is None else upper_bound
+
+    deadline = time.perf_counter() + time_limit
+    counter = itertools.count()
+
+    start_h = _misplaced_bound(start, target, bounds)
+    best_g = {start: 0}
+    parents = {start: None}
+    open_list = [(SIFT_SEARCH_WEIGHT * start_h, 0, start_h, next(counter), start)]
+    expanded = 0
+
+    while open_list:
+        _, g, h, _, state = heapq.heappop(open_list)
+        if g > best_g[state] or g + h >= limit:
+            continue
+
+        if state.cells == target:
+            column_moves = []
+            while parents[state] is not None:
+                state, move = parents[state]
+                column_moves.append(move)
+            column_moves.reverse()
+            return column_moves, g
+
+        expanded += 1
+        if expanded % 32 == 0 and time.perf_counter() > deadline:
+            return None
+
+        heights = state.heights
+        travel_costs = TRAVEL_COSTS.table(heights, rows)
+
+        for from_col in range(cols):
+            weight = state.top(from_col)
+            if weight is None:
+                continue
+            from_cell = (heights[from_col] - 1) * cols + from_col
+            from_cost = bounds[weight][from_col] if target[from_cell] != weight else 0
+
+            for to_col, travel in enumerate(travel_costs[from_col]):
+                if travel is None:
+                    continue
+
+                child_g = g + travel
+                to_cell = heights[to_col] * cols + to_col
+                child_h = h - from_cost + (bounds[weight][to_col] if target[to_cell] != weight else 0)
+                if child_g + child_h >= limit:
+                    continue
+
+                child = state.move(from_col, to_col)
+                if child_g >= best_g.get(child, float("inf")):
+                    continue
+                if child not in best_g and len(best_g) >= max_nodes:
+                    continue
+
+                best_g[child] = child_g
+                parents[child] = (state, (from_col, to_col))
+                heapq.heappush(open_list, (child_g + SIFT_SEARCH_WEIGHT * child_h, child_g,
+                                           child_h, next(counter), child))
+
+    return None
+
+
+def plan_sift(ship_grid, max_nodes=DEFAULT_SIFT_MAX_NODES, time_limit=DEFAULT_SIFT_TIME_LIMIT,
+              place_time_limit=DEFAULT_PLACE_TIME_LIMIT):
+    """
+    Plans the cheapest SIFT relocation found within the budget.
+
+    Args:
+        ship_grid (list[list[Slot]] or ShipState): The ship (not modified).
+        max_nodes (int): Maximum number of states the search may keep in memory.
+        time_limit (float): Wall-clock budget for the search in seconds.
+        place_time_limit (float): Wall-clock budget for the constructive pass's
+            dig-and-park searches in seconds.
+
+    Returns:
+        tuple: (column_moves, cost) where column_moves is a list of
+            (from_col, to_col) pairs, or None if no plan was found within the budget.
+    """
+    start = ShipState.of(ship_grid)
+    target, order = sift_target(start)
+
+    if start.cells == target:
+        return [], 0
+
+    plan = greedy_sift(start, target, order, time_limit=place_time_limit)
+    searched = astar_sift(start, target, upper_bound=None if plan is None else plan[1],
+                          max_nodes=max_nodes, time_limit=time_limit)
+
+    return searched if searched is not None else plan
@@ -0,0 +1,340 @@
+# Dockership/tasks/snapshot.py
+
+"""
+Versioned binary snapshots of a ship and the plan made for it.
+
+A snapshot file holds a fixed header, the starting grid packed the way
+ShipState packs it (one signed 32-bit cell per slot, weight or EMPTY / NAN),
+the name of the container in each cell as an index into an interned string
+table, and the plan: per step, the cells it changed and its Move records. Files
+are written to a temporary name and renamed into place, so a reader never sees
+a partial file, and are read back through mmap without creating an object per
+slot; Slot grids and a PlanHistory are only built when asked for. A restarted
+app or another worker process can pick a plan up without planning again.
+
+Layout (little-endian):
+    header                        HEADER
+    cells        int32[rows*cols] weight, EMPTY or NAN
+    cell_names   int32[rows*cols] string id, or NO_STRING
+    steps        int32[steps*6]   deltas, moves, messages, has_info, name id, cost
+    deltas       int32[deltas*4]  row, col, cell, string id
+    moves        int32[moves*6]   from_row, from_col, to_row, to_col, string id, cost
+    messages     int32[messages]  string ids: the plan's messages, then each step's
+    offsets      uint32[strings+1] byte offsets into the string data
+    heights      uint8[cols]
+    string data  UTF-8
+"""
+
+import mmap  # Reading without copying the file
+import os  # Atomic rename into place
+import struct  # Fixed header
+import sys  # Byte order of the host
+import tempfile  # Temporary file next to the target
+from array import array  # Packed sections
+
+from tasks.moves import Move  # Plan steps
+from tasks.plan_history import PlanHistory  # Rebuilt plans
+from tasks.ship_state import EMPTY, NAN, ShipState, zobrist_key  # Cell encoding and hashing
+
+MAGIC = b"DKSP"
+VERSION = 1
+
+# Header: magic, version, flags, rows, cols, left, right, zobrist, cost, and the
+# number of strings, string bytes, steps, deltas, moves, messages and plan messages
+HEADER = struct.Struct("<4sHHHHqqQqIIIIIII")
+
+FLAG_STATUS = 1  # The plan reached its goal (balance found, not SIFT)
+
+NO_STRING = -1
+
+# Where the app keeps its snapshots, relative to the working directory
+DEFAULT_SNAPSHOT_DIR = os.path.join("cache", "snapshots")
+
+_STEP_FIELDS = 6
+_DELTA_FIELDS = 4
+_MOVE_FIELDS = 6
+_SWAP = sys.byteorder != "little"
+
+
+class SnapshotError(ValueError):
+    """
+    A snapshot file that is not in this format or version, or is truncated.
+    """
+
+
+def _cell(slot):
+    """
+    Returns the (cell, name) encoding of a Slot.
+    """
+    if slot.hasContainer:
+        return int(slot.container.weight), slot.container.name
+    return (EMPTY if slot.available else NAN), None
+
+
+class _Strings:
+    """
+    Interned string table built while writing.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.data = bytearray()
+        self.offsets = array("I", [0])
+
+    def id(self, text):
+        if text is None:
+            return NO_STRING
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.offsets) - 1
+            self.data += text.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return string_id
+
+
+def _pack(values):
+    if _SWAP:
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(path, ship_grid, history=None, status=True, messages=(), cost=None):
+    """
+    Writes a ship and, optionally, a plan for it to a snapshot file, atomically.
+
+    Args:
+        path (str): File to write; its directory is created if needed.
+        ship_grid (list[list[Slot]]): The grid the plan starts from.
+        history (PlanHistory, optional): The plan, starting from ship_grid.
+        status (bool): Whether the plan reached its goal.
+        messages (list[str]): Messages reported for the whole plan.
+        cost (int, optional): Total cost of the plan; defaults to the sum of its move costs.
+    """
+    rows, cols = len(ship_grid), len(ship_grid[0])
+    strings = _Strings()
+
+    # Pack the starting grid as ShipState.from_grid does, with the names alongside
+    mid = cols // 2
+    heights = array("B", bytes(cols))
+    cells = array("i", [EMPTY]) * (rows * cols)
+    cell_names = array("i", [NO_STRING]) * (rows * cols)
+    left = right = zobrist = 0
+    for r, row in enumerate(ship_grid):
+        for c, slot in enumerate(row):
+            cell = r * cols + c
+            value, name = _cell(slot)
+            if value == EMPTY:
+                continue
+            cells[cell], cell_names[cell] = value, strings.id(name)
+            heights[c] = r + 1
+            if value >= 0:
+                zobrist ^= zobrist_key(cell, value)
+                if c < mid:
+                    left += value
+                else:
+                    right += value
+
+    steps, deltas, moves = array("i"), array("i"), array("i")
+    message_ids = array("i", (strings.id(message) for message in messages))
+    for index in range(len(history) if history is not None else 0):
+        delta = history.delta(index)
+        for r, c, slot in delta:
+            value, name = _cell(slot)
+            deltas.extend((r, c, value, strings.id(name)))
+        info = history.info(index)
+        step_moves = info.pop("moves")
+        for move in step_moves:
+            moves.extend((move.from_row, move.from_col, move.to_row, move.to_col,
+                          strings.id(move.container), int(move.cost)))
+        step_messages = info.get("messages", ())
+        message_ids.extend(strings.id(message) for message in step_messages)
+        steps.extend((len(delta), len(step_moves), len(step_messages), 1 if info else 0,
+                      strings.id(info.get("name")), int(info.get("cost", 0))))
+
+    if cost is None:
+        cost = sum(move.cost for step in (history.steps if history is not None else ()) for move in step)
+
+    header = HEADER.pack(MAGIC, VERSION, FLAG_STATUS if status else 0, rows, cols,
+                         left, right, zobrist, int(cost),
+                         len(strings.offsets) - 1, len(strings.data), len(steps) // _STEP_FIELDS,
+                         len(deltas) // _DELTA_FIELDS, len(moves) // _MOVE_FIELDS,
+                         len(message_ids), len(messages))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".tmp", delete=False) as file:
+        try:
+            file.write(header)
+            for section in (cells, cell_names, steps, deltas, moves, message_ids, strings.offsets):
+                file.write(_pack(section))
+            file.write(heights.tobytes())
+            file.write(strings.data)
+            file.flush()
+            os.fsync(file.fileno())
+        except BaseException:
+            file.close()
+            os.unlink(file.name)
+            raise
+    os.replace(file.name, path)
+
+
+class Snapshot:
+    """
+    A snapshot file mapped into memory.
+
+    Sections are read in place; nothing is created per slot until a grid,
+    state or plan is asked for. Use it as a context manager, or call close().
+
+    Attributes:
+        rows (int): Number of rows in the grid.
+        cols (int): Number of columns in the grid.
+        status (bool): Whether the plan reached its goal.
+        cost (int): Total cost of the plan.
+        cells (memoryview): int32 weight, EMPTY or NAN per cell, row-major from the bottom.
+        steps (int): Number of steps in the plan.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                raise SnapshotError("The snapshot is empty.")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_sections()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_sections(self):
+        if len(self._map) < HEADER.size:
+            raise SnapshotError("The snapshot is truncated.")
+        (magic, version, flags, self.rows, self.cols, self.left, self.right, self._zobrist, self.cost,
+         strings, string_bytes, self.steps, deltas, moves, messages, self._plan_messages) = \
+            HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotError("Not a Dockership snapshot.")
+        if version != VERSION:
+            raise SnapshotError(f"Snapshot version {version} is not supported (expected {VERSION}).")
+        self.status = bool(flags & FLAG_STATUS)
+
+        cells = self.rows * self.cols
+        sizes = (("cells", "i", cells), ("_cell_names", "i", cells),
+                 ("_steps", "i", self.steps * _STEP_FIELDS), ("_deltas", "i", deltas * _DELTA_FIELDS),
+                 ("_moves", "i", moves * _MOVE_FIELDS), ("_messages", "i", messages),
+                 ("_offsets", "I", strings + 1), ("_heights", "B", self.cols))
+        if len(self._map) != HEADER.size + sum(4 * n for _, code, n in sizes if code != "B") \
+                + self.cols + string_bytes:
+            raise SnapshotError("The snapshot is truncated.")
+
+        self._views = []
+        view, offset = memoryview(self._map), HEADER.size
+        for name, code, count in sizes:
+            size = count * (1 if code == "B" else 4)
+            section = view[offset:offset + size]
+            if _SWAP and code != "B":
+                section = array(code, section.tobytes())
+                section.byteswap()
+            else:
+                section = section.cast(code)
+                self._views.append(section)
+            setattr(self, name, section)
+            offset += size
+        self._strings = view[offset:]
+        self._views.extend((self._strings, view))
+        self._names = {}
+
+    def close(self):
+        for view in getattr(self, "_views", ()):
+            view.release()
+        self._views = []
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def string(self, string_id):
+        """
+        Returns a string from the table, or None for NO_STRING.
+        """
+        if string_id == NO_STRING:
+            return None
+        text = self._names.get(string_id)
+        if text is None:
+            text = self._names[string_id] = str(
+                self._strings[self._offsets[string_id]:self._offsets[string_id + 1]], "utf-8")
+        return text
+
+    @property
+    def messages(self):
+        """
+        list[str]: Messages reported for the whole plan.
+        """
+        return [self.string(string_id) for string_id in self._messages[:self._plan_messages]]
+
+    def to_state(self):
+        """
+        Returns the starting ShipState, copying the packed cells out of the file.
+        """
+        return ShipState(self.rows, self.cols, array("B", self._heights), array("i", self.cells),
+                         self.left, self.right, self._zobrist)
+
+    def _slot(self, value, string_id):
+        from tasks.ship_balancer import Container, Slot  # ship_balancer builds on the planners
+
+        if value >= 0:
+            return Slot(Container(self.string(string_id), value), hasContainer=True, available=False)
+        return Slot(None, hasContainer=False, available=value == EMPTY)
+
+    def to_grid(self):
+        """
+        Returns the starting grid as Slot objects.
+        """
+        cells, names, cols = self.cells, self._cell_names, self.cols
+        return [[self._slot(cells[r * cols + c], names[r * cols + c]) for c in range(cols)]
+                for r in range(self.rows)]
+
+    def to_history(self):
+        """
+        Rebuilds the plan as a PlanHistory starting from the snapshot's grid.
+        """
+        ship_grid = self.to_grid()
+        history = PlanHistory(ship_grid)
+        delta = move = 0
+        message = self._plan_messages
+        for step in range(self.steps):
+            n_deltas, n_moves, n_messages, has_info, name_id, cost = \
+                self._steps[step * _STEP_FIELDS:(step + 1) * _STEP_FIELDS]
+            cells = []
+            for d in range(delta, delta + n_deltas):
+                r, c, value, string_id = self._deltas[d * _DELTA_FIELDS:(d + 1) * _DELTA_FIELDS]
+                ship_grid[r][c] = self._slot(value, string_id)
+                cells.append((r, c))
+            moves = []
+            for m in range(move, move + n_moves):
+                fields = self._moves[m * _MOVE_FIELDS:(m + 1) * _MOVE_FIELDS]
+                moves.append(Move(fields[0], fields[1], fields[2], fields[3],
+                                  self.string(fields[4]), fields[5]))
+            info = {}
+            if has_info:
+                info = {"name": self.string(name_id), "cost": cost,
+                        "messages": [self.string(string_id)
+                                     for string_id in self._messages[message:message + n_messages]]}
+            history.record(ship_grid, cells, moves, **info)
+            delta, move, message = delta + n_deltas, move + n_moves, message + n_messages
+        return history
+
+
+def read_snapshot(path):
+    """
+    Maps a snapshot file into memory.
+
+    Returns:
+        Snapshot: The mapped snapshot; close it when done.
+
+    Raises:
+        SnapshotError: If the file is not a snapshot of this version, or is truncated.
+    """
+    return Snapshot(path)
@@ -0,0 +1,67 @@
+# Dockership/tests/test_balance_feasibility.py
+
+"""
+Tests for the subset-sum balance feasibility check (tasks/balance_feasibility.py).
+"""
+
+import itertools  # Every split of a few weights
+import random  # Generated weight lists
+
+import pytest
+
+from tasks.balance_feasibility import check_balance_feasibility
+from tasks.balance_search import is_balanced
+
+
+def balanced_lefts(weights):
+    """
+    Returns every balanced left-side total, by trying each split with is_balanced.
+    """
+    total = sum(weights)
+    lefts = set()
+    for picks in itertools.product((False, True), repeat=len(weights)):
+        left = sum(weight for weight, pick in zip(weights, picks) if pick)
+        if is_balanced(left, total - left):
+            lefts.add(left)
+    return lefts
+
+
+@pytest.mark.parametrize("weights, feasible", [
+    ([9, 10], False),    # 9 / 10 is exactly 0.9, outside the open band
+    ([10, 11], True),    # 10 / 11 is just above 0.9
+    ([90, 100], False),
+    ([100, 111], True),
+    ([11, 10, 0], True),
+    ([1, 2], False),
+    ([5, 5], True),
+])
+def test_band_edges(weights, feasible):
+    assert check_balance_feasibility(weights).feasible == feasible
+
+
+@pytest.mark.parametrize("total", [19, 21, 190, 210])
+def test_integer_bounds_match_the_ratio(total):
+    # 0.9 < left / right < 1.1 becomes 19 * left > 9 * total and 21 * left < 11 * total
+    for left in range(total + 1):
+        feasibility = check_balance_feasibility([left, total - left])
+        assert feasibility.feasible == bool(balanced_lefts([left, total - left]))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matches_every_split(seed):
+    rng = random.Random(seed)
+    weights = [rng.randint(1, 60) for _ in range(rng.randint(1, 10))]
+
+    feasibility = check_balance_feasibility(weights)
+    lefts = balanced_lefts(weights)
+
+    assert feasibility.feasible == bool(lefts)
+    if lefts:
+        assert (feasibility.lowest_left, feasibility.highest_left) == (min(lefts), max(lefts))
+    else:
+        assert feasibility.lowest_left is None and feasibility.highest_left is None
+    assert feasibility.best_ratio <= 1.0
+
+
+def test_empty_ship_is_balanced():
+    assert check_balance_feasibility([]).feasible
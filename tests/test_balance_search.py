@@ -0,0 +1,180 @@
+# Dockership/tests/test_balance_search.py
+
+"""
+Tests for balancing with A* over ship states (tasks/balance_search.py), and
+for beam search against the greedy balancer on large bays (tasks/balance_beam.py).
+"""
+
+import heapq  # Uniform-cost search to compare against
+import itertools  # Tie-breaking counter for heap entries
+import os  # Paths to the bundled manifests
+import time  # Slowing the feasibility check down
+
+import pytest
+
+from tasks.balance_beam import beam_balance
+from tasks.balance_feasibility import check_balance_feasibility
+from tasks.balance_greedy import greedy_balance
+from tasks.balance_portfolio import replay
+from tasks.balance_search import astar_balance, is_balanced
+from tasks.crane import TRAVEL_COSTS
+from tasks.manifest_parser import parse_manifest_lines
+import tasks.ship_balancer
+from tasks.ship_balancer import balance
+from tasks.ship_geometry import ShipGeometry
+from utils.manifest_generator import generate_manifest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Cheapest balance of each bundled manifest, in crane minutes
+OPTIMAL_COSTS = {
+    "ShipCase1": 4,
+    "ShipCase2": 8,
+    "ShipCase3": 12,
+    "ShipCase4": 22,
+    "SilverQueen": 8,
+}
+
+# Half-full generated bays whose left side is much heavier: (rows, cols, imbalance, seed)
+IMBALANCED_BAYS = [
+    (16, 40, 2.0, 1),
+    (16, 40, 1.3, 0),
+    (12, 24, 2.0, 1),
+    (16, 40, 2.0, 3),
+]
+
+
+def read_manifest(name):
+    with open(os.path.join(DATA_DIR, f"{name}.txt")) as file:
+        return parse_manifest_lines(file.read().splitlines())
+
+
+def uniform_cost_balance(start):
+    """
+    Returns the cost of the cheapest balanced state by uniform-cost search, or None.
+    """
+    counter = itertools.count()
+    best_g = {start: 0}
+    open_list = [(0, next(counter), start)]
+    while open_list:
+        g, _, state = heapq.heappop(open_list)
+        if g > best_g[state]:
+            continue
+        if is_balanced(state.left, state.right):
+            return g
+        travel_costs = TRAVEL_COSTS.table(state.heights, state.rows)
+        for from_col in range(state.cols):
+            if state.top(from_col) is None:
+                continue
+            for to_col, travel in enumerate(travel_costs[from_col]):
+                if travel is None:
+                    continue
+                child = state.move(from_col, to_col)
+                if g + travel < best_g.get(child, float("inf")):
+                    best_g[child] = g + travel
+                    heapq.heappush(open_list, (g + travel, next(counter), child))
+    return None
+
+
+@pytest.mark.parametrize("name, cost", sorted(OPTIMAL_COSTS.items()))
+def test_astar_balance_is_optimal(name, cost):
+    state = read_manifest(name).to_state()
+
+    column_moves, found = astar_balance(state, time_limit=30)
+
+    assert found == cost
+    assert uniform_cost_balance(state) == cost
+    for from_col, to_col in column_moves:
+        state = state.move(from_col, to_col)
+    assert is_balanced(state.left, state.right)
+
+
+@pytest.mark.parametrize("name, cost", sorted(OPTIMAL_COSTS.items()))
+def test_balance_plan_cost(name, cost):
+    ship_grid, containers = read_manifest(name).to_grid()
+
+    steps, _, status = balance(ship_grid, containers, time_limit=30)
+
+    assert status
+    assert sum(move.cost for moves in steps for move in moves) == cost
+
+
+def test_unbalanceable_manifest_is_sifted():
+    ship_grid, containers = read_manifest("ShipCase5").to_grid()
+    weights = [slot.container.weight for row in ship_grid for slot in row if slot.hasContainer]
+
+    assert not check_balance_feasibility(weights).feasible
+
+    steps, _, status = balance(ship_grid, containers)
+
+    assert not status
+    assert steps
+
+
+def test_feasibility_check_counts_against_the_time_limit(monkeypatch):
+    check, plan = tasks.ship_balancer.check_balance_feasibility, tasks.ship_balancer.plan_balance
+    budgets = []
+
+    def slow_check(weights):
+        time.sleep(0.5)
+        return check(weights)
+
+    def spy_plan(ship_grid, max_nodes, time_limit, *args, **kwargs):
+        budgets.append(time_limit)
+        return plan(ship_grid, max_nodes, time_limit, *args, **kwargs)
+
+    monkeypatch.setattr(tasks.ship_balancer, "check_balance_feasibility", slow_check)
+    monkeypatch.setattr(tasks.ship_balancer, "plan_balance", spy_plan)
+    ship_grid, containers = read_manifest("ShipCase3").to_grid()
+
+    _, _, status = balance(ship_grid, containers, time_limit=2)
+
+    assert status
+    assert budgets and budgets[0] <= 1.5
+
+
+@pytest.mark.parametrize("rows, cols, imbalance, seed", IMBALANCED_BAYS)
+def test_beam_balance_is_no_dearer_than_greedy(rows, cols, imbalance, seed):
+    lines = generate_manifest(ShipGeometry(rows, cols), fill=0.5, imbalance=imbalance, seed=seed)
+    state = parse_manifest_lines(lines).to_state()
+    feasibility = check_balance_feasibility([weight for weight in state.cells if weight >= 0])
+    greedy = greedy_balance(state)
+
+    assert greedy is not None
+
+    plan = beam_balance(state, time_limit=2, left_range=(feasibility.lowest_left, feasibility.highest_left))
+
+    assert plan is not None
+    column_moves, cost = plan
+    final, replayed_cost = replay(state, column_moves)
+    assert replayed_cost == cost
+    assert is_balanced(final.left, final.right)
+    assert cost <= greedy[1]
+
+
+def test_greedy_balance_keeps_the_crane_path_open():
+    # Stacking the nearest right-hand column to the top used to wall the crane off after 12 moves
+    lines = generate_manifest(ShipGeometry(16, 40), fill=0.5, imbalance=2.0, seed=3)
+    state = parse_manifest_lines(lines).to_state()
+
+    assert check_balance_feasibility([weight for weight in state.cells if weight >= 0]).feasible
+
+    plan = greedy_balance(state)
+
+    assert plan is not None
+    column_moves, cost = plan
+    final, replayed_cost = replay(state, column_moves)
+    assert replayed_cost == cost
+    assert is_balanced(final.left, final.right)
+
+
+def test_beam_mode_balances_a_large_imbalanced_bay():
+    # Greedy and beam plans alike used to stack a column to the top row, walling the crane off, and end in SIFT
+    lines = generate_manifest(ShipGeometry(16, 40), fill=0.5, imbalance=2.0, seed=3)
+    ship_grid, containers = parse_manifest_lines(lines).to_grid()
+    greedy = greedy_balance(ship_grid)
+
+    steps, _, status = balance(ship_grid, containers, time_limit=3, mode="beam")
+
+    assert status
+    assert sum(move.cost for moves in steps for move in moves) <= greedy[1]
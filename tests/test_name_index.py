@@ -0,0 +1,40 @@
+# Dockership/tests/test_name_index.py
+
+"""
+Tests for the name-to-position index of containers (tasks/name_index.py).
+"""
+
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.name_index import NameIndex
+from tasks.ship_geometry import ShipGeometry
+from utils.manifest_generator import generate_manifest
+
+
+def test_adding_a_position_twice_counts_it_once():
+    names = NameIndex()
+
+    names.add("Cat", (0, 1))
+    names.add("Cat", [0, 1])
+    names.add("Cat", (1, 1))
+
+    assert len(names) == 2
+    assert names.positions("Cat") == [(1, 1), (0, 1)]
+
+    names.remove("Cat", (0, 1))
+    names.remove("Cat", (1, 1))
+    assert len(names) == 0
+    assert "Cat" not in names
+
+
+def test_count_matches_the_grid_after_moves():
+    lines = generate_manifest(ShipGeometry(8, 12), fill=0.5, duplicates=0.3, seed=2)
+    ship_grid, containers = parse_manifest_lines(lines).to_grid()
+    names = NameIndex.from_grid(ship_grid)
+    name = ship_grid[containers[0][0]][containers[0][1]].container.name
+
+    # Moving a container onto a slot already listed for its name must not inflate the count
+    names.move(name, containers[0], containers[0])
+    names.add(name, containers[0])
+
+    assert len(names) == len(containers)
+    assert names.matches(ship_grid, {name})
@@ -0,0 +1,108 @@
+# Dockership/tests/test_plan_cache.py
+
+"""
+Tests for the cache of parsed manifests and plans (utils/plan_cache.py).
+"""
+
+import os  # Paths to the bundled manifests
+
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.ship_balancer import balance
+from utils.plan_cache import PlanCache, grid_digest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def read_grid(name):
+    with open(os.path.join(DATA_DIR, f"{name}.txt")) as file:
+        return parse_manifest_lines(file.read().splitlines()).to_grid()
+
+
+def slots(ship_grid):
+    return [[(slot.container.name, slot.container.weight) if slot.hasContainer else slot.available
+             for slot in row] for row in ship_grid]
+
+
+def balance_plan(cache, ship_grid, containers, calls):
+    def compute():
+        calls.append(1)
+        return balance(ship_grid, containers)
+
+    return cache.plan(grid_digest(ship_grid), "balance", ("anytime", 10), compute)
+
+
+def test_manifest_is_parsed_once():
+    with open(os.path.join(DATA_DIR, "ShipCase1.txt"), "rb") as file:
+        data = file.read()
+    cache = PlanCache()
+
+    first = cache.manifest(data)
+    second = cache.manifest(data.decode("utf-8"))
+
+    assert second is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_plan_hits_and_misses():
+    cache = PlanCache()
+    calls = []
+    ship_grid, containers = read_grid("ShipCase3")
+    digest = grid_digest(ship_grid)
+
+    (steps, history, status), cached = balance_plan(cache, ship_grid, containers, calls)
+    assert not cached and status and steps
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    ship_grid, containers = read_grid("ShipCase3")
+    (again, _, _), cached = balance_plan(cache, ship_grid, containers, calls)
+    assert cached
+    assert len(again) == len(steps)
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Other parameters are another entry
+    _, cached = cache.plan(digest, "balance", ("beam", 10), lambda: balance(*read_grid("ShipCase3"), mode="beam"))
+    assert not cached
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_empty_and_failed_plans_are_not_cached():
+    cache = PlanCache()
+    calls = []
+    ship_grid, containers = read_grid("ShipCase3")
+
+    # A session whose container list is stale gets an empty plan, which must not stick to this ship
+    (steps, _, _), cached = balance_plan(cache, ship_grid, [], calls)
+    assert not cached and not steps
+    assert len(cache) == 0
+
+    (steps, _, status), cached = balance_plan(cache, ship_grid, containers, calls)
+    assert not cached and status and steps
+    assert len(calls) == 2
+
+    failed = ([], [], False)
+    _, cached = cache.plan("digest", "balance", (), lambda: failed)
+    result, cached = cache.plan("digest", "balance", (), lambda: failed)
+    assert result is failed and not cached
+    assert len(cache) == 1
+
+
+def test_plan_snapshot_round_trip(tmp_path):
+    calls = []
+    ship_grid, containers = read_grid("ShipCase3")
+    (steps, history, status), cached = balance_plan(PlanCache(directory=tmp_path), ship_grid, containers, calls)
+    assert not cached
+    assert len(os.listdir(tmp_path)) == 1
+
+    # A new cache, as after a restart, finds the plan on disk
+    cache = PlanCache(directory=tmp_path)
+    ship_grid, containers = read_grid("ShipCase3")
+    (restored_steps, restored, restored_status), cached = balance_plan(cache, ship_grid, containers, calls)
+
+    assert cached
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert restored_status == status
+    assert [[move.cost for move in step] for step in restored_steps] == [[move.cost for move in step] for step in steps]
+    assert slots(restored.initial_grid) == slots(history.initial_grid)
+    assert slots(restored[-1]) == slots(history[-1])
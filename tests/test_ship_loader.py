@@ -0,0 +1,109 @@
+# Dockership/tests/test_ship_loader.py
+
+"""
+Tests for planning port calls (tasks/ship_loader.py).
+"""
+
+import random  # Picking containers to unload
+import time  # Checking the port call time limit
+
+import pytest
+
+from tasks.buffer_zone import SLOT_COST, BufferZone
+from tasks.crane import TRAVEL_COSTS
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.ship_balancer import manhattan_distance
+from tasks.ship_geometry import ShipGeometry
+from tasks.ship_loader import ColumnIndex, load_containers, plan_port_call, unload_containers
+from utils.manifest_generator import generate_manifest
+
+
+def dense_bay():
+    lines = generate_manifest(ShipGeometry(8, 12), fill=0.9314753284002946, hull="taper", duplicates=0,
+                              keep_top_free=False, seed=106)
+    return parse_manifest_lines(lines).to_grid()[0]
+
+
+def port_call_request(fill, seed, unloads, loads):
+    lines = generate_manifest(ShipGeometry(16, 40), fill=fill, duplicates=0, seed=seed)
+    ship_grid, containers = parse_manifest_lines(lines).to_grid()
+    picks = random.Random(seed).sample(containers, unloads)
+    unload_names = [ship_grid[row][col].container.name for row, col in picks]
+    load_names = [f"New{i}" for i in range(loads)]
+    return ship_grid, load_names, dict.fromkeys(load_names, 100), unload_names
+
+
+def test_port_call_on_a_dense_bay():
+    # Deep plans used to exhaust the recursion limit before a first plan was found
+    ship_grid = dense_bay()
+    unload_names = ["Nails 0007", "Wool 0033", "Paper 0008", "Toys 0024"]
+    load_names = ["New0", "New1", "New2"]
+    load_weights = dict.fromkeys(load_names, 100)
+
+    final_grid, messages, cost, steps = plan_port_call(ship_grid, load_names, load_weights, unload_names)
+
+    assert not any(message.startswith("Error") for message in messages)
+    on_board = {slot.container.name for row in final_grid for slot in row if slot.hasContainer}
+    assert on_board.isdisjoint(unload_names)
+    assert on_board.issuperset(load_names)
+    assert cost == sum(move.cost for moves in steps.steps for move in moves)
+
+    unloaded, _, unload_cost, _ = unload_containers(ship_grid, unload_names)
+    _, _, load_cost, _ = load_containers(unloaded, load_names, load_weights)
+    assert cost <= unload_cost + load_cost
+
+
+def test_buffer_trips_lift_over_the_stacks():
+    # The crane cannot carry a container through the stacks between it and the origin
+    ship_grid = dense_bay()
+    index = ColumnIndex(ship_grid)
+    origin = ShipGeometry.from_grid(ship_grid).crane_origin
+    col = max(range(index.cols), key=lambda c: (abs(c - origin[1]), index.heights[c]))
+    pos = (index.heights[col] - 1, col)
+    buffer = BufferZone()
+    slot = buffer.next_slot()
+
+    travel = TRAVEL_COSTS.slot_cost(index.heights, index.rows, pos, origin)
+    assert travel > manhattan_distance(pos, origin)
+
+    buffer_travel = manhattan_distance(buffer.entry, slot)
+    assert buffer.cost_in(pos, origin, slot, index=index) == (travel + buffer_travel) * SLOT_COST + buffer.transfer_cost
+    assert buffer.cost_out(slot, origin, pos, index=index) == (buffer_travel + travel) * SLOT_COST + buffer.transfer_cost
+    assert buffer.round_trip_cost(pos, origin, index=index) > buffer.round_trip_cost(pos, origin)
+
+
+@pytest.mark.parametrize("fill, seed", [(0.5, 0), (0.85, 3), (0.85, 4), (0.3, 5)])
+def test_port_call_is_no_dearer_than_unloading_then_loading(fill, seed):
+    ship_grid, load_names, load_weights, unload_names = port_call_request(fill, seed, 4, 3)
+
+    _, messages, cost, steps = plan_port_call(ship_grid, load_names, load_weights, unload_names, time_limit=0.2)
+
+    assert not any(message.startswith("Error") for message in messages)
+    assert cost == sum(move.cost for moves in steps.steps for move in moves)
+    unloaded, _, unload_cost, _ = unload_containers(ship_grid, unload_names)
+    _, _, load_cost, _ = load_containers(unloaded, load_names, load_weights)
+    assert cost <= unload_cost + load_cost
+
+
+def test_port_call_keeps_to_its_time_limit():
+    ship_grid, load_names, load_weights, unload_names = port_call_request(0.85, 7, 12, 8)
+
+    start = time.perf_counter()
+    _, messages, _, _ = plan_port_call(ship_grid, load_names, load_weights, unload_names, time_limit=0.1)
+
+    assert time.perf_counter() - start < 0.5
+    assert not [message for message in messages if message.startswith("Error")]
+
+
+def test_port_call_on_a_full_bay():
+    # With no free slot on board, blockers can only go to the buffer, which the joint search does not use
+    lines = generate_manifest(ShipGeometry(4, 6), fill=1.0, keep_top_free=False, seed=2)
+    ship_grid, _ = parse_manifest_lines(lines).to_grid()
+
+    final_grid, messages, cost, _ = plan_port_call(ship_grid, ["New"], {"New": 100}, ["Cocoa 0000"])
+
+    assert not [message for message in messages if message.startswith("Error")]
+    on_board = [slot.container.name for row in final_grid for slot in row if slot.hasContainer]
+    assert "Cocoa 0000" not in on_board
+    assert "New" in on_board
+    assert cost > 0
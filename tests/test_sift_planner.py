@@ -0,0 +1,72 @@
+# Dockership/tests/test_sift_planner.py
+
+"""
+Tests for SIFT planning (tasks/sift_planner.py).
+"""
+
+from tasks.balance_portfolio import replay
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.ship_geometry import ShipGeometry
+from tasks.ship_state import ShipState
+from tasks.sift_planner import greedy_sift, plan_sift, sift_target
+from utils.manifest_generator import generate_manifest
+
+
+def walled_bay():
+    # Column 1 is stacked to the top row, between two containers and their target cells
+    lines = generate_manifest(ShipGeometry(4, 6), fill=0.4, hull="taper", weights="bimodal",
+                              keep_top_free=False, seed=32)
+    return ShipState.of(parse_manifest_lines(lines).to_grid()[0])
+
+
+def dense_bay(fill, keep_top_free):
+    lines = generate_manifest(ShipGeometry(8, 12), fill=fill, hull="taper", weights="bimodal",
+                              keep_top_free=keep_top_free, seed=0)
+    return ShipState.of(parse_manifest_lines(lines).to_grid()[0])
+
+
+def test_greedy_sift_lowers_a_full_column():
+    state = walled_bay()
+    target, order = sift_target(state)
+
+    plan = greedy_sift(state, target, order)
+
+    assert plan is not None
+    final, cost = replay(state, plan[0])
+    assert final.cells == target
+    assert cost == plan[1]
+
+
+def test_plan_sift_across_a_full_column():
+    state = walled_bay()
+
+    plan = plan_sift(state)
+
+    assert plan is not None
+    final, cost = replay(state, plan[0])
+    assert final.cells == sift_target(state)[0]
+    assert cost == plan[1]
+
+
+def test_greedy_sift_fills_a_dense_bay():
+    # Only the top row is free, so the crane has to dig and park throughout
+    state = dense_bay(0.95, keep_top_free=True)
+    target, order = sift_target(state)
+
+    plan = greedy_sift(state, target, order)
+
+    assert plan is not None
+    final, cost = replay(state, plan[0])
+    assert final.cells == target
+    assert cost == plan[1]
+
+
+def test_plan_sift_on_a_dense_bay():
+    state = dense_bay(0.8, keep_top_free=False)
+
+    plan = plan_sift(state)
+
+    assert plan is not None
+    final, cost = replay(state, plan[0])
+    assert final.cells == sift_target(state)[0]
+    assert cost == plan[1]
@@ -0,0 +1,111 @@
+# Dockership/tests/test_snapshot.py
+
+"""
+Tests for binary ship and plan snapshots (tasks/snapshot.py).
+"""
+
+import os  # Paths to the bundled manifests
+
+import pytest
+
+from tasks.manifest_parser import parse_manifest_lines
+from tasks.ship_balancer import balance
+from tasks.ship_geometry import ShipGeometry
+from tasks.ship_loader import unload_containers
+from tasks.ship_state import ShipState
+from tasks.snapshot import SnapshotError, read_snapshot, write_snapshot
+from utils.manifest_generator import generate_manifest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def slots(ship_grid):
+    """
+    Returns what a grid holds, slot by slot, for comparing grids.
+    """
+    return [[(slot.container.name, slot.container.weight) if slot.hasContainer else slot.available
+             for slot in row] for row in ship_grid]
+
+
+def assert_same_plan(history, restored):
+    assert len(restored) == len(history)
+    assert slots(restored.initial_grid) == slots(history.initial_grid)
+    for index in range(len(history)):
+        assert slots(restored[index]) == slots(history[index])
+        assert restored.info(index) == history.info(index)
+
+
+def buffered_unload():
+    # Digging out the bottom container of a packed bay sends its blockers to the buffer
+    lines = generate_manifest(ShipGeometry(4, 6), fill=0.9, hull="taper", duplicates=0, keep_top_free=False, seed=0)
+    ship_grid, containers = parse_manifest_lines(lines).to_grid()
+    row, col = min(containers)
+    return ship_grid, unload_containers(ship_grid, [ship_grid[row][col].container.name])
+
+
+def test_ship_state_round_trip(tmp_path):
+    with open(os.path.join(DATA_DIR, "ShipCase4.txt")) as file:
+        ship_grid, _ = parse_manifest_lines(file.read().splitlines()).to_grid()
+    path = tmp_path / "ship.snap"
+
+    write_snapshot(path, ship_grid)
+
+    with read_snapshot(path) as snapshot:
+        assert snapshot.steps == 0
+        assert snapshot.to_state() == ShipState.from_grid(ship_grid)
+        assert slots(snapshot.to_grid()) == slots(ship_grid)
+
+
+def test_ship_state_compares_unequal_to_other_types():
+    with open(os.path.join(DATA_DIR, "ShipCase1.txt")) as file:
+        state = ShipState.from_grid(parse_manifest_lines(file.read().splitlines()).to_grid()[0])
+
+    assert state != None  # noqa: E711
+    assert state != 1
+    assert (state == None) is False  # noqa: E711
+    assert state in {state: 0}
+
+
+def test_plan_round_trip_with_buffer_moves(tmp_path):
+    ship_grid, (final_grid, messages, cost, history) = buffered_unload()
+    moves = [move for index in range(len(history)) for move in history.moves(index)]
+    assert any(move.to_row == -1 for move in moves) and any(move.from_row == -1 for move in moves)
+    path = tmp_path / "unload.snap"
+
+    write_snapshot(path, history.initial_grid, history, messages=messages, cost=cost)
+
+    with read_snapshot(path) as snapshot:
+        assert snapshot.cost == cost
+        assert snapshot.messages == messages
+        assert snapshot.to_state() == ShipState.from_grid(ship_grid)
+        restored = snapshot.to_history()
+    assert_same_plan(history, restored)
+    assert slots(restored[-1]) == slots(final_grid)
+
+
+def test_balance_plan_round_trip(tmp_path):
+    with open(os.path.join(DATA_DIR, "ShipCase3.txt")) as file:
+        ship_grid, containers = parse_manifest_lines(file.read().splitlines()).to_grid()
+    _, history, status = balance(ship_grid, containers)
+    path = tmp_path / "balance.snap"
+
+    write_snapshot(path, history.initial_grid, history, status=status)
+
+    with read_snapshot(path) as snapshot:
+        assert snapshot.status == status
+        assert snapshot.cost == sum(move.cost for moves in history.steps for move in moves)
+        assert_same_plan(history, snapshot.to_history())
+
+
+def test_rejects_other_and_truncated_files(tmp_path):
+    _, (_, messages, cost, history) = buffered_unload()
+    path = tmp_path / "unload.snap"
+    write_snapshot(path, history.initial_grid, history, messages=messages, cost=cost)
+    data = path.read_bytes()
+
+    (tmp_path / "truncated.snap").write_bytes(data[:-1])
+    (tmp_path / "other.snap").write_bytes(b"NOPE" + data[4:])
+    (tmp_path / "empty.snap").write_bytes(b"")
+    for name in ("truncated.snap", "other.snap", "empty.snap"):
+        with pytest.raises(SnapshotError):
+            read_snapshot(tmp_path / name)
@@ -0,0 +1,230 @@
+# Dockership/utils/manifest_generator.py
+
+"""
+Seeded generator of synthetic ship manifests.
+
+Produces manifests in the "[rr,cc], {wwwww}, NAME" format read by
+update_ship_grid, for bays of any size. The fill ratio, NAN hull shape, weight
+distribution, share of duplicate names and left/right imbalance can all be
+chosen. The same arguments and seed always give the same manifest.
+
+Usage (from the repository root):
+    python -m utils.manifest_generator --size 12x24 --fill 0.5 --weights bimodal --seed 3 -o ship.txt
+"""
+
+import argparse  # Command-line options
+import random  # Seeded choices
+
+from tasks.ship_geometry import DEFAULT_GEOMETRY, ShipGeometry  # Bay dimensions
+
+HULL_SHAPES = ("none", "taper", "random")
+WEIGHT_DISTRIBUTIONS = ("uniform", "heavy-tailed", "bimodal")
+
+MAX_WEIGHT = 99999
+
+# Words used to build container names; some names get a space to exercise parsing
+CARGO_WORDS = ("Rice", "Cat", "Dog", "Ewe", "Bikes", "Salt", "Toys", "Tea", "Wool", "Paper",
+               "Nails", "Cocoa", "Tyres", "Glass", "Maple Syrup", "Spare Parts")
+
+
+def hull_cells(geometry, shape, depth, rng):
+    """
+    Returns the NAN cells of the hull.
+
+    "taper" narrows the bottom rows symmetrically like the bundled manifests:
+    the bottom row loses `depth` columns at each end, the next one `depth - 1`,
+    and so on. "random" gives every column a NAN stack of 0 to `depth` cells.
+    "none" leaves every slot usable.
+
+    Args:
+        geometry (ShipGeometry): Bay dimensions.
+        shape (str): One of HULL_SHAPES.
+        depth (int): How far the hull reaches into the bay.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        set: 0-based (row, col) cells that are NAN.
+    """
+    cells = set()
+    if shape == "taper":
+        for row in range(min(depth, geometry.rows - 1)):
+            width = min(depth - row, geometry.cols // 2)
+            for col in list(range(width)) + list(range(geometry.cols - width, geometry.cols)):
+                cells.add((row, col))
+    elif shape == "random":
+        for col in range(geometry.cols):
+            for row in range(rng.randint(0, min(depth, geometry.rows - 1))):
+                cells.add((row, col))
+    elif shape != "none":
+        raise ValueError(f"Unknown hull shape '{shape}', expected one of {HULL_SHAPES}.")
+    return cells
+
+
+def draw_weight(distribution, rng):
+    """
+    Draws one container weight in kilograms.
+
+    "uniform" spreads weights evenly over the whole range. "heavy-tailed" draws
+    from a Pareto law, so most containers are light and a few are very heavy.
+    "bimodal" mixes light and heavy containers around two typical weights.
+    """
+    if distribution == "uniform":
+        weight = rng.randint(1, MAX_WEIGHT)
+    elif distribution == "heavy-tailed":
+        weight = int(500 * rng.paretovariate(1.2))
+    elif distribution == "bimodal":
+        weight = int(rng.gauss(2000, 400) if rng.random() < 0.6 else rng.gauss(20000, 3000))
+    else:
+        raise ValueError(f"Unknown weight distribution '{distribution}', "
+                         f"expected one of {WEIGHT_DISTRIBUTIONS}.")
+    return max(1, min(MAX_WEIGHT, weight))
+
+
+def container_names(count, duplicates, rng):
+    """
+    Returns `count` container names, about `duplicates` of them repeating an earlier name.
+    """
+    names = []
+    for i in range(count):
+        if names and rng.random() < duplicates:
+            names.append(rng.choice(names))
+        else:
+            names.append(f"{rng.choice(CARGO_WORDS)} {i:04d}")
+    return names
+
+
+def assign_weights(weights, slots, mid, imbalance):
+    """
+    Pairs weights with slots, steering the left/right split towards `imbalance`.
+
+    Heaviest weights are placed first, each on the side that keeps the left
+    share of the total closest to the target, unless that side has no slots
+    left. How close the result gets depends on the slots each side was given.
+
+    Args:
+        weights (list[int]): Container weights.
+        slots (list[tuple]): (row, col) slots to fill, one per weight.
+        mid (int): First column of the right half.
+        imbalance (float): Target left / right weight ratio.
+
+    Returns:
+        dict: (row, col) -> weight
+    """
+    sides = {True: [s for s in slots if s[1] < mid], False: [s for s in slots if s[1] >= mid]}
+    left_share = imbalance / (1 + imbalance)
+    placed, totals = {}, {True: 0, False: 0}
+
+    for weight in sorted(weights, reverse=True):
+        total = totals[True] + totals[False] + weight
+        # Put it on whichever side leaves the left share closer to the target
+        side = abs((totals[True] + weight) / total - left_share) <= abs(totals[True] / total - left_share)
+        if not sides[side]:
+            side = not side
+        placed[sides[side].pop()] = weight
+        totals[side] += weight
+
+    return placed
+
+
+def generate_manifest(geometry=DEFAULT_GEOMETRY, fill=0.5, hull="taper", hull_depth=2,
+                      weights="uniform", duplicates=0.0, imbalance=None, keep_top_free=True,
+                      seed=0):
+    """
+    Generates a synthetic manifest.
+
+    Containers are stacked from the bottom of randomly chosen columns, so none
+    float over an empty slot.
+
+    Args:
+        geometry (ShipGeometry): Bay dimensions.
+        fill (float): Fraction of the usable slots to fill, between 0 and 1.
+        hull (str): NAN hull shape, one of HULL_SHAPES.
+        hull_depth (int): How far the hull reaches into the bay.
+        weights (str): Weight distribution, one of WEIGHT_DISTRIBUTIONS.
+        duplicates (float): Chance that a container repeats an earlier name.
+        imbalance (float, optional): Target left / right weight ratio; None
+            leaves weights where they fall.
+        keep_top_free (bool): Keep the top row empty so the crane can pass over
+            every stack.
+        seed (int): Random seed.
+
+    Returns:
+        list[str]: Manifest lines, row by row from the bottom.
+    """
+    if not 0 <= fill <= 1:
+        raise ValueError(f"Fill ratio must be between 0 and 1, got {fill}.")
+
+    rng = random.Random(seed)
+    nan = hull_cells(geometry, hull, hull_depth, rng)
+    top = geometry.rows - 1 if keep_top_free else geometry.rows
+
+    # Free slots of each column, bottom up
+    stacks = [[row for row in range(top) if (row, col) not in nan] for col in range(geometry.cols)]
+    count = int(fill * sum(len(stack) for stack in stacks))
+
+    slots = []
+    while len(slots) < count:
+        col = rng.choice([c for c, stack in enumerate(stacks) if stack])
+        slots.append((stacks[col].pop(0), col))
+
+    container_weights = [draw_weight(weights, rng) for _ in slots]
+    if imbalance is None:
+        placed = dict(zip(slots, container_weights))
+    else:
+        placed = assign_weights(container_weights, slots, geometry.mid, imbalance)
+
+    names = dict(zip(sorted(placed), container_names(len(placed), duplicates, rng)))
+    width = max(2, len(str(max(geometry.rows, geometry.cols))))
+
+    lines = []
+    for row in range(geometry.rows):
+        for col in range(geometry.cols):
+            coords = f"[{row + 1:0{width}d},{col + 1:0{width}d}]"
+            if (row, col) in nan:
+                lines.append(f"{coords}, {{00000}}, NAN")
+            elif (row, col) in placed:
+                lines.append(f"{coords}, {{{placed[row, col]:05d}}}, {names[row, col]}")
+            else:
+                lines.append(f"{coords}, {{00000}}, UNUSED")
+    return lines
+
+
+def parse_size(text):
+    """
+    Parses a "ROWSxCOLS" argument into a ShipGeometry.
+    """
+    try:
+        rows, cols = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected ROWSxCOLS, got '{text}'.")
+    return ShipGeometry(rows, cols)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic ship manifest.")
+    parser.add_argument("--size", type=parse_size, default=DEFAULT_GEOMETRY, help="Bay size as ROWSxCOLS.")
+    parser.add_argument("--fill", type=float, default=0.5, help="Fraction of usable slots to fill.")
+    parser.add_argument("--hull", choices=HULL_SHAPES, default="taper", help="NAN hull shape.")
+    parser.add_argument("--hull-depth", type=int, default=2, help="How far the hull reaches into the bay.")
+    parser.add_argument("--weights", choices=WEIGHT_DISTRIBUTIONS, default="uniform",
+                        help="Weight distribution.")
+    parser.add_argument("--duplicates", type=float, default=0.0,
+                        help="Chance that a container repeats an earlier name.")
+    parser.add_argument("--imbalance", type=float, default=None, help="Target left / right weight ratio.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument("-o", "--output", help="File to write; prints to stdout if omitted.")
+    args = parser.parse_args(argv)
+
+    lines = generate_manifest(args.size, fill=args.fill, hull=args.hull, hull_depth=args.hull_depth,
+                              weights=args.weights, duplicates=args.duplicates,
+                              imbalance=args.imbalance, seed=args.seed)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write("\n".join(lines) + "\n")
+    else:
+        print("\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# Dockership/utils/plan_cache.py
+
+"""
+Content-addressed cache of parsed manifests and the plans computed for them.
+
+Streamlit reruns a page on every click, and several operators may open the
+same manifest. Entries are keyed by the SHA-256 of manifest bytes: the uploaded
+file for a parsed manifest, and the manifest of the grid an operation starts
+from for a plan, so a balance, load or unload requested again on the same ship
+with the same parameters is answered without planning. Results that move
+nothing (a ship already balanced, or planning that failed) are cheap to redo and
+may depend on more than the grid, so they are never kept. The least recently used
+entry is dropped once `maxsize` are kept. Given a directory, plans are also
+written there as binary snapshots, so a restarted app finds them again; the
+directory is held to `maxsize` snapshots too, dropping the least recently used.
+The module-level PLAN_CACHE is shared by every session in the app process.
+"""
+
+import copy  # Cached plans are handed out as copies
+import hashlib  # Manifest digests
+import os  # Snapshot paths
+import threading  # Sessions run in separate threads
+from collections import OrderedDict  # LRU order
+
+from tasks.manifest_parser import parse_manifest_lines  # One-pass manifest parser
+from tasks.ship_balancer import update_manifest  # Canonical manifest of a grid
+from tasks.snapshot import DEFAULT_SNAPSHOT_DIR, SnapshotError, read_snapshot, write_snapshot
+
+# Entries kept before the least recently used one is dropped
+DEFAULT_PLAN_CACHE_SIZE = 128
+
+
+class ParsedManifest:
+    """
+    A manifest parsed once.
+
+    Attributes:
+        digest (str): SHA-256 of the manifest bytes, in hex.
+        manifest (Manifest): The parsed entries.
+    """
+
+    __slots__ = ("digest", "manifest")
+
+    def __init__(self, digest, manifest):
+        self.digest = digest
+        self.manifest = manifest
+
+
+def manifest_digest(data):
+    """
+    Returns the SHA-256 of manifest bytes (or text, encoded as UTF-8), in hex.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def grid_digest(ship_grid):
+    """
+    Returns the digest of the manifest a grid would be written out as.
+    """
+    return manifest_digest("\n".join(update_manifest(ship_grid)))
+
+
+def _moves_nothing(operation, result):
+    """
+    Returns True for a balance, load or unload result without a single move.
+    """
+    if operation == "balance":
+        return not result[0]
+    return not len(result[3])
+
+
+def _write_plan(path, operation, result):
+    """
+    Writes a balance, load or unload result as a snapshot.
+    """
+    if operation == "balance":
+        _, history, status = result
+        write_snapshot(path, history.initial_grid, history, status=status)
+    else:
+        _, messages, cost, history = result
+        write_snapshot(path, history.initial_grid, history, messages=messages, cost=cost)
+
+
+def _touch(path):
+    """
+    Marks a snapshot as just used, so pruning keeps it longest.
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        pass  # Pruned by another process; it is written again on the next miss
+
+
+def _read_plan(path, operation):
+    """
+    Rebuilds a balance, load or unload result from its snapshot.
+    """
+    with read_snapshot(path) as snapshot:
+        history = snapshot.to_history()
+        if operation == "balance":
+            return history.steps, history, snapshot.status
+        final_grid = history[-1] if len(history) else history.initial_grid
+        return final_grid, snapshot.messages, snapshot.cost, history
+
+
+class PlanCache:
+    """
+    LRU cache of parsed manifests and plans, keyed by manifest digest.
+
+    Attributes:
+        maxsize (int): Most entries (parsed manifests and plans together) kept.
+        directory (str or None): Where plans are kept as snapshots (at most maxsize of them),
+            or None to keep them in memory only.
+        hits (int): Lookups answered from the cache or a snapshot.
+        misses (int): Lookups that had to parse or plan.
+    """
+
+    def __init__(self, maxsize=DEFAULT_PLAN_CACHE_SIZE, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def manifest(self, data):
+        """
+        Returns the parsed manifest for manifest bytes, parsing them only the first time.
+
+        Args:
+            data (bytes or str): The manifest file contents.
+
+        Returns:
+            ParsedManifest: The parsed manifest; treat it as read-only.
+
+        Raises:
+            ManifestError: If a line is malformed.
+        """
+        digest = manifest_digest(data)
+        parsed = self._get((digest,))
+        if parsed is None:
+            text = data.decode("utf-8") if isinstance(data, bytes) else data
+            parsed = ParsedManifest(digest, parse_manifest_lines(text.splitlines()))
+            self._put((digest,), parsed)
+        return parsed
+
+    def plan(self, digest, operation, params, compute):
+        """
+        Returns the result of an operation on a ship, computing it only the first time.
+
+        Results without a single move are returned as computed but not cached,
+        so a failed plan is attempted again on the next request.
+
+        Args:
+            digest (str): grid_digest of the grid the operation starts from.
+            operation (str): "balance", "load" or "unload".
+            params (tuple): Hashable parameters the result depends on.
+            compute (callable): Called with no arguments to compute the result on a miss.
+
+        Returns:
+            tuple: (result, cached), where cached is True if the result was
+                reused. The result is a copy, so the caller may change it.
+        """
+        key = (digest, operation, params)
+        result = self._get(key)
+        if result is not None:
+            return copy.deepcopy(result), True
+
+        path = self._snapshot_path(key)
+        if path is not None and os.path.exists(path):
+            try:
+                result = _read_plan(path, operation)
+            except SnapshotError:
+                pass  # Written by another version; plan again and replace it
+            else:
+                if _moves_nothing(operation, result):
+                    result = None  # Written before empty results were skipped; plan again
+            if result is not None:
+                with self._lock:
+                    self.misses -= 1
+                    self.hits += 1
+                self._put(key, copy.deepcopy(result))
+                _touch(path)
+                return result, True
+
+        result = compute()
+        if _moves_nothing(operation, result):
+            return result, False
+        self._put(key, copy.deepcopy(result))
+        if path is not None:
+            _write_plan(path, operation, result)
+            self._prune()
+        return result, False
+
+    def _snapshot_path(self, key):
+        if self.directory is None:
+            return None
+        name = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.snap")
+
+    def _prune(self):
+        """
+        Deletes the least recently used snapshots beyond maxsize.
+        """
+        snapshots = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".snap"):
+                try:
+                    snapshots.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass  # Pruned by another process
+        snapshots.sort()
+        for _, path in snapshots[:max(len(snapshots) - self.maxsize, 0)]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# Shared by every session in the app process, and kept on disk across restarts
+PLAN_CACHE = PlanCache(directory=DEFAULT_SNAPSHOT_DIR)
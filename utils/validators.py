@@ -4,6 +4,9 @@ import re  # For validating string patterns
 from config.db_config import DBConfig  # For database connection
 from tasks.ship_balancer import Slot  # Import Slot class to validate ship grid
 
+# Largest manifest accepted, with room for 16x40 bays and long container names
+MAX_MANIFEST_SIZE = 250000
+
 # Initialize DBConfig
 db_config = DBConfig()
 db = db_config.connect()  # Establish a connection to the database
@@ -92,7 +95,7 @@ def validate_file_content(file_content):
     """
     if not file_content.strip():
         return False, "The uploaded file is empty."
-    if len(file_content) > 10000:  # Arbitrary limit for demonstration
+    if len(file_content) > MAX_MANIFEST_SIZE:
         return False, "The uploaded file exceeds the allowed size."
     return True, ""
 
@@ -8,48 +8,39 @@ import numpy as np  # For numerical operations and creating the grid
 # (Optional) For additional visualization methods
 import matplotlib.pyplot as plt
 import streamlit as st  # For Streamlit-based visualizations
-import re  # For parsing manifest input lines
 import plotly.graph_objects as go  # For creating interactive grid visualizations
+from tasks.manifest_parser import parse_manifest_lines  # Shared manifest parser
 
 
-def parse_input(input_lines, rows=8, cols=12):
+def parse_input(input_lines, geometry=None):
     """
     Parses input data into a grid format.
 
     Args:
         input_lines (list): List of input lines from the manifest file.
-        rows (int): Number of rows in the grid.
-        cols (int): Number of columns in the grid.
+        geometry (ShipGeometry, optional): Bay geometry; read from the manifest if omitted.
 
     Returns:
         numpy.ndarray: Parsed grid layout where each cell contains a container name or "UNUSED".
+
+    Raises:
+        ManifestError: If a line is malformed.
     """
+    manifest = parse_manifest_lines(input_lines)
+    geometry = geometry or manifest.geometry()
+    rows, cols = geometry.rows, geometry.cols
+
     # Initialize the grid with default value "UNUSED"
     grid = np.full((rows, cols), "UNUSED", dtype=object)
 
-    # Define a regex pattern to extract coordinates and container information
-    line_regex = re.compile(r"\[(\d+),(\d+)\]\s*,\s*\{\d+\}\s*,\s*(\w+)")
-
-    for line in input_lines:
-        line = line.strip()
-        if not line:  # Skip empty lines
-            continue
-
-        # Match line format using the regex pattern
-        match = line_regex.match(line)
-        if match:
-            row, col, container = match.groups()
-            row, col = int(row), int(col)
-
-            # Convert coordinates to grid indices
-            # Reverse row indexing for grid (row 1 is bottom)
-            grid_row = rows - row
-            grid_col = col - 1  # Convert 1-based to 0-based indexing
-
-            # Check if coordinates are within grid bounds
-            if 0 <= grid_row < rows and 0 <= grid_col < cols:
-                # Assign the container name to the grid cell
-                grid[grid_row, grid_col] = container
+    for row, col, _, _, container in manifest.records():
+        # Reverse row indexing for grid (row 1 is bottom)
+        grid_row = rows - 1 - row
+
+        # Check if coordinates are within grid bounds
+        if 0 <= grid_row < rows and col < cols:
+            # Assign the container name to the grid cell
+            grid[grid_row, col] = container
 
     return grid
 